@@ -0,0 +1,351 @@
+"""
+Correlação entre internações por SRAG e avanço da vacinação
+
+As duas fontes são agregadas por município e semana epidemiológica e alinhadas
+em matrizes (municípios x semanas). As correlações de Pearson são calculadas
+para todos os municípios e todas as defasagens de uma vez: as somas cruzadas
+vêm de uma única FFT e as somas de cada trecho sobreposto, de somas
+acumuladas, sem laços em Python por município ou por defasagem.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Defasagem máxima padrão, em semanas
+DEFASAGEM_MAXIMA = 12
+
+# Mínimo de semanas sobrepostas para calcular uma correlação
+MINIMO_SEMANAS = 8
+
+# Variância abaixo deste valor é tratada como série constante (correlação indefinida)
+EPSILON = 1e-12
+
+
+def inicio_semana_epidemiologica(datas):
+    """
+    Retorna o domingo que inicia a semana epidemiológica de cada data
+
+    Args:
+        datas (pandas.Series): Datas (valores inválidos viram NaT)
+
+    Returns:
+        pandas.Series: Data de início da semana (datetime64)
+    """
+    datas = pd.to_datetime(datas, errors='coerce', dayfirst=True).dt.normalize()
+    return datas - pd.to_timedelta((datas.dt.dayofweek + 1) % 7, unit='D')
+
+
+def semana_epidemiologica(datas):
+    """
+    Calcula ano e semana epidemiológica de cada data, de forma vetorizada
+
+    As semanas começam no domingo e a semana 1 é a primeira com pelo menos
+    quatro dias no ano, ou seja, a que contém 4 de janeiro.
+
+    Args:
+        datas (pandas.Series): Datas
+
+    Returns:
+        pandas.DataFrame: Colunas 'semana_inicio', 'ano_epi' e 'semana_epi'
+    """
+    inicio = inicio_semana_epidemiologica(datas)
+    # O ano epidemiológico é o da quarta-feira da semana
+    ano = (inicio + pd.Timedelta(days=3)).dt.year
+    quatro_de_janeiro = pd.to_datetime(
+        pd.DataFrame({'year': ano, 'month': 1, 'day': 4}), errors='coerce'
+    )
+    inicio_ano = inicio_semana_epidemiologica(quatro_de_janeiro)
+    semana = (inicio - inicio_ano).dt.days // 7 + 1
+    return pd.DataFrame({
+        'semana_inicio': inicio,
+        'ano_epi': ano.astype('Int16'),
+        'semana_epi': semana.astype('Int8'),
+    })
+
+
+def registros_para_dataframe(cabecalho, dados):
+    """
+    Monta um DataFrame com as linhas extraídas de um boletim (extrair_dados_pdf)
+
+    Linhas com mais campos que o cabeçalho ganham colunas 'coluna_N'.
+    """
+    total_colunas = max([len(cabecalho)] + [len(linha) for linha in dados])
+    nomes = list(cabecalho) + [f'coluna_{i + 1}' for i in range(len(cabecalho), total_colunas)]
+    return pd.DataFrame(list(dados), columns=nomes[:total_colunas])
+
+
+def serie_semanal(df, coluna_data, coluna_municipio, coluna_valor=None):
+    """
+    Agrega registros por município e semana epidemiológica
+
+    Args:
+        df (pandas.DataFrame): Registros (ex.: microdados de SRAG ou exportação do vacinômetro)
+        coluna_data (str): Coluna com a data do registro
+        coluna_municipio (str): Coluna com o município
+        coluna_valor (str, optional): Coluna somada na semana (ex.: doses aplicadas).
+                                      Se None, conta os registros (ex.: internações)
+
+    Returns:
+        pandas.DataFrame: Colunas 'municipio', 'semana_inicio', 'ano_epi', 'semana_epi' e 'valor'
+    """
+    semanas = semana_epidemiologica(df[coluna_data])
+    tabela = pd.DataFrame({
+        'municipio': df[coluna_municipio].astype(str).str.strip().str.upper().to_numpy(),
+        'semana_inicio': semanas['semana_inicio'].to_numpy(),
+        'valor': (
+            pd.to_numeric(df[coluna_valor], errors='coerce').to_numpy()
+            if coluna_valor else np.ones(len(df))
+        ),
+    }).dropna(subset=['semana_inicio'])
+
+    agregado = tabela.groupby(['municipio', 'semana_inicio'], sort=True, observed=True)['valor'].sum()
+    agregado = agregado.reset_index()
+    semanas = semana_epidemiologica(agregado['semana_inicio'])
+    agregado['ano_epi'] = semanas['ano_epi'].to_numpy()
+    agregado['semana_epi'] = semanas['semana_epi'].to_numpy()
+    return agregado[['municipio', 'semana_inicio', 'ano_epi', 'semana_epi', 'valor']]
+
+
+def serie_de_resumo(linhas, coluna_local='municipio', coluna_valor='casos'):
+    """
+    Monta a série semanal a partir de um resumo do banco local, sem reagregar registros
+
+    Args:
+        linhas (list): Saída de BancoDados.consultar_resumo_srag() ou consultar_resumo_vacinacao()
+        coluna_local (str): Coluna do local no resumo ('municipio' ou 'uf')
+        coluna_valor (str): Coluna somada na semana ('casos' ou 'doses')
+
+    Returns:
+        pandas.DataFrame: Mesmas colunas de serie_semanal(), com o local na coluna 'municipio'
+    """
+    colunas = ['municipio', 'semana_inicio', 'ano_epi', 'semana_epi', 'valor']
+    if not linhas:
+        return pd.DataFrame(columns=colunas)
+    tabela = pd.DataFrame(linhas).rename(columns={coluna_local: 'municipio', coluna_valor: 'valor'})
+    tabela['semana_inicio'] = pd.to_datetime(tabela['semana_inicio'])
+    # O resumo da SRAG separa as classificações; a série soma todas as da semana
+    agregado = tabela.groupby(['municipio', 'semana_inicio'], sort=True).agg(
+        ano_epi=('ano_epi', 'first'), semana_epi=('semana_epi', 'first'), valor=('valor', 'sum')
+    ).reset_index()
+    agregado['ano_epi'] = agregado['ano_epi'].astype('Int16')
+    agregado['semana_epi'] = agregado['semana_epi'].astype('Int8')
+    agregado['valor'] = agregado['valor'].astype(np.float64)
+    return agregado[colunas]
+
+
+def alinhar_series(srag, vacinacao, acumular_vacinacao=False):
+    """
+    Alinha as duas séries semanais em matrizes municípios x semanas
+
+    Usa só os municípios presentes nas duas fontes e todas as semanas do
+    período comum. Semanas sem internações contam como zero; semanas sem
+    registro de vacinação também, ou repetem o total anterior quando a
+    vacinação é acumulada.
+
+    Args:
+        srag (pandas.DataFrame): Saída de serie_semanal() para as internações
+        vacinacao (pandas.DataFrame): Saída de serie_semanal() para a vacinação
+        acumular_vacinacao (bool): Usa o total acumulado de doses (cobertura) em vez das doses da semana
+
+    Returns:
+        tuple: (municípios, semanas, matriz de internações, matriz de vacinação)
+    """
+    municipios = np.intersect1d(srag['municipio'].unique(), vacinacao['municipio'].unique())
+    inicio = max(srag['semana_inicio'].min(), vacinacao['semana_inicio'].min())
+    fim = min(srag['semana_inicio'].max(), vacinacao['semana_inicio'].max())
+    if len(municipios) == 0 or pd.isna(inicio) or inicio > fim:
+        return municipios, pd.DatetimeIndex([]), np.empty((0, 0)), np.empty((0, 0))
+
+    semanas = pd.date_range(inicio, fim, freq='7D')
+
+    def matriz(serie, acumular=False):
+        tabela = serie.pivot_table(
+            index='municipio', columns='semana_inicio', values='valor', aggfunc='sum'
+        )
+        if acumular:
+            # O acumulado precisa das semanas anteriores ao período comum
+            tabela = tabela.fillna(0).cumsum(axis=1)
+        tabela = tabela.reindex(index=municipios, columns=semanas)
+        if acumular:
+            tabela = tabela.ffill(axis=1)
+        return tabela.fillna(0).to_numpy(dtype=np.float64)
+
+    return municipios, semanas, matriz(srag), matriz(vacinacao, acumular_vacinacao)
+
+
+def correlacao_defasada(X, Y, defasagem_maxima=DEFASAGEM_MAXIMA, minimo_semanas=MINIMO_SEMANAS):
+    """
+    Correlação de Pearson entre X[t] e Y[t + k] para todas as linhas e defasagens
+
+    As somas cruzadas de todas as defasagens saem de uma FFT por linha
+    (calculada para a matriz inteira de uma vez). As somas e somas de
+    quadrados de cada trecho sobreposto saem de somas acumuladas, então a
+    correlação de cada defasagem é exata, e não uma aproximação normalizada
+    pela série inteira.
+
+    Args:
+        X (numpy.ndarray): Matriz linhas x semanas (ex.: vacinação por município)
+        Y (numpy.ndarray): Matriz de mesma forma (ex.: internações por município)
+        defasagem_maxima (int): Defasagens de -defasagem_maxima a +defasagem_maxima.
+                                Defasagem positiva: X antecede Y
+        minimo_semanas (int): Mínimo de semanas sobrepostas; abaixo disso o resultado é NaN
+
+    Returns:
+        tuple: (defasagens, correlações linhas x defasagens, semanas sobrepostas por defasagem)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    if X.shape != Y.shape or X.ndim != 2:
+        raise ValueError(f"Matrizes devem ter a mesma forma 2D: {X.shape} e {Y.shape}")
+
+    n = X.shape[1]
+    defasagem_maxima = min(defasagem_maxima, max(n - 1, 0))
+    defasagens = np.arange(-defasagem_maxima, defasagem_maxima + 1)
+    if n == 0:
+        return defasagens, np.full((X.shape[0], len(defasagens)), np.nan), np.zeros(len(defasagens), int)
+
+    # Centralizar melhora a precisão das somas; Pearson não muda com deslocamentos
+    X = X - X.mean(axis=1, keepdims=True)
+    Y = Y - Y.mean(axis=1, keepdims=True)
+
+    # cruzada[k] = soma_t X[t] * Y[t + k], com índices negativos no fim do vetor
+    tamanho = 1 << (2 * n - 1).bit_length()
+    cruzada = np.fft.irfft(np.conj(np.fft.rfft(X, tamanho)) * np.fft.rfft(Y, tamanho), tamanho)
+    soma_xy = cruzada[:, defasagens % tamanho]
+
+    # Somas acumuladas com zero inicial: soma de [a, b) = S[b] - S[a]
+    def acumular(matriz):
+        return np.concatenate([np.zeros((matriz.shape[0], 1)), np.cumsum(matriz, axis=1)], axis=1)
+
+    Sx, Sy, Sxx, Syy = acumular(X), acumular(Y), acumular(X * X), acumular(Y * Y)
+
+    # Trecho sobreposto: X em [inicio_x, fim_x) e Y deslocado de k
+    positiva = defasagens >= 0
+    absoluta = np.abs(defasagens)
+    inicio_x = np.where(positiva, 0, absoluta)
+    fim_x = np.where(positiva, n - absoluta, n)
+    inicio_y = np.where(positiva, absoluta, 0)
+    fim_y = np.where(positiva, n, n - absoluta)
+    sobrepostas = n - absoluta
+
+    soma_x = Sx[:, fim_x] - Sx[:, inicio_x]
+    soma_y = Sy[:, fim_y] - Sy[:, inicio_y]
+    soma_xx = Sxx[:, fim_x] - Sxx[:, inicio_x]
+    soma_yy = Syy[:, fim_y] - Syy[:, inicio_y]
+
+    correlacoes = _pearson(sobrepostas, soma_x, soma_y, soma_xx, soma_yy, soma_xy)
+    correlacoes[:, sobrepostas < minimo_semanas] = np.nan
+    return defasagens, correlacoes, sobrepostas
+
+
+def correlacao_movel(X, Y, janela, defasagem=0):
+    """
+    Correlação de Pearson em janelas móveis entre X[t] e Y[t + defasagem]
+
+    Args:
+        X (numpy.ndarray): Matriz linhas x semanas
+        Y (numpy.ndarray): Matriz de mesma forma
+        janela (int): Tamanho da janela, em semanas
+        defasagem (int): Deslocamento de Y em relação a X (positiva: X antecede Y)
+
+    Returns:
+        numpy.ndarray: Matriz linhas x janelas; a coluna j usa X[j:j + janela]
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    if defasagem > 0:
+        X, Y = X[:, :X.shape[1] - defasagem], Y[:, defasagem:]
+    elif defasagem < 0:
+        X, Y = X[:, -defasagem:], Y[:, :Y.shape[1] + defasagem]
+
+    janelas = X.shape[1] - janela + 1
+    if janelas <= 0:
+        return np.empty((X.shape[0], 0))
+
+    X = X - X.mean(axis=1, keepdims=True)
+    Y = Y - Y.mean(axis=1, keepdims=True)
+
+    def somas_janela(matriz):
+        acumulada = np.concatenate([np.zeros((matriz.shape[0], 1)), np.cumsum(matriz, axis=1)], axis=1)
+        return acumulada[:, janela:] - acumulada[:, :janelas]
+
+    return _pearson(
+        janela, somas_janela(X), somas_janela(Y),
+        somas_janela(X * X), somas_janela(Y * Y), somas_janela(X * Y),
+    )
+
+
+def _pearson(n, soma_x, soma_y, soma_xx, soma_yy, soma_xy):
+    """Correlação de Pearson a partir das somas; NaN quando uma das séries é constante"""
+    covariancia = n * soma_xy - soma_x * soma_y
+    variancia_x = n * soma_xx - soma_x * soma_x
+    variancia_y = n * soma_yy - soma_y * soma_y
+    denominador = np.sqrt(np.clip(variancia_x, 0, None) * np.clip(variancia_y, 0, None))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlacoes = covariancia / denominador
+    correlacoes[~(denominador > EPSILON)] = np.nan
+    return np.clip(correlacoes, -1.0, 1.0)
+
+
+def correlacionar(srag, vacinacao, defasagem_maxima=DEFASAGEM_MAXIMA,
+                  minimo_semanas=MINIMO_SEMANAS, acumular_vacinacao=True):
+    """
+    Correlação defasada entre vacinação e internações de cada município
+
+    Args:
+        srag (pandas.DataFrame): Saída de serie_semanal() para as internações
+        vacinacao (pandas.DataFrame): Saída de serie_semanal() para a vacinação
+        defasagem_maxima (int): Maior defasagem testada, em semanas
+        minimo_semanas (int): Mínimo de semanas sobrepostas por correlação
+        acumular_vacinacao (bool): Correlaciona a cobertura acumulada em vez das doses da semana
+
+    Returns:
+        pandas.DataFrame: Formato longo com 'municipio', 'defasagem', 'correlacao' e 'semanas'.
+                          Defasagem positiva: a vacinação antecede as internações
+    """
+    municipios, _, internacoes, vacinas = alinhar_series(srag, vacinacao, acumular_vacinacao)
+    defasagens, correlacoes, sobrepostas = correlacao_defasada(
+        vacinas, internacoes, defasagem_maxima, minimo_semanas
+    )
+    return pd.DataFrame({
+        'municipio': np.repeat(municipios, len(defasagens)),
+        'defasagem': np.tile(defasagens, len(municipios)),
+        'correlacao': correlacoes.ravel(),
+        'semanas': np.tile(sobrepostas, len(municipios)),
+    })
+
+
+def correlacionar_movel(srag, vacinacao, janela=12, defasagem=0, acumular_vacinacao=True):
+    """
+    Correlação em janelas móveis entre vacinação e internações de cada município
+
+    Returns:
+        pandas.DataFrame: Formato longo com 'municipio', 'semana_inicio' (início da janela,
+                          na série de vacinação) e 'correlacao'
+    """
+    municipios, semanas, internacoes, vacinas = alinhar_series(srag, vacinacao, acumular_vacinacao)
+    correlacoes = correlacao_movel(vacinas, internacoes, janela, defasagem)
+    inicio = max(-defasagem, 0)
+    semanas_janela = semanas[inicio:inicio + correlacoes.shape[1]]
+    return pd.DataFrame({
+        'municipio': np.repeat(municipios, correlacoes.shape[1]),
+        'semana_inicio': np.tile(semanas_janela, len(municipios)),
+        'correlacao': correlacoes.ravel(),
+    })
+
+
+def melhor_defasagem(resultado):
+    """
+    Seleciona, para cada município, a defasagem de correlação mais negativa
+
+    Uma correlação negativa indica queda das internações com o avanço da vacinação.
+
+    Args:
+        resultado (pandas.DataFrame): Saída de correlacionar()
+
+    Returns:
+        pandas.DataFrame: Uma linha por município
+    """
+    validos = resultado.dropna(subset=['correlacao'])
+    indices = validos.groupby('municipio')['correlacao'].idxmin()
+    return validos.loc[indices].reset_index(drop=True)
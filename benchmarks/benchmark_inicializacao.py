@@ -0,0 +1,120 @@
+"""
+Benchmark do tempo de inicialização da linha de comando (main.py)
+
+Executa cada comando leve em um processo novo, várias vezes, e mede o tempo
+até o processo terminar, descontando o tempo de iniciar o próprio Python.
+Com -X importtime, verifica também quais dependências pesadas cada comando
+carregou: comandos leves não podem importar nenhuma delas. Encerra com
+código 1 se algum comando leve importar uma dependência pesada ou passar do
+limite de tempo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.benchmark_inicializacao
+    python -m benchmarks.benchmark_inicializacao --repeticoes 20 --limite-ms 50
+"""
+
+import os
+import re
+import sys
+import socket
+import argparse
+import statistics
+import subprocess
+import time
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que só o comando que precisa deles pode importar
+DEPENDENCIAS_PESADAS = ('selenium', 'PyPDF2', 'pandas', 'numpy', 'pyarrow', 'openpyxl', 'requests')
+
+# Tempo máximo padrão acima do Python vazio, em milissegundos
+LIMITE_PADRAO_MS = 100
+
+PADRAO_IMPORTTIME = re.compile(r'^import time:\s+\d+ \|\s+\d+ \|\s*([\w.]+)$')
+
+
+def _porta_livre():
+    """Porta local sem serviço escutando, para o comando acionar falhar rápido"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def comandos_leves():
+    """Comandos medidos e seus argumentos"""
+    return {
+        'ajuda': ['--help'],
+        'ajuda servico': ['servico', '--help'],
+        'acionar': ['acionar', '--porta', str(_porta_livre())],
+    }
+
+
+def medir(argumentos, repeticoes):
+    """
+    Executa 'python <argumentos>' várias vezes
+
+    Returns:
+        list: Tempo de cada execução, em milissegundos
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argumentos], cwd=RAIZ_PROJETO,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def modulos_importados(argumentos):
+    """Módulos importados por 'python main.py <argumentos>', lidos do -X importtime"""
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'main.py', *argumentos], cwd=RAIZ_PROJETO,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    modulos = set()
+    for linha in processo.stderr.splitlines():
+        encontrado = PADRAO_IMPORTTIME.match(linha)
+        if encontrado:
+            modulos.add(encontrado.group(1))
+    return modulos
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Tempo de inicialização dos comandos do main.py")
+    parser.add_argument('--repeticoes', type=int, default=10, help="Execuções por comando (padrão: 10)")
+    parser.add_argument(
+        '--limite-ms', type=float, default=LIMITE_PADRAO_MS,
+        help=f"Tempo máximo acima do Python vazio, em ms (padrão: {LIMITE_PADRAO_MS})"
+    )
+    args = parser.parse_args(argv)
+
+    base = statistics.median(medir(['-c', 'pass'], args.repeticoes))
+    print(f"Python vazio: {base:.0f} ms (descontado dos tempos abaixo)\n")
+    print(f"{'Comando':<16} {'Mediana':>9} {'Máximo':>9}  Dependências pesadas")
+
+    problemas = []
+    for nome, argumentos in comandos_leves().items():
+        tempos = medir(['main.py', *argumentos], args.repeticoes)
+        mediana = statistics.median(tempos) - base
+        maximo = max(tempos) - base
+        raizes = {modulo.split('.')[0] for modulo in modulos_importados(argumentos)}
+        pesadas = sorted(raizes.intersection(DEPENDENCIAS_PESADAS))
+        print(f"{nome:<16} {mediana:7.0f}ms {maximo:7.0f}ms  {', '.join(pesadas) or '-'}")
+        if pesadas:
+            problemas.append(f"'{nome}' importa {', '.join(pesadas)}")
+        if mediana > args.limite_ms:
+            problemas.append(f"'{nome}' leva {mediana:.0f} ms (limite {args.limite_ms:.0f} ms)")
+
+    if problemas:
+        print("\nInicialização acima do esperado:")
+        for problema in problemas:
+            print(f"  - {problema}")
+        return 1
+    print(f"\nComandos leves dentro do limite de {args.limite_ms:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Benchmark do parser dos boletins de SRAG hospitalizados
+
+Gera boletins sintéticos de vários tamanhos e mede cada etapa do
+processamento: extração do texto das páginas (PyPDF2), separação das linhas
+e filtro pelo PADRAO_DADOS, e escrita do CSV, além do processar_pdf completo.
+Reporta linhas/s, páginas/s, tempo por etapa e pico de memória, e compara
+com uma baseline salva: uma queda de desempenho acima da tolerância encerra
+com código 1.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.benchmark_parser_pdf
+    python -m benchmarks.benchmark_parser_pdf --paginas 10 100 2000 --salvar-baseline
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+from benchmarks.boletim_sintetico import LINHAS_POR_PAGINA, gerar_boletim
+from srag_hospitalizados import covid19_srag_hospitalizados_process_pdf as processador
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_parser_pdf.json')
+
+# Tamanhos padrão dos boletins, em páginas
+PAGINAS_PADRAO = (5, 100, 1000)
+
+# Queda (ou aumento, para memória) tolerada em relação à baseline
+TOLERANCIA_PADRAO = 0.20
+
+# Tempos abaixo deste valor (em segundos) são dominados por ruído e não são comparados
+TEMPO_MINIMO_COMPARAVEL = 0.05
+
+ETAPAS = ('extracao_texto', 'filtro_linhas', 'escrita_csv', 'processar_pdf')
+
+
+def _silencioso(funcao, *args, **kwargs):
+    """Executa a função sem as mensagens de progresso do processador"""
+    saida = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return funcao(*args, **kwargs)
+    finally:
+        sys.stdout.close()
+        sys.stdout = saida
+
+
+def executar_etapas(caminho_pdf, pasta):
+    """
+    Executa as etapas do parser uma vez
+
+    Returns:
+        tuple: (tempo de cada etapa em segundos, linhas de dados encontradas)
+    """
+    tempos = {}
+    csv_destino = os.path.join(pasta, 'saida.csv')
+
+    inicio = time.perf_counter()
+    textos = list(processador.iterar_paginas(caminho_pdf))
+    tempos['extracao_texto'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    cabecalho, registros = processador.parsear_linhas(processador.iterar_linhas(textos))
+    dados = list(registros)
+    tempos['filtro_linhas'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    processador._escrever_csv(cabecalho, dados, csv_destino)
+    tempos['escrita_csv'] = time.perf_counter() - inicio
+
+    # Caminho real: páginas seguem em streaming até o CSV
+    inicio = time.perf_counter()
+    linhas = _silencioso(processador.processar_pdf, caminho_pdf, csv_destino)
+    tempos['processar_pdf'] = time.perf_counter() - inicio
+
+    if linhas != len(dados):
+        raise RuntimeError(f"processar_pdf encontrou {linhas} linhas, as etapas isoladas {len(dados)}")
+    return tempos, len(dados)
+
+
+def medir_memoria(caminho_pdf, pasta):
+    """Mede o pico de memória alocada (tracemalloc) em cada etapa, em MB"""
+    picos = {}
+    csv_destino = os.path.join(pasta, 'saida.csv')
+    tracemalloc.start()
+    try:
+        textos = list(processador.iterar_paginas(caminho_pdf))
+        picos['extracao_texto'] = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        cabecalho, registros = processador.parsear_linhas(processador.iterar_linhas(textos))
+        dados = list(registros)
+        picos['filtro_linhas'] = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        processador._escrever_csv(cabecalho, dados, csv_destino)
+        picos['escrita_csv'] = tracemalloc.get_traced_memory()[1]
+
+        del textos, dados
+        tracemalloc.reset_peak()
+        atual = tracemalloc.get_traced_memory()[0]
+        _silencioso(processador.processar_pdf, caminho_pdf, csv_destino)
+        picos['processar_pdf'] = tracemalloc.get_traced_memory()[1] - atual
+    finally:
+        tracemalloc.stop()
+    return {etapa: pico / 1024 ** 2 for etapa, pico in picos.items()}
+
+
+def medir(paginas, repeticoes, pasta, linhas_por_pagina=LINHAS_POR_PAGINA):
+    """
+    Mede um boletim sintético com o número de páginas informado
+
+    Usa o melhor tempo de cada etapa entre as repetições; a memória é medida
+    em uma execução separada, porque o tracemalloc deixa o código mais lento.
+
+    Returns:
+        dict: Resultados do tamanho
+    """
+    caminho_pdf = os.path.join(pasta, f'boletim_{paginas}.pdf')
+    esperadas = gerar_boletim(caminho_pdf, paginas, linhas_por_pagina)
+
+    melhores = {}
+    for _ in range(repeticoes):
+        tempos, linhas = executar_etapas(caminho_pdf, pasta)
+        if linhas != esperadas:
+            raise RuntimeError(f"Parser encontrou {linhas} linhas em um boletim com {esperadas}")
+        for etapa, tempo in tempos.items():
+            melhores[etapa] = min(tempo, melhores.get(etapa, float('inf')))
+
+    total = melhores['processar_pdf']
+    return {
+        'paginas': paginas,
+        'linhas': esperadas,
+        'linhas_por_s': esperadas / total,
+        'paginas_por_s': paginas / total,
+        'tempos_s': melhores,
+        'pico_memoria_mb': medir_memoria(caminho_pdf, pasta),
+    }
+
+
+def imprimir_resultados(resultados):
+    """Imprime uma tabela por tamanho de boletim"""
+    for resultado in resultados:
+        print(
+            f"\n{resultado['paginas']} páginas, {resultado['linhas']} linhas: "
+            f"{resultado['linhas_por_s']:,.0f} linhas/s, {resultado['paginas_por_s']:,.1f} páginas/s"
+        )
+        print(f"  {'Etapa':<16} {'Tempo':>10} {'Pico memória':>14}")
+        for etapa in ETAPAS:
+            tempo = resultado['tempos_s'][etapa]
+            memoria = resultado['pico_memoria_mb'][etapa]
+            print(f"  {etapa:<16} {tempo:9.3f}s {memoria:11.1f} MB")
+
+
+def comparar_baseline(resultados, baseline, tolerancia):
+    """
+    Compara os resultados com a baseline
+
+    Returns:
+        list: Descrição de cada regressão encontrada
+    """
+    regressoes = []
+    for resultado in resultados:
+        referencia = baseline.get('tamanhos', {}).get(str(resultado['paginas']))
+        if not referencia:
+            print(f"\nSem baseline para {resultado['paginas']} páginas")
+            continue
+        comparar_vazao = referencia['tempos_s']['processar_pdf'] >= TEMPO_MINIMO_COMPARAVEL
+        for metrica in ('linhas_por_s', 'paginas_por_s'):
+            if comparar_vazao and resultado[metrica] < referencia[metrica] * (1 - tolerancia):
+                regressoes.append(
+                    f"{resultado['paginas']} páginas: {metrica} caiu de "
+                    f"{referencia[metrica]:,.1f} para {resultado[metrica]:,.1f}"
+                )
+        for etapa, tempo in resultado['tempos_s'].items():
+            anterior = referencia['tempos_s'].get(etapa)
+            if anterior and anterior >= TEMPO_MINIMO_COMPARAVEL and tempo > anterior * (1 + tolerancia):
+                regressoes.append(
+                    f"{resultado['paginas']} páginas: etapa {etapa} passou de {anterior:.3f}s para {tempo:.3f}s"
+                )
+        for etapa, pico in resultado['pico_memoria_mb'].items():
+            anterior = referencia['pico_memoria_mb'].get(etapa)
+            # Folga fixa para picos pequenos, em que o ruído do alocador domina
+            if anterior is not None and pico > anterior * (1 + tolerancia) + 1:
+                regressoes.append(
+                    f"{resultado['paginas']} páginas: pico de memória em {etapa} passou de "
+                    f"{anterior:.1f} MB para {pico:.1f} MB"
+                )
+    return regressoes
+
+
+def salvar_baseline(resultados, caminho):
+    """Grava os resultados como nova baseline"""
+    baseline = {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'tamanhos': {str(resultado['paginas']): resultado for resultado in resultados},
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    print(f"\nBaseline salva em {caminho}")
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do parser dos boletins de SRAG em PDF")
+    parser.add_argument(
+        '--paginas', type=int, nargs='+', default=list(PAGINAS_PADRAO),
+        help=f"Tamanhos dos boletins sintéticos, em páginas (padrão: {' '.join(map(str, PAGINAS_PADRAO))})"
+    )
+    parser.add_argument(
+        '--repeticoes', type=int, default=3,
+        help="Execuções por tamanho; vale o melhor tempo (padrão: 3)"
+    )
+    parser.add_argument(
+        '--baseline', default=BASELINE_PATH,
+        help="Arquivo JSON da baseline (padrão: benchmarks/baseline_parser_pdf.json)"
+    )
+    parser.add_argument(
+        '--salvar-baseline', action='store_true',
+        help="Grava os resultados desta execução como nova baseline"
+    )
+    parser.add_argument(
+        '--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+        help=f"Variação tolerada em relação à baseline (padrão: {TOLERANCIA_PADRAO})"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = []
+        for paginas in args.paginas:
+            print(f"Medindo boletim com {paginas} páginas...")
+            resultados.append(medir(paginas, args.repeticoes, pasta))
+    imprimir_resultados(resultados)
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nBaseline '{args.baseline}' não encontrada. Use --salvar-baseline para criá-la.")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressoes = comparar_baseline(resultados, baseline, args.tolerancia)
+    if regressoes:
+        print(f"\nREGRESSÃO de desempenho (tolerância {args.tolerancia:.0%}):")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+        return 1
+
+    print(f"\nSem regressões em relação à baseline (tolerância {args.tolerancia:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
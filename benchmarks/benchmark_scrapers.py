@@ -0,0 +1,221 @@
+"""
+Benchmark de latência dos scrapers contra os sites simulados
+
+Sobe os sites simulados (benchmarks.sites_simulados) em uma porta local e
+executa os scrapers apontando para eles, cronometrando cada etapa de
+executar_scraping. Cenários:
+
+    srag_navegador  fluxo completo pelo Chrome: página da FVS, iframe, SharePoint e download
+    srag_http       download direto com a URL guardada no cenário anterior (resposta 304)
+    vacinometro     filtros de região e UF, rolagem e exportação do painel
+
+Uso (na raiz do projeto; requer Chrome e chromedriver):
+    python -m benchmarks.benchmark_scrapers
+    python -m benchmarks.benchmark_scrapers --cenarios vacinometro --atraso-dropdown 1.5 --perfil completo
+
+Além dos tempos, registra a memória e o tempo de CPU do Chrome ao fim de cada
+execução, para comparar os perfis do navegador (comum.navegador).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import tempfile
+
+from benchmarks.sites_simulados import ATRASOS_PADRAO, SitesSimulados
+from comum.navegador import PERFIL_ENXUTO, PERFIS
+from comum.servico import cpu_navegador_s, memoria_navegador_mb
+from srag_hospitalizados.covid19_srag_hospitalizados_scraper import SragHospitalizadosScraper
+from vacinometro.vacinometro_covid_scrap import VacinometroCovidScraper
+
+CENARIOS = ('srag_navegador', 'srag_http', 'vacinometro')
+
+# Métodos cronometrados de cada scraper, na ordem em que executar_scraping os chama
+ETAPAS_SRAG = (
+    'baixar_via_http', 'inicializar_driver', 'acessar_pagina', 'localizar_href_sharepoint',
+    '_localizar_link_sharepoint', 'baixar_do_sharepoint', 'baixar_arquivo_sharepoint',
+    'salvar_cache_download', 'fechar_driver',
+)
+ETAPAS_VACINOMETRO = (
+    'inicializar_driver', 'abrir_painel', 'selecionar_filtros', 'selecionar_regiao', 'selecionar_uf',
+    'rolar_fim_pagina', 'baixar_dados', 'fechar_driver',
+)
+
+# Tempo máximo das esperas dos scrapers; os sites simulados respondem bem antes
+TIMEOUT_BENCHMARK = 30
+
+
+class Cronometro:
+    """Registra a duração de cada chamada dos métodos instrumentados"""
+
+    def __init__(self):
+        self.chamadas = {}  # método -> [durações], na ordem da primeira chamada
+
+    def instrumentar(self, objeto, metodos):
+        """Substitui os métodos da instância por versões cronometradas"""
+        for nome in metodos:
+            original = getattr(objeto, nome)
+
+            def cronometrado(*args, _original=original, _nome=nome, **kwargs):
+                duracoes = self.chamadas.setdefault(_nome, [])
+                inicio = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    duracoes.append(time.perf_counter() - inicio)
+
+            setattr(objeto, nome, cronometrado)
+
+    def totais(self):
+        """Tempo total e número de chamadas de cada método"""
+        return {nome: (sum(duracoes), len(duracoes)) for nome, duracoes in self.chamadas.items()}
+
+
+def _medir_consumo(scraper, consumo):
+    """Registra a memória e a CPU do Chrome logo antes de o scraper fechá-lo"""
+    fechar = scraper.fechar_driver
+
+    def fechar_medindo():
+        if scraper.driver:
+            consumo['memoria_mb'] = memoria_navegador_mb(scraper.driver)
+            consumo['cpu_s'] = cpu_navegador_s(scraper.driver)
+        return fechar()
+
+    scraper.fechar_driver = fechar_medindo
+
+
+def executar_cenario(cenario, sites, pastas, perfil):
+    """
+    Executa um cenário uma vez
+
+    Returns:
+        tuple: (tempos por etapa, tempo total, retorno de executar_scraping,
+                consumo do Chrome {'memoria_mb', 'cpu_s'}, vazio se ele não foi aberto)
+    """
+    if cenario == 'vacinometro':
+        scraper = VacinometroCovidScraper(
+            pastas['vacinometro'], timeout=TIMEOUT_BENCHMARK, url_painel=sites.url_painel,
+            perfil=perfil,
+        )
+        etapas = ETAPAS_VACINOMETRO
+    else:
+        scraper = SragHospitalizadosScraper(
+            pastas['srag'], timeout=TIMEOUT_BENCHMARK,
+            download_direto=cenario == 'srag_http',
+            url_pagina=sites.url_fvs, dominio_sharepoint=sites.dominio_sharepoint,
+            perfil=perfil,
+        )
+        etapas = ETAPAS_SRAG
+
+    # Traces, métricas e acervo das execuções do benchmark ficam na pasta temporária
+    scraper.pasta_metricas = os.path.join(scraper.dados_dir, 'metricas')
+    scraper.pasta_acervo = os.path.join(scraper.dados_dir, 'acervo')
+    consumo = {}
+    _medir_consumo(scraper, consumo)
+    cronometro = Cronometro()
+    cronometro.instrumentar(scraper, etapas)
+
+    inicio = time.perf_counter()
+    resultado = scraper.executar_scraping()
+    return cronometro.totais(), time.perf_counter() - inicio, resultado, consumo
+
+
+def resumir(execucoes):
+    """Mediana e máximo de cada etapa entre as repetições"""
+    etapas = []
+    for execucao in execucoes:
+        for nome in execucao['etapas']:
+            if nome not in etapas:
+                etapas.append(nome)
+    resumo = {}
+    for nome in etapas:
+        tempos = [e['etapas'][nome][0] for e in execucoes if nome in e['etapas']]
+        resumo[nome] = {'mediana_s': statistics.median(tempos), 'max_s': max(tempos)}
+    totais = [e['total_s'] for e in execucoes]
+    resumo['total'] = {'mediana_s': statistics.median(totais), 'max_s': max(totais)}
+    for chave in ('memoria_mb', 'cpu_s'):
+        valores = [e['consumo'][chave] for e in execucoes if e['consumo'].get(chave) is not None]
+        if valores:
+            resumo[chave] = {'mediana': statistics.median(valores), 'max': max(valores)}
+    return resumo
+
+
+def imprimir_resumo(cenario, execucoes, resumo):
+    """Imprime a tabela de tempos de um cenário"""
+    resultados = ", ".join(str(e['resultado']) for e in execucoes)
+    print(f"\n{cenario} ({len(execucoes)} execuções; retorno: {resultados})")
+    print(f"  {'Etapa':<30} {'Mediana':>9} {'Máximo':>9}")
+    for nome, tempos in resumo.items():
+        if 'mediana_s' in tempos:
+            print(f"  {nome:<30} {tempos['mediana_s']:8.2f}s {tempos['max_s']:8.2f}s")
+    if 'memoria_mb' in resumo:
+        memoria = resumo['memoria_mb']
+        print(f"  {'memória do Chrome':<30} {memoria['mediana']:7.0f}MB {memoria['max']:7.0f}MB")
+    if 'cpu_s' in resumo:
+        cpu = resumo['cpu_s']
+        print(f"  {'CPU do Chrome':<30} {cpu['mediana']:8.2f}s {cpu['max']:8.2f}s")
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Latência dos scrapers contra os sites simulados")
+    parser.add_argument(
+        '--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS),
+        help="Cenários executados (padrão: todos)"
+    )
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções por cenário (padrão: 3)")
+    parser.add_argument(
+        '--perfil', choices=PERFIS, default=PERFIL_ENXUTO,
+        help=f"Perfil do Chrome dos scrapers (padrão: {PERFIL_ENXUTO})"
+    )
+    parser.add_argument('--sem-iframe', action='store_true', help="Link do SharePoint no documento principal")
+    parser.add_argument(
+        '--taxa-download', type=int, default=None,
+        help="Limite de envio dos arquivos simulados, em bytes/s (padrão: sem limite)"
+    )
+    parser.add_argument('--saida', help="Grava os tempos em um arquivo JSON")
+    for nome, valor in ATRASOS_PADRAO.items():
+        parser.add_argument(
+            f'--atraso-{nome}', type=float, default=valor,
+            help=f"Atraso de {nome} nos sites simulados, em segundos (padrão: {valor})"
+        )
+    args = parser.parse_args(argv)
+
+    atrasos = {nome: getattr(args, f'atraso_{nome}') for nome in ATRASOS_PADRAO}
+    relatorio = {'atrasos': atrasos, 'iframe': not args.sem_iframe, 'perfil': args.perfil, 'cenarios': {}}
+
+    with tempfile.TemporaryDirectory() as pasta_srag, tempfile.TemporaryDirectory() as pasta_vacinometro:
+        pastas = {'srag': pasta_srag, 'vacinometro': pasta_vacinometro}
+        sites = SitesSimulados(atrasos=atrasos, iframe=not args.sem_iframe, taxa_download=args.taxa_download)
+        with sites:
+            print(f"Sites simulados em {sites.url_base}")
+            for cenario in args.cenarios:
+                execucoes = []
+                for repeticao in range(args.repeticoes):
+                    print(f"\n=== {cenario} ({repeticao + 1}/{args.repeticoes}) ===")
+                    etapas, total, resultado, consumo = executar_cenario(cenario, sites, pastas, args.perfil)
+                    execucoes.append({
+                        'etapas': etapas, 'total_s': total, 'resultado': resultado, 'consumo': consumo,
+                    })
+                relatorio['cenarios'][cenario] = {'execucoes': execucoes, 'resumo': resumir(execucoes)}
+
+    for cenario, dados in relatorio['cenarios'].items():
+        imprimir_resumo(cenario, dados['execucoes'], dados['resumo'])
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"\nTempos salvos em {args.saida}")
+
+    # Um cenário que não baixou nada indica que o scraper não funcionou contra os sites simulados
+    falhas = [c for c, d in relatorio['cenarios'].items() if any(e['resultado'] is None for e in d['execucoes'])]
+    if falhas:
+        print(f"\nCenários sem download: {', '.join(falhas)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
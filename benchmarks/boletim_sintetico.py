@@ -0,0 +1,146 @@
+"""
+Geração de boletins sintéticos de SRAG hospitalizados em PDF
+
+Os PDFs imitam o layout dos boletins da FVS-AM: a primeira linha é o cabeçalho
+com 'Classi_Fin', seguido de linhas de dados (número, datas dd/mm/aaaa,
+município, classificação...) e de linhas de título e rodapé que o parser deve
+descartar. O PDF é escrito diretamente (texto em Helvetica, uma instrução por
+linha), sem depender de bibliotecas de geração de PDF.
+"""
+
+import random
+from datetime import date, timedelta
+
+CABECALHO = [
+    'Nº', 'Dt_Notific', 'SE_Not', 'Dt_Sin_Pri', 'Municipio', 'Sexo', 'Idade',
+    'Dt_Interna', 'UTI', 'Classi_Fin', 'Evolucao', 'Dt_Evoluca',
+]
+
+MUNICIPIOS = [
+    'MANAUS', 'PARINTINS', 'ITACOATIARA', 'MANACAPURU', 'COARI', 'TEFE', 'TABATINGA',
+    'MAUES', 'HUMAITA', 'IRANDUBA', 'SAO GABRIEL DA CACHOEIRA', 'PRESIDENTE FIGUEIREDO',
+    'BOCA DO ACRE', 'SANTO ANTONIO DO ICA', 'LABREA', 'EIRUNEPE',
+]
+
+# Linhas por página de um boletim real, em fonte pequena
+LINHAS_POR_PAGINA = 60
+
+# Data inicial das notificações sintéticas
+INICIO_NOTIFICACOES = date(2020, 3, 1)
+
+
+def _data(valor):
+    return valor.strftime('%d/%m/%Y')
+
+
+def gerar_linhas(paginas, linhas_por_pagina=LINHAS_POR_PAGINA, semente=0):
+    """
+    Gera o texto de cada página do boletim
+
+    Returns:
+        tuple: (lista de páginas, cada uma uma lista de linhas; total de linhas de dados)
+    """
+    aleatorio = random.Random(semente)
+    textos = []
+    numero = 0
+    for pagina in range(paginas):
+        linhas = []
+        if pagina == 0:
+            linhas.append(' '.join(CABECALHO))
+        else:
+            linhas.append('BOLETIM SRAG HOSPITALIZADOS - FVS-RCP/AM')
+        while len(linhas) < linhas_por_pagina - 1:
+            numero += 1
+            notificacao = INICIO_NOTIFICACOES + timedelta(days=aleatorio.randint(0, 1500))
+            sintomas = notificacao - timedelta(days=aleatorio.randint(0, 10))
+            internacao = sintomas + timedelta(days=aleatorio.randint(0, 5))
+            evolucao = internacao + timedelta(days=aleatorio.randint(1, 40))
+            linhas.append(' '.join([
+                str(numero),
+                _data(notificacao),
+                str(notificacao.isocalendar()[1]),
+                _data(sintomas),
+                aleatorio.choice(MUNICIPIOS),
+                aleatorio.choice('MF'),
+                str(aleatorio.randint(0, 99)),
+                _data(internacao),
+                aleatorio.choice(['1', '2', '9']),
+                aleatorio.choice(['1', '2', '4', '5']),
+                aleatorio.choice(['1', '2', '3', '9']),
+                _data(evolucao),
+            ]))
+        linhas.append(f'Pagina {pagina + 1} de {paginas}')
+        textos.append(linhas)
+    return textos, numero
+
+
+def _escapar(texto):
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def escrever_pdf(caminho, paginas_texto):
+    """
+    Escreve um PDF com uma página por lista de linhas
+
+    Args:
+        caminho (str): Arquivo de destino
+        paginas_texto (list): Lista de páginas, cada uma uma lista de linhas
+    """
+    objetos = []  # conteúdo de cada objeto, numerados a partir de 1
+
+    def adicionar(conteudo):
+        objetos.append(conteudo)
+        return len(objetos)
+
+    catalogo = adicionar(None)
+    raiz_paginas = adicionar(None)
+    fonte = adicionar(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    ids_paginas = []
+    for linhas in paginas_texto:
+        comandos = ['BT', '/F1 6 Tf', '9 TL', '20 820 Td']
+        for linha in linhas:
+            comandos.append(f'({_escapar(linha)}) Tj T*')
+        comandos.append('ET')
+        fluxo = '\n'.join(comandos).encode('cp1252', errors='replace')
+        conteudo = adicionar(b'<< /Length %d >>\nstream\n' % len(fluxo) + fluxo + b'\nendstream')
+        ids_paginas.append(adicionar(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (raiz_paginas, fonte, conteudo)
+        ))
+
+    objetos[catalogo - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % raiz_paginas
+    filhos = b' '.join(b'%d 0 R' % i for i in ids_paginas)
+    objetos[raiz_paginas - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (filhos, len(ids_paginas))
+
+    with open(caminho, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        posicoes = []
+        for numero, conteudo in enumerate(objetos, start=1):
+            posicoes.append(f.tell())
+            f.write(b'%d 0 obj\n' % numero + conteudo + b'\nendobj\n')
+        inicio_xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1))
+        for posicao in posicoes:
+            f.write(b'%010d 00000 n \n' % posicao)
+        f.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                % (len(objetos) + 1, catalogo, inicio_xref))
+
+
+def gerar_boletim(caminho, paginas, linhas_por_pagina=LINHAS_POR_PAGINA, semente=0):
+    """
+    Gera um boletim sintético em PDF
+
+    Args:
+        caminho (str): Arquivo de destino
+        paginas (int): Número de páginas
+        linhas_por_pagina (int): Linhas de texto por página (cabeçalho/título e rodapé incluídos)
+        semente (int): Semente dos valores aleatórios, para boletins reproduzíveis
+
+    Returns:
+        int: Número de linhas de dados que o parser deve encontrar
+    """
+    paginas_texto, total = gerar_linhas(paginas, linhas_por_pagina, semente)
+    escrever_pdf(caminho, paginas_texto)
+    return total
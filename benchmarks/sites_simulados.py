@@ -0,0 +1,460 @@
+"""
+Sites simulados da FVS-AM, do SharePoint e do vacinômetro, servidos localmente
+
+Reproduzem só o que os scrapers usam: a estrutura do 'tabZoneId104' com o
+link do SharePoint (opcionalmente dentro de um iframe), a listagem do
+SharePoint com o botão "Baixar" que só habilita após selecionar o arquivo,
+e o painel do vacinômetro com os filtros em listbox, conteúdo carregado ao
+rolar e o botão 'exportar-dados-QV5'. Os atrasos de resposta e de
+renderização são configuráveis, para medir e ajustar as esperas dos
+scrapers sem acesso à rede.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.sites_simulados --porta 8000 --atraso-conteudo 2
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from srag_hospitalizados.covid19_srag_hospitalizados_scraper import ARQUIVO_MICRODADOS
+from vacinometro.vacinometro_covid_scrap import UFS_POR_REGIAO
+
+CAMINHO_FVS = "/indicadorSalaSituacao_view/60/2"
+CAMINHO_SHAREPOINT = "/sharepoint/:f:/s/fvs/microdados"
+CAMINHO_PAINEL = "/vacinometro/SEIDIGI_DEMAS_Vacina_C19.html"
+
+# Atrasos em segundos:
+#   resposta: tempo até o servidor responder cada página HTML
+#   conteudo: renderização do conteúdo dinâmico (link do SharePoint, filtros do painel)
+#   listagem: renderização da listagem de arquivos do SharePoint
+#   dropdown: abertura das opções de um filtro
+#   rolagem: carregamento de cada bloco de conteúdo ao rolar o painel
+#   exportacao: intervalo entre o clique em exportar e o início do download
+#   download: tempo até o servidor começar a enviar um arquivo
+ATRASOS_PADRAO = {
+    "resposta": 0.2,
+    "conteudo": 1.0,
+    "listagem": 0.5,
+    "dropdown": 0.3,
+    "rolagem": 0.1,
+    "exportacao": 1.0,
+    "download": 0.2,
+}
+
+# Tamanho padrão da planilha de microdados simulada
+TAMANHO_ARQUIVO_PADRAO = 2 * 1024 * 1024
+
+# Blocos de conteúdo acrescentados ao rolar o painel até o fim
+BLOCOS_ROLAGEM = 3
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+PAGINA_FVS = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Sala de Situação - FVS-RCP/AM</title></head>
+<body>
+<h1>Indicadores da Sala de Situação</h1>
+<div id="painel">Carregando...</div>
+<script>
+const CONFIG = __CONFIG__;
+setTimeout(function () {
+    const painel = document.getElementById('painel');
+    if (CONFIG.iframe) {
+        // Um iframe sem o link antes do que tem o link, como no site real
+        painel.innerHTML = '<iframe src="/fvs/vazio" width="400" height="80"></iframe>'
+            + '<iframe src="/fvs/tableau" width="800" height="400"></iframe>';
+    } else {
+        painel.innerHTML = CONFIG.tabzone;
+    }
+}, CONFIG.atrasos.conteudo * 1000);
+</script>
+</body></html>
+"""
+
+PAGINA_TABLEAU = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><div id="viz">Carregando visualização...</div>
+<script>
+const CONFIG = __CONFIG__;
+setTimeout(function () {
+    document.getElementById('viz').outerHTML = CONFIG.tabzone;
+}, CONFIG.atrasos.conteudo * 1000);
+</script>
+</body></html>
+"""
+
+PAGINA_SHAREPOINT = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Microdados - SharePoint</title></head>
+<body>
+<div id="comandos">
+  <button data-id="download" data-automationid="downloadCommand" disabled><span>Baixar</span></button>
+</div>
+<div id="listagem" role="grid">Carregando...</div>
+<script>
+const CONFIG = __CONFIG__;
+const botao = document.querySelector('button[data-id="download"]');
+botao.addEventListener('click', function () {
+    window.location.href = CONFIG.url_download;
+});
+setTimeout(function () {
+    const listagem = document.getElementById('listagem');
+    listagem.innerHTML = '';
+    CONFIG.arquivos.forEach(function (nome) {
+        const linha = document.createElement('div');
+        linha.setAttribute('role', 'row');
+        const span = document.createElement('span');
+        span.textContent = nome;
+        span.addEventListener('click', function () {
+            // Selecionar o arquivo habilita o comando de download
+            botao.disabled = nome !== CONFIG.arquivo;
+        });
+        linha.appendChild(span);
+        listagem.appendChild(linha);
+    });
+}, CONFIG.atrasos.listagem * 1000);
+</script>
+</body></html>
+"""
+
+PAGINA_PAINEL = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Vacinômetro COVID-19</title>
+<style>
+  body { margin: 0; font-family: sans-serif; }
+  #filtros { min-height: 40px; padding: 8px 240px; }
+  .folded-listbox { display: inline-block; border: 1px solid #999; padding: 6px 12px; margin-right: 8px; cursor: pointer; }
+  .ListBox-styledScrollbars { position: fixed; top: 50px; left: 8px; width: 200px; max-height: 300px;
+                              overflow-y: auto; background: #fff; border: 1px solid #999; z-index: 10; }
+  .ListBox-styledScrollbars div { padding: 4px 8px; cursor: pointer; }
+  .bloco { height: 900px; margin: 16px 240px; border: 1px solid #ddd; }
+</style></head>
+<body>
+<div id="filtros">Carregando filtros...</div>
+<div id="conteudo"></div>
+<script>
+const CONFIG = __CONFIG__;
+const selecao = {'Região': null, 'UF': null};
+let opcoes = null;
+let blocos = 0;
+let carregandoBloco = false;
+
+function fecharOpcoes() {
+    if (opcoes) { opcoes.remove(); opcoes = null; }
+}
+
+function abrirOpcoes(campo, valores) {
+    fecharOpcoes();
+    setTimeout(function () {
+        opcoes = document.createElement('div');
+        opcoes.className = 'ListBox-styledScrollbars css-1nwu5vb';
+        valores.forEach(function (valor) {
+            const opcao = document.createElement('div');
+            opcao.textContent = valor;
+            opcao.addEventListener('click', function (evento) {
+                evento.stopPropagation();
+                selecao[campo] = valor;
+                if (campo === 'Região') { selecao['UF'] = null; }
+                atualizarRotulos();
+            });
+            opcoes.appendChild(opcao);
+        });
+        document.body.appendChild(opcoes);
+    }, CONFIG.atrasos.dropdown * 1000);
+}
+
+function atualizarRotulos() {
+    document.querySelectorAll('.folded-listbox').forEach(function (caixa) {
+        const campo = caixa.dataset.campo;
+        caixa.textContent = campo + (selecao[campo] ? ': ' + selecao[campo] : '');
+    });
+}
+
+function acrescentarBloco() {
+    const bloco = document.createElement('div');
+    bloco.className = 'bloco';
+    bloco.textContent = 'Indicadores ' + (blocos + 1);
+    document.getElementById('conteudo').appendChild(bloco);
+    blocos += 1;
+}
+
+// Clique fora de um filtro fecha as opções abertas
+document.body.addEventListener('click', fecharOpcoes);
+
+window.addEventListener('scroll', function () {
+    const noFim = window.innerHeight + window.scrollY >= document.body.scrollHeight - 10;
+    if (noFim && !carregandoBloco && blocos < CONFIG.blocos_rolagem + 2) {
+        carregandoBloco = true;
+        setTimeout(function () {
+            acrescentarBloco();
+            carregandoBloco = false;
+        }, CONFIG.atrasos.rolagem * 1000);
+    }
+});
+
+setTimeout(function () {
+    const filtros = document.getElementById('filtros');
+    filtros.innerHTML = '';
+    ['Região', 'UF'].forEach(function (campo) {
+        const caixa = document.createElement('div');
+        caixa.className = 'folded-listbox css-abblij';
+        caixa.dataset.campo = campo;
+        caixa.addEventListener('click', function (evento) {
+            evento.stopPropagation();
+            const valores = campo === 'Região'
+                ? Object.keys(CONFIG.ufs_por_regiao)
+                : (selecao['Região'] ? CONFIG.ufs_por_regiao[selecao['Região']]
+                                     : [].concat.apply([], Object.values(CONFIG.ufs_por_regiao)));
+            abrirOpcoes(campo, valores);
+        });
+        filtros.appendChild(caixa);
+    });
+    atualizarRotulos();
+    // Dois blocos iniciais para a página já ter rolagem
+    acrescentarBloco();
+    acrescentarBloco();
+
+    const botao = document.createElement('button');
+    botao.id = 'exportar-dados-QV5';
+    botao.textContent = 'Exportar dados';
+    botao.addEventListener('click', function (evento) {
+        evento.stopPropagation();
+        const parametros = new URLSearchParams({
+            regiao: selecao['Região'] || '', uf: selecao['UF'] || ''
+        });
+        setTimeout(function () {
+            window.location.href = '/vacinometro/exportar?' + parametros.toString();
+        }, CONFIG.atrasos.exportacao * 1000);
+    });
+    document.body.appendChild(botao);
+}, CONFIG.atrasos.conteudo * 1000);
+</script>
+</body></html>
+"""
+
+
+def montar_tabzone(url_sharepoint):
+    """
+    Monta o HTML do 'tabZoneId104' com o link do SharePoint
+
+    O link fica no caminho que o scraper procura:
+    id("tabZoneId104")/DIV[1]/DIV[1]/DIV[1]/DIV[1]/DIV[1]/SPAN[1]/DIV[10]/SPAN[2]/A[1]
+    """
+    indicadores = "".join(f"<div>Indicador {i}</div>" for i in range(1, 9))
+    # A nona linha tem outro link; o dos microdados é o segundo
+    outro_link = '<div><span>Boletins:</span> <span><a href="/fvs/boletins">Acessar</a></span></div>'
+    link = (
+        f'<div><span>Microdados SRAG hospitalizados:</span> '
+        f'<span><a href="{url_sharepoint}">Acessar</a></span></div>'
+    )
+    return (
+        '<div id="tabZoneId104"><div><div><div><div><div><span>'
+        + indicadores + outro_link + link
+        + '</span></div></div></div></div></div></div>'
+    )
+
+
+def gerar_conteudo_arquivo(tamanho, semente=0):
+    """Gera bytes determinísticos para o arquivo de microdados simulado"""
+    return random.Random(semente).randbytes(tamanho)
+
+
+def gerar_exportacao(regiao, uf):
+    """Gera o CSV exportado pelo painel para a região e a UF selecionadas"""
+    aleatorio = random.Random(f"{regiao}/{uf}")
+    linhas = ["Região;UF;Dose;Doses aplicadas"]
+    for dose in ("1ª dose", "2ª dose", "Reforço"):
+        linhas.append(f"{regiao};{uf};{dose};{aleatorio.randint(1000, 1000000)}")
+    return ("\n".join(linhas) + "\n").encode("utf-8-sig")
+
+
+class SitesSimulados:
+    """Servidor HTTP local com as páginas simuladas, executado em uma thread"""
+
+    def __init__(self, porta=0, atrasos=None, iframe=True, tamanho_arquivo=TAMANHO_ARQUIVO_PADRAO,
+                 taxa_download=None):
+        """
+        Configura os sites simulados
+
+        Args:
+            porta (int): Porta local. Se 0, usa uma porta livre
+            atrasos (dict, optional): Atrasos que substituem os de ATRASOS_PADRAO
+            iframe (bool): Coloca o link do SharePoint dentro de um iframe
+            tamanho_arquivo (int): Tamanho da planilha de microdados, em bytes
+            taxa_download (int, optional): Limite de envio dos arquivos, em bytes/s. Se None, sem limite
+        """
+        self.atrasos = {**ATRASOS_PADRAO, **(atrasos or {})}
+        self.iframe = iframe
+        self.taxa_download = taxa_download
+        self.arquivo = gerar_conteudo_arquivo(tamanho_arquivo)
+        self.etag = '"' + hashlib.sha256(self.arquivo).hexdigest()[:32] + '"'
+        self.requisicoes = []  # (método, caminho, status)
+        self._trava = threading.Lock()
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", porta), self._criar_handler())
+        self.servidor.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    @property
+    def url_fvs(self):
+        return self.url_base + CAMINHO_FVS
+
+    @property
+    def url_sharepoint(self):
+        return self.url_base + CAMINHO_SHAREPOINT
+
+    @property
+    def url_painel(self):
+        return self.url_base + CAMINHO_PAINEL
+
+    @property
+    def dominio_sharepoint(self):
+        """Trecho da URL que identifica a página do SharePoint simulado"""
+        return "/sharepoint/"
+
+    def iniciar(self):
+        """Inicia o servidor em uma thread de fundo"""
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def parar(self):
+        """Encerra o servidor"""
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    def _registrar(self, metodo, caminho, status):
+        with self._trava:
+            self.requisicoes.append((metodo, caminho, status))
+
+    def _config(self, **extras):
+        """Configuração injetada como JSON nas páginas"""
+        return json.dumps({"atrasos": self.atrasos, **extras}, ensure_ascii=False)
+
+    def _criar_handler(self):
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, formato, *args):
+                # Sem log por requisição; ver SitesSimulados.requisicoes
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                caminho = unquote(url.path)
+                parametros = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+                try:
+                    if caminho == CAMINHO_FVS:
+                        self._pagina(PAGINA_FVS.replace("__CONFIG__", sites._config(
+                            iframe=sites.iframe, tabzone=montar_tabzone(sites.url_sharepoint)
+                        )))
+                    elif caminho == "/fvs/tableau":
+                        self._pagina(PAGINA_TABLEAU.replace("__CONFIG__", sites._config(
+                            tabzone=montar_tabzone(sites.url_sharepoint)
+                        )))
+                    elif caminho == "/fvs/vazio":
+                        self._pagina("<!DOCTYPE html><html><body><p>Atualizado semanalmente</p></body></html>")
+                    elif caminho == CAMINHO_SHAREPOINT:
+                        self._pagina(PAGINA_SHAREPOINT.replace("__CONFIG__", sites._config(
+                            arquivo=ARQUIVO_MICRODADOS,
+                            arquivos=["Leia-me.pdf", ARQUIVO_MICRODADOS, "dicionario_de_dados.pdf"],
+                            url_download="/sharepoint/download/" + quote(ARQUIVO_MICRODADOS),
+                        )))
+                    elif caminho == "/sharepoint/download/" + ARQUIVO_MICRODADOS:
+                        self._arquivo(sites.arquivo, ARQUIVO_MICRODADOS, TIPO_XLSX, sites.etag)
+                    elif caminho == CAMINHO_PAINEL:
+                        self._pagina(PAGINA_PAINEL.replace("__CONFIG__", sites._config(
+                            ufs_por_regiao=UFS_POR_REGIAO, blocos_rolagem=BLOCOS_ROLAGEM
+                        )))
+                    elif caminho == "/vacinometro/exportar":
+                        regiao, uf = parametros.get("regiao", ""), parametros.get("uf", "")
+                        self._arquivo(
+                            gerar_exportacao(regiao, uf), f"vacinometro_{uf or 'BR'}.csv", "text/csv"
+                        )
+                    else:
+                        self._responder(404, b"Not found", "text/plain")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Navegador cancelou a requisição
+                    pass
+
+            def _pagina(self, html):
+                time.sleep(sites.atrasos["resposta"])
+                self._responder(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+            def _arquivo(self, conteudo, nome, tipo, etag=None):
+                time.sleep(sites.atrasos["download"])
+                if etag and self.headers.get("If-None-Match") == etag:
+                    self._responder(304, b"", None, {"ETag": etag})
+                    return
+                cabecalhos = {"Content-Disposition": f'attachment; filename="{nome}"'}
+                if etag:
+                    cabecalhos["ETag"] = etag
+                self._responder(200, conteudo, tipo, cabecalhos)
+
+            def _responder(self, status, corpo, tipo, cabecalhos=None):
+                self.send_response(status)
+                if tipo:
+                    self.send_header("Content-Type", tipo)
+                for chave, valor in (cabecalhos or {}).items():
+                    self.send_header(chave, valor)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                sites._registrar("GET", self.path, status)
+                if not corpo:
+                    return
+                if not sites.taxa_download or tipo.startswith("text/html"):
+                    self.wfile.write(corpo)
+                    return
+                # Envio em blocos limitado à taxa configurada (download visível como .crdownload)
+                bloco = max(1, sites.taxa_download // 10)
+                for inicio in range(0, len(corpo), bloco):
+                    self.wfile.write(corpo[inicio:inicio + bloco])
+                    time.sleep(0.1)
+
+        return Handler
+
+
+def main(argv=None):
+    """Serve os sites simulados até Ctrl+C"""
+    parser = argparse.ArgumentParser(description="Sites simulados da FVS, SharePoint e vacinômetro")
+    parser.add_argument('--porta', type=int, default=8000, help="Porta local (padrão: 8000)")
+    parser.add_argument('--sem-iframe', action='store_true', help="Link do SharePoint no documento principal")
+    parser.add_argument(
+        '--taxa-download', type=int, default=None,
+        help="Limite de envio dos arquivos, em bytes/s (padrão: sem limite)"
+    )
+    for nome, valor in ATRASOS_PADRAO.items():
+        parser.add_argument(
+            f'--atraso-{nome}', type=float, default=valor,
+            help=f"Atraso de {nome}, em segundos (padrão: {valor})"
+        )
+    args = parser.parse_args(argv)
+
+    atrasos = {nome: getattr(args, f'atraso_{nome}') for nome in ATRASOS_PADRAO}
+    sites = SitesSimulados(args.porta, atrasos, not args.sem_iframe, taxa_download=args.taxa_download)
+    print(f"FVS:         {sites.url_fvs}")
+    print(f"SharePoint:  {sites.url_sharepoint}")
+    print(f"Vacinômetro: {sites.url_painel}")
+    try:
+        sites.servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sites.servidor.server_close()
+
+if __name__ == "__main__":
+    main()
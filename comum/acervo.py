@@ -0,0 +1,549 @@
+"""
+Acervo dos arquivos brutos das coletas, endereçado pelo conteúdo
+
+Cada arquivo guardado (planilha baixada, tabela capturada, captura de tela)
+vira um objeto identificado pelo SHA-256 do conteúdo: o mesmo conteúdo
+baixado em muitas execuções ocupa o disco uma única vez. Os objetos ficam em
+duas camadas de subpastas pelo início do hash, então nenhuma pasta passa de
+256 entradas, por mais execuções que se acumulem:
+
+    <pasta>/objetos/ab/cd/abcd...ef.gz   objeto comprimido com gzip
+    <pasta>/objetos/12/34/1234...56      objeto guardado como veio
+    <pasta>/indice.sqlite3               execuções, artefatos e objetos
+
+Os arquivos que continuam na pasta de dados (downloads e tabelas capturadas)
+entram no acervo por hard link: a cópia de trabalho e o objeto são o mesmo
+arquivo no disco. Quando o link não é possível (outro sistema de arquivos) e
+para os conteúdos em memória, formatos que já são comprimidos (xlsx, png,
+zip...) são guardados como vieram e os demais são comprimidos com gzip, se a
+compressão economizar espaço.
+
+O índice liga cada execução (serviço e identificador, o mesmo do trace em
+comum.rastreamento) aos seus artefatos. As capturas de tela seguem uma
+política de depuração: 'falha' (padrão) mantém as capturas em memória e só as
+guarda se a coleta falhar, 'sempre' guarda todas e 'nunca' nem as tira.
+Capturas antigas saem do índice após RETENCAO_CAPTURAS_DIAS, e objetos que
+nenhum artefato referencia são apagados; essa limpeza roda ao fim das
+execuções no máximo uma vez a cada INTERVALO_LIMPEZA_HORAS.
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from comum.download_http import calcular_sha256
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_ACERVO = os.path.join(RAIZ_PROJETO, "dados", "acervo")
+NOME_INDICE = "indice.sqlite3"
+
+# Políticas de capturas de tela
+CAPTURAS_SEMPRE = "sempre"
+CAPTURAS_FALHA = "falha"
+CAPTURAS_NUNCA = "nunca"
+POLITICAS_CAPTURAS = (CAPTURAS_FALHA, CAPTURAS_SEMPRE, CAPTURAS_NUNCA)
+
+# Tipos de artefato
+TIPO_DOWNLOAD = "download"
+TIPO_CAPTURA = "captura_tela"
+
+# Dias em que as capturas de tela guardadas continuam no acervo
+RETENCAO_CAPTURAS_DIAS = 30
+
+# Intervalo mínimo entre duas limpezas feitas ao fim das execuções
+INTERVALO_LIMPEZA_HORAS = 24
+
+# Capturas pendentes mantidas por grupo (ex.: UF) na política 'falha'; as mais antigas saem
+CAPTURAS_PENDENTES_POR_GRUPO = 10
+
+# Extensões de formatos já comprimidos, guardados sem gzip
+EXTENSOES_COMPRIMIDAS = (
+    ".xlsx", ".xlsm", ".ods", ".docx", ".zip", ".gz", ".bz2", ".xz", ".7z",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".parquet",
+)
+
+# Economia mínima (fração do tamanho original) para guardar a versão comprimida
+ECONOMIA_MINIMA = 0.05
+
+# Tamanho dos blocos copiados para o acervo
+TAMANHO_BLOCO = 1024 * 1024
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS objetos (
+    sha256 TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    tamanho_armazenado INTEGER NOT NULL,
+    compressao TEXT,
+    criado_em TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS execucoes (
+    servico TEXT NOT NULL,
+    execucao TEXT NOT NULL,
+    iniciada_em TEXT NOT NULL,
+    concluida_em TEXT,
+    sucesso INTEGER,
+    PRIMARY KEY (servico, execucao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artefatos (
+    servico TEXT NOT NULL,
+    execucao TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    registrado_em TEXT NOT NULL,
+    PRIMARY KEY (servico, execucao, tipo, nome)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_artefatos_objeto ON artefatos (sha256);
+CREATE INDEX IF NOT EXISTS idx_artefatos_tipo ON artefatos (tipo, registrado_em);
+CREATE TABLE IF NOT EXISTS manutencao (
+    tarefa TEXT PRIMARY KEY,
+    executada_em TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def validar_politica(politica):
+    """Confere a política de capturas de tela, como configurar_perfil confere o perfil"""
+    if politica not in POLITICAS_CAPTURAS:
+        raise ValueError(
+            f"Política de capturas desconhecida: {politica} (use {', '.join(POLITICAS_CAPTURAS)})"
+        )
+    return politica
+
+
+class Acervo:
+    """Objetos endereçados pelo SHA-256 e índice das execuções, compartilháveis entre threads"""
+
+    def __init__(self, pasta=PASTA_ACERVO):
+        """
+        Abre (ou cria) o acervo
+
+        Args:
+            pasta (str): Pasta do acervo. Se None, usa 'dados/acervo'
+        """
+        self.pasta = pasta
+        self.pasta_objetos = os.path.join(pasta, "objetos")
+        os.makedirs(self.pasta_objetos, exist_ok=True)
+        self._trava = threading.RLock()
+        # Uma conexão para todas as threads, protegida pela trava; o timeout
+        # cobre outro processo (ex.: o modo serviço) gravando ao mesmo tempo
+        self.conexao = sqlite3.connect(
+            os.path.join(pasta, NOME_INDICE), timeout=30, check_same_thread=False
+        )
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        """Fecha o índice"""
+        with self._trava:
+            self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def caminho_objeto(self, sha256, compressao=None):
+        """Caminho do objeto: objetos/<2 primeiros>/<2 seguintes>/<hash>[.gz]"""
+        nome = sha256 + (".gz" if compressao == "gzip" else "")
+        return os.path.join(self.pasta_objetos, sha256[:2], sha256[2:4], nome)
+
+    def objeto(self, sha256):
+        """Registro do objeto no índice (ou None)"""
+        with self._trava:
+            linha = self.conexao.execute("SELECT * FROM objetos WHERE sha256 = ?", (sha256,)).fetchone()
+        return dict(linha) if linha else None
+
+    def guardar_arquivo(self, caminho, sha256=None):
+        """
+        Guarda o conteúdo de um arquivo, se ainda não estiver no acervo
+
+        O objeto é um hard link para o arquivo, sem ocupar o disco de novo; se
+        o conteúdo já estava no acervo sem compressão, é o arquivo que passa a
+        ser um link para o objeto. Sem hard links, o conteúdo é copiado.
+
+        Os arquivos guardados não devem ser alterados no lugar: substitua-os
+        (ex.: os.replace), como fazem os downloads.
+
+        Args:
+            caminho (str): Arquivo a guardar (o conteúdo não é alterado)
+            sha256 (str, optional): Hash já calculado do conteúdo (ex.: pelo CacheDownloads)
+
+        Returns:
+            str: SHA-256 do conteúdo
+        """
+        sha256 = sha256 or calcular_sha256(caminho)
+        objeto = self.objeto(sha256)
+        if objeto is None:
+            if not self._vincular_objeto(sha256, caminho):
+                comprimir = not caminho.lower().endswith(EXTENSOES_COMPRIMIDAS)
+                with open(caminho, "rb") as origem:
+                    self._gravar_objeto(sha256, origem, os.path.getsize(caminho), comprimir)
+        elif objeto["compressao"] is None:
+            self._substituir_por_link(self.caminho_objeto(sha256), caminho)
+        return sha256
+
+    def _vincular_objeto(self, sha256, caminho):
+        """Cria o objeto como hard link para o arquivo; retorna False se o link não for possível"""
+        destino = self.caminho_objeto(sha256)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(caminho, temporario)
+            os.replace(temporario, destino)
+        except OSError:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return False
+        tamanho = os.path.getsize(destino)
+        with self._trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO objetos (sha256, tamanho, tamanho_armazenado, compressao, criado_em) "
+                "VALUES (?, ?, ?, NULL, ?)",
+                (sha256, tamanho, tamanho, _agora()),
+            )
+        return True
+
+    @staticmethod
+    def _substituir_por_link(objeto, caminho):
+        """Troca o arquivo por um hard link para o objeto de mesmo conteúdo, se ainda não for"""
+        try:
+            if os.path.samefile(objeto, caminho):
+                return
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.link(objeto, temporario)
+            os.replace(temporario, caminho)
+        except OSError:
+            # Sem hard links (ou objeto ausente): o arquivo continua como cópia
+            pass
+
+    def guardar_bytes(self, conteudo, nome):
+        """
+        Guarda um conteúdo em memória (ex.: uma captura de tela)
+
+        Args:
+            conteudo (bytes): Conteúdo a guardar
+            nome (str): Nome do artefato, cuja extensão decide a compressão
+
+        Returns:
+            str: SHA-256 do conteúdo
+        """
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        if self.objeto(sha256) is None:
+            comprimir = not nome.lower().endswith(EXTENSOES_COMPRIMIDAS)
+            self._gravar_objeto(sha256, io.BytesIO(conteudo), len(conteudo), comprimir)
+        return sha256
+
+    def _gravar_objeto(self, sha256, origem, tamanho, comprimir):
+        """Copia o conteúdo para o acervo de forma atômica e registra o objeto"""
+        destino = self.caminho_objeto(sha256)
+        pasta = os.path.dirname(destino)
+        os.makedirs(pasta, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        compressao = None
+        try:
+            with os.fdopen(descritor, "wb") as saida:
+                if comprimir:
+                    with gzip.GzipFile(fileobj=saida, mode="wb", compresslevel=6, mtime=0) as comprimido:
+                        shutil.copyfileobj(origem, comprimido, TAMANHO_BLOCO)
+                else:
+                    shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+            armazenado = os.path.getsize(temporario)
+            if comprimir and armazenado <= tamanho * (1 - ECONOMIA_MINIMA):
+                compressao = "gzip"
+            elif comprimir:
+                # A compressão quase não economizou: guardar o conteúdo como veio
+                origem.seek(0)
+                with open(temporario, "wb") as saida:
+                    shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+                armazenado = tamanho
+            os.replace(temporario, self.caminho_objeto(sha256, compressao))
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        with self._trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO objetos (sha256, tamanho, tamanho_armazenado, compressao, criado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, tamanho, armazenado, compressao, _agora()),
+            )
+
+    def abrir(self, sha256):
+        """
+        Abre o conteúdo original de um objeto para leitura binária
+
+        Raises:
+            KeyError: Objeto fora do acervo
+        """
+        objeto = self.objeto(sha256)
+        if objeto is None:
+            raise KeyError(f"Objeto fora do acervo: {sha256}")
+        caminho = self.caminho_objeto(sha256, objeto["compressao"])
+        if objeto["compressao"] == "gzip":
+            return gzip.open(caminho, "rb")
+        return open(caminho, "rb")
+
+    def restaurar(self, sha256, destino):
+        """Grava o conteúdo original do objeto em destino e retorna o caminho"""
+        temporario = destino + ".tmp"
+        with self.abrir(sha256) as origem, open(temporario, "wb") as saida:
+            shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+        os.replace(temporario, destino)
+        return destino
+
+    def registrar_execucao(self, servico, execucao, sucesso=None):
+        """Cria a execução no índice ou, com sucesso informado, marca sua conclusão"""
+        with self._trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO execucoes (servico, execucao, iniciada_em) VALUES (?, ?, ?)",
+                (servico, execucao, _agora()),
+            )
+            if sucesso is not None:
+                self.conexao.execute(
+                    "UPDATE execucoes SET concluida_em = ?, sucesso = ? WHERE servico = ? AND execucao = ?",
+                    (_agora(), int(sucesso), servico, execucao),
+                )
+
+    def registrar_artefato(self, servico, execucao, tipo, nome, sha256):
+        """Liga um objeto já guardado à execução, com o nome que ele tinha nela"""
+        with self._trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO artefatos (servico, execucao, tipo, nome, sha256, registrado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (servico, execucao, tipo, nome, sha256, _agora()),
+            )
+
+    def execucoes(self, servico=None, limite=20):
+        """Execuções mais recentes, com a quantidade de artefatos de cada uma"""
+        sql = (
+            "SELECT e.servico, e.execucao, e.iniciada_em, e.concluida_em, e.sucesso, "
+            "COUNT(a.sha256) AS artefatos FROM execucoes e LEFT JOIN artefatos a "
+            "ON a.servico = e.servico AND a.execucao = e.execucao"
+        )
+        parametros = []
+        if servico:
+            sql += " WHERE e.servico = ?"
+            parametros.append(servico)
+        sql += " GROUP BY e.servico, e.execucao ORDER BY e.iniciada_em DESC, e.execucao DESC LIMIT ?"
+        parametros.append(int(limite))
+        with self._trava:
+            return [dict(linha) for linha in self.conexao.execute(sql, parametros)]
+
+    def artefatos(self, execucao, servico=None):
+        """Artefatos de uma execução, com o tamanho original e o ocupado no acervo"""
+        sql = (
+            "SELECT a.servico, a.execucao, a.tipo, a.nome, a.sha256, a.registrado_em, "
+            "o.tamanho, o.tamanho_armazenado, o.compressao FROM artefatos a "
+            "JOIN objetos o ON o.sha256 = a.sha256 WHERE a.execucao = ?"
+        )
+        parametros = [execucao]
+        if servico:
+            sql += " AND a.servico = ?"
+            parametros.append(servico)
+        sql += " ORDER BY a.registrado_em, a.nome"
+        with self._trava:
+            return [dict(linha) for linha in self.conexao.execute(sql, parametros)]
+
+    def limpar(self, dias_capturas=RETENCAO_CAPTURAS_DIAS, dias_downloads=None):
+        """
+        Aplica a retenção e apaga os objetos que ficaram sem artefatos
+
+        Args:
+            dias_capturas (int): Capturas de tela registradas há mais dias saem do índice
+            dias_downloads (int, optional): O mesmo para os demais artefatos. Se None,
+                                            ficam para sempre (cada conteúdo ocupa o disco uma vez)
+
+        Returns:
+            dict: Quantidade de 'artefatos' e 'objetos' removidos e 'bytes' liberados
+        """
+        removidos = {"artefatos": 0, "objetos": 0, "bytes": 0}
+        # (operador aplicado ao tipo de captura, dias de retenção)
+        limites = [("=", dias_capturas)]
+        if dias_downloads is not None:
+            limites.append(("<>", dias_downloads))
+        with self._trava, self.conexao:
+            for operador, dias in limites:
+                corte = (datetime.now() - timedelta(days=dias)).isoformat(timespec="seconds")
+                removidos["artefatos"] += self.conexao.execute(
+                    f"DELETE FROM artefatos WHERE tipo {operador} ? AND registrado_em < ?", (TIPO_CAPTURA, corte)
+                ).rowcount
+            # Execuções sem artefatos e mais antigas que a retenção não têm mais o que mostrar
+            corte = (datetime.now() - timedelta(days=max(dias for _, dias in limites))).isoformat(
+                timespec="seconds"
+            )
+            self.conexao.execute(
+                "DELETE FROM execucoes WHERE iniciada_em < ? AND NOT EXISTS (SELECT 1 FROM artefatos a "
+                "WHERE a.servico = execucoes.servico AND a.execucao = execucoes.execucao)",
+                (corte,),
+            )
+            orfaos = self.conexao.execute(
+                "SELECT sha256, tamanho_armazenado, compressao FROM objetos o "
+                "WHERE NOT EXISTS (SELECT 1 FROM artefatos a WHERE a.sha256 = o.sha256)"
+            ).fetchall()
+            for orfao in orfaos:
+                try:
+                    os.remove(self.caminho_objeto(orfao["sha256"], orfao["compressao"]))
+                except FileNotFoundError:
+                    pass
+                self.conexao.execute("DELETE FROM objetos WHERE sha256 = ?", (orfao["sha256"],))
+                removidos["objetos"] += 1
+                removidos["bytes"] += orfao["tamanho_armazenado"]
+        return removidos
+
+    def limpar_se_preciso(self, intervalo_horas=INTERVALO_LIMPEZA_HORAS):
+        """
+        Aplica limpar() se a última limpeza foi há mais de intervalo_horas
+
+        A data da última limpeza fica no índice, então execuções seguidas (e
+        outros processos) não repetem a varredura dos objetos.
+
+        Returns:
+            dict: Como em limpar(), ou None se ainda não era hora
+        """
+        with self._trava:
+            linha = self.conexao.execute(
+                "SELECT executada_em FROM manutencao WHERE tarefa = 'limpeza'"
+            ).fetchone()
+            if linha and datetime.fromisoformat(linha[0]) > datetime.now() - timedelta(hours=intervalo_horas):
+                return None
+            removidos = self.limpar()
+            with self.conexao:
+                self.conexao.execute(
+                    "INSERT OR REPLACE INTO manutencao (tarefa, executada_em) VALUES ('limpeza', ?)", (_agora(),)
+                )
+        return removidos
+
+    def iniciar_execucao(self, servico, execucao, politica_capturas=CAPTURAS_FALHA):
+        """Registra uma execução e retorna o objeto que guarda os artefatos dela"""
+        return ExecucaoAcervo(self, servico, execucao, politica_capturas)
+
+
+class ExecucaoAcervo:
+    """
+    Artefatos de uma execução, compartilháveis entre os navegadores dela
+
+    Na política 'falha', as capturas de cada grupo (ex.: uma UF) ficam em
+    memória até a coleta do grupo terminar: guardar_capturas grava as do grupo
+    que falhou e descartar_capturas libera as do grupo que deu certo.
+    """
+
+    def __init__(self, acervo, servico, execucao, politica_capturas=CAPTURAS_FALHA):
+        """
+        Args:
+            acervo (Acervo): Acervo onde os artefatos são guardados
+            servico (str): Nome do serviço (ex.: 'vacinometro_scraper')
+            execucao (str): Identificador da execução (ex.: o do Rastreador)
+            politica_capturas (str): 'falha', 'sempre' ou 'nunca'
+        """
+        self.acervo = acervo
+        self.servico = servico
+        self.execucao = execucao
+        self.politica_capturas = validar_politica(politica_capturas)
+        self._pendentes = {}  # grupo -> deque de (nome, png)
+        self._trava = threading.Lock()
+        acervo.registrar_execucao(servico, execucao)
+
+    def guardar_arquivo(self, caminho, tipo=TIPO_DOWNLOAD, nome=None, sha256=None):
+        """
+        Guarda um arquivo da execução no acervo
+
+        Args:
+            caminho (str): Arquivo a guardar
+            tipo (str): Tipo do artefato
+            nome (str, optional): Nome no índice. Se None, o nome do arquivo
+            sha256 (str, optional): Hash já calculado do conteúdo
+
+        Returns:
+            str: SHA-256 do conteúdo
+        """
+        # Guardar e registrar sob a trava do acervo: a limpeza não apaga o objeto entre os dois
+        with self.acervo._trava:
+            sha256 = self.acervo.guardar_arquivo(caminho, sha256)
+            self.acervo.registrar_artefato(
+                self.servico, self.execucao, tipo, nome or os.path.basename(caminho), sha256
+            )
+        return sha256
+
+    def capturar_tela(self, driver, nome, grupo=None):
+        """
+        Tira uma captura de tela conforme a política da execução
+
+        Args:
+            driver: Instância do WebDriver
+            nome (str): Nome da captura (ex.: '20240925_101500_AM_filtros_aplicados.png')
+            grupo (str, optional): Grupo da captura na política 'falha' (ex.: a UF)
+
+        Returns:
+            str: SHA-256 da captura, se ela foi guardada agora
+        """
+        if self.politica_capturas == CAPTURAS_NUNCA or driver is None:
+            return None
+        png = driver.get_screenshot_as_png()
+        if self.politica_capturas == CAPTURAS_SEMPRE:
+            return self._guardar_captura(nome, png)
+        with self._trava:
+            self._pendentes.setdefault(grupo, deque(maxlen=CAPTURAS_PENDENTES_POR_GRUPO)).append((nome, png))
+        return None
+
+    def _guardar_captura(self, nome, png):
+        with self.acervo._trava:
+            sha256 = self.acervo.guardar_bytes(png, nome)
+            self.acervo.registrar_artefato(self.servico, self.execucao, TIPO_CAPTURA, nome, sha256)
+        return sha256
+
+    def _retirar_pendentes(self, grupo):
+        with self._trava:
+            if grupo is None:
+                pendentes = [captura for fila in self._pendentes.values() for captura in fila]
+                self._pendentes.clear()
+            else:
+                pendentes = list(self._pendentes.pop(grupo, ()))
+        return pendentes
+
+    def guardar_capturas(self, grupo=None):
+        """Grava as capturas pendentes do grupo (ou de todos, se None) e retorna quantas eram"""
+        pendentes = self._retirar_pendentes(grupo)
+        for nome, png in pendentes:
+            self._guardar_captura(nome, png)
+        if pendentes:
+            print(f"{len(pendentes)} capturas de tela guardadas no acervo ({self.servico} {self.execucao})")
+        return len(pendentes)
+
+    def descartar_capturas(self, grupo=None):
+        """Descarta as capturas pendentes do grupo (ou de todos, se None)"""
+        self._retirar_pendentes(grupo)
+
+    def concluir(self, sucesso):
+        """
+        Encerra a execução no índice e aplica a retenção do acervo, se a
+        última limpeza foi há mais de INTERVALO_LIMPEZA_HORAS
+
+        Capturas ainda pendentes são guardadas se a execução falhou e
+        descartadas se ela deu certo.
+        """
+        if sucesso:
+            self.descartar_capturas()
+        else:
+            self.guardar_capturas()
+        self.acervo.registrar_execucao(self.servico, self.execucao, sucesso)
+        removidos = self.acervo.limpar_se_preciso()
+        if removidos and removidos["objetos"]:
+            print(
+                f"Acervo: {removidos['objetos']} objetos antigos removidos "
+                f"({removidos['bytes'] / 1024 / 1024:.1f} MB liberados)"
+            )
@@ -0,0 +1,811 @@
+"""
+Banco de dados local (SQLite) com os registros de todas as coletas
+
+Cada linha extraída dos boletins ou das exportações do vacinômetro vira um
+registro identificado por (fonte, chave). Importar de novo os mesmos dados
+não duplica nada: registros iguais são ignorados e registros com a mesma
+chave e conteúdo diferente são atualizados, guardando quando mudaram. As
+consultas por período, município e fonte usam índices, sem reler arquivos.
+
+Sobre os registros são mantidos dois resumos semanais: casos de SRAG por
+semana epidemiológica, município e classificação final, e doses aplicadas
+por semana epidemiológica e UF. Gatilhos do banco anotam, a cada registro
+inserido, alterado ou removido, a data e o município afetados; ao atualizar
+os resumos, só essas partições (semana e município, para a SRAG, ou semana,
+para a vacinação) são recalculadas. Painéis e correlações leem os resumos em
+vez de percorrer todo o histórico.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+from datetime import date, datetime, timedelta
+
+from comum.calendario_epidemiologico import inicio_semana_epidemiologica, semana_epidemiologica
+from comum.download_http import calcular_sha256
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_BANCO = os.path.join(RAIZ_PROJETO, "dados", "srag_project.sqlite3")
+
+# Pasta padrão das exportações do VacinometroCovidScraper
+VACINOMETRO_DADOS_DIR = os.path.join(RAIZ_PROJETO, "vacinometro", "vacinometro", "dados")
+
+# Fontes dos registros
+FONTE_BOLETIM = "srag_boletim"
+FONTE_VACINOMETRO = "vacinometro"
+
+# Linhas gravadas por transação
+LINHAS_POR_LOTE = 5000
+
+# Parâmetros por consulta 'IN (...)' (limite de variáveis do SQLite)
+CHAVES_POR_CONSULTA = 900
+
+# Nomes de coluna (sem maiúsculas/acentos) reconhecidos como data de notificação e município.
+# Só nomes exatos: prefixos como 'dt' também casariam com DT_NASC ou DT_SIN_PRI
+PADRAO_COLUNA_DATA = re.compile(
+    r"^(dt_notific|dt_notificacao|data_notificacao|data_da_notificacao"
+    r"|data|data_aplicacao|dt_aplicacao|data_vacina|vacina_dataaplicacao)$"
+)
+PADRAO_COLUNA_MUNICIPIO = re.compile(r"munic|^id_mn_resi$|^id_municip$")
+PADRAO_DATA_BR = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+PADRAO_DATA_ISO = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+# Colunas (nos dados de cada registro) usadas pelos resumos
+PADRAO_COLUNA_CLASSIFICACAO = re.compile(r"^classi_fin$|^classificacao")
+PADRAO_COLUNA_UF = re.compile(r"^(uf|sg_uf|sigla_uf|estado)$|_uf$")
+PADRAO_COLUNA_DOSES = re.compile(r"^(qtd_|total_|quantidade_)?doses|aplicad")
+PADRAO_MILHAR = re.compile(r"^-?\d{1,3}(\.\d{3})+$")
+
+# Exportações do vacinômetro com a UF no nome (ver VacinometroCovidScraper.definir_selecao)
+PADRAO_ARQUIVO_UF = re.compile(r"^\d{8}_\d{6}_([A-Z]{2})_")
+
+# Município, classificação ou UF ausente nos resumos
+NAO_INFORMADO = "NAO INFORMADO"
+
+# Versão do esquema, em PRAGMA user_version; bancos anteriores aos resumos têm versão 0
+VERSAO_ESQUEMA = 1
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    fonte TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    data_notificacao TEXT,
+    municipio TEXT,
+    dados TEXT NOT NULL,
+    arquivo_origem TEXT,
+    inserido_em TEXT NOT NULL,
+    atualizado_em TEXT NOT NULL,
+    PRIMARY KEY (fonte, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_registros_data ON registros (data_notificacao, fonte);
+CREATE INDEX IF NOT EXISTS idx_registros_municipio ON registros (municipio, data_notificacao);
+CREATE INDEX IF NOT EXISTS idx_registros_atualizacao ON registros (fonte, atualizado_em);
+
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    fonte TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    linhas INTEGER NOT NULL,
+    importado_em TEXT NOT NULL
+);
+
+-- Datas e municípios com registros alterados desde a última atualização dos resumos.
+-- Os gatilhos usam NOT EXISTS, e não INSERT OR IGNORE, porque o ON CONFLICT do
+-- UPSERT prevaleceria sobre o OR IGNORE dentro do gatilho
+CREATE TABLE IF NOT EXISTS particoes_pendentes (
+    fonte TEXT NOT NULL,
+    data_notificacao TEXT NOT NULL,
+    municipio TEXT NOT NULL,
+    PRIMARY KEY (fonte, data_notificacao, municipio)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_registros_insercao AFTER INSERT ON registros BEGIN
+    INSERT INTO particoes_pendentes (fonte, data_notificacao, municipio)
+    SELECT NEW.fonte, COALESCE(NEW.data_notificacao, ''), COALESCE(NEW.municipio, '')
+    WHERE NOT EXISTS (
+        SELECT 1 FROM particoes_pendentes WHERE fonte = NEW.fonte
+        AND data_notificacao = COALESCE(NEW.data_notificacao, '') AND municipio = COALESCE(NEW.municipio, '')
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS trg_registros_atualizacao AFTER UPDATE ON registros BEGIN
+    INSERT INTO particoes_pendentes (fonte, data_notificacao, municipio)
+    SELECT OLD.fonte, COALESCE(OLD.data_notificacao, ''), COALESCE(OLD.municipio, '')
+    WHERE NOT EXISTS (
+        SELECT 1 FROM particoes_pendentes WHERE fonte = OLD.fonte
+        AND data_notificacao = COALESCE(OLD.data_notificacao, '') AND municipio = COALESCE(OLD.municipio, '')
+    );
+    INSERT INTO particoes_pendentes (fonte, data_notificacao, municipio)
+    SELECT NEW.fonte, COALESCE(NEW.data_notificacao, ''), COALESCE(NEW.municipio, '')
+    WHERE NOT EXISTS (
+        SELECT 1 FROM particoes_pendentes WHERE fonte = NEW.fonte
+        AND data_notificacao = COALESCE(NEW.data_notificacao, '') AND municipio = COALESCE(NEW.municipio, '')
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS trg_registros_remocao AFTER DELETE ON registros BEGIN
+    INSERT INTO particoes_pendentes (fonte, data_notificacao, municipio)
+    SELECT OLD.fonte, COALESCE(OLD.data_notificacao, ''), COALESCE(OLD.municipio, '')
+    WHERE NOT EXISTS (
+        SELECT 1 FROM particoes_pendentes WHERE fonte = OLD.fonte
+        AND data_notificacao = COALESCE(OLD.data_notificacao, '') AND municipio = COALESCE(OLD.municipio, '')
+    );
+END;
+
+CREATE TABLE IF NOT EXISTS resumo_srag_semanal (
+    semana_inicio TEXT NOT NULL,
+    ano_epi INTEGER NOT NULL,
+    semana_epi INTEGER NOT NULL,
+    municipio TEXT NOT NULL,
+    classificacao TEXT NOT NULL,
+    casos INTEGER NOT NULL,
+    PRIMARY KEY (semana_inicio, municipio, classificacao)
+);
+CREATE INDEX IF NOT EXISTS idx_resumo_srag_municipio ON resumo_srag_semanal (municipio, semana_inicio);
+
+CREATE TABLE IF NOT EXISTS resumo_vacinacao_semanal (
+    semana_inicio TEXT NOT NULL,
+    ano_epi INTEGER NOT NULL,
+    semana_epi INTEGER NOT NULL,
+    uf TEXT NOT NULL,
+    doses REAL NOT NULL,
+    registros INTEGER NOT NULL,
+    PRIMARY KEY (semana_inicio, uf)
+);
+"""
+
+UPSERT = """
+INSERT INTO registros
+    (fonte, chave, data_notificacao, municipio, dados, arquivo_origem, inserido_em, atualizado_em)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fonte, chave) DO UPDATE SET
+    data_notificacao = excluded.data_notificacao,
+    municipio = excluded.municipio,
+    dados = excluded.dados,
+    arquivo_origem = excluded.arquivo_origem,
+    atualizado_em = excluded.atualizado_em
+WHERE registros.dados IS NOT excluded.dados
+"""
+
+
+def _normalizar_nome(nome):
+    """Nome de coluna em minúsculas, sem acentos e com '_' no lugar de espaços"""
+    nome = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return re.sub(r"\W+", "_", nome.strip().lower())
+
+
+def converter_data_iso(valor):
+    """Converte datas dd/mm/aaaa, aaaa-mm-dd ou date/datetime para 'aaaa-mm-dd' (ou None)"""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if not isinstance(valor, str):
+        return None
+    valor = valor.strip()
+    encontrado = PADRAO_DATA_BR.match(valor)
+    if encontrado:
+        dia, mes, ano = encontrado.groups()
+        return f"{ano}-{mes}-{dia}"
+    encontrado = PADRAO_DATA_ISO.match(valor)
+    if encontrado:
+        return "-".join(encontrado.groups())
+    return None
+
+
+def converter_numero(valor):
+    """Converte números como 1234, '1.234', '1.234,5' ou '12.5' (ou None)"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return valor
+    if not isinstance(valor, str):
+        return None
+    valor = valor.strip().replace(" ", "")
+    if "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    elif PADRAO_MILHAR.match(valor):
+        valor = valor.replace(".", "")
+    try:
+        return float(valor)
+    except ValueError:
+        return None
+
+
+def _valor_coluna(dados, padrao, nomes_normalizados, ausente=None):
+    """
+    Valor da primeira coluna dos dados cujo nome normalizado casa com o padrão
+
+    Args:
+        dados (dict): Dados de um registro
+        padrao (re.Pattern): Padrão do nome da coluna
+        nomes_normalizados (dict): Cache dos nomes já normalizados, compartilhado entre registros
+        ausente: Valor retornado quando nenhuma coluna casa com o padrão
+    """
+    for nome, valor in dados.items():
+        normalizado = nomes_normalizados.get(nome)
+        if normalizado is None:
+            normalizado = nomes_normalizados[nome] = _normalizar_nome(nome)
+        if padrao.search(normalizado):
+            return valor
+    return ausente
+
+
+def _rotulo(valor):
+    """Município, classificação ou UF como rótulo do resumo"""
+    rotulo = "" if valor is None else str(valor).strip().upper()
+    return rotulo or NAO_INFORMADO
+
+
+def colunas_chave_vacinometro(nomes):
+    """
+    Colunas que identificam um registro das exportações do vacinômetro
+
+    UF, data e as demais dimensões (ex.: dose, faixa etária); as colunas de
+    doses ficam de fora, para que a exportação revisada de uma UF e data
+    atualize o registro anterior.
+
+    Args:
+        nomes (list): Nomes das colunas
+
+    Returns:
+        list: Nomes das colunas da chave
+    """
+    return [nome for nome in nomes if not PADRAO_COLUNA_DOSES.search(_normalizar_nome(nome))]
+
+
+def uf_do_arquivo(nome):
+    """UF do nome de uma exportação do vacinômetro ('<data>_<hora>_<UF>_...'), ou None"""
+    encontrado = PADRAO_ARQUIVO_UF.match(os.path.basename(nome))
+    return encontrado.group(1) if encontrado else None
+
+
+def _localizar_coluna(nomes, padrao):
+    """Índice da primeira coluna cujo nome normalizado casa com o padrão (ou None)"""
+    for i, nome in enumerate(nomes):
+        if padrao.search(_normalizar_nome(nome)):
+            return i
+    return None
+
+
+class BancoDados:
+    """Banco SQLite com upsert idempotente dos registros coletados"""
+
+    def __init__(self, caminho=CAMINHO_BANCO):
+        """
+        Abre (ou cria) o banco
+
+        Args:
+            caminho (str, optional): Arquivo do banco. Se None, usa 'dados/srag_project.sqlite3'
+        """
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        if self.conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_ESQUEMA:
+            # Banco criado antes dos resumos: os registros existentes ainda não foram resumidos
+            self.reconstruir_resumos()
+            self.conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+
+    def fechar(self):
+        """Fecha a conexão"""
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def upsert(self, fonte, cabecalho, linhas, arquivo_origem=None, colunas_chave=None,
+               coluna_data=None, coluna_municipio=None, chave_por_posicao=False, valores_fixos=None):
+        """
+        Insere ou atualiza linhas de uma fonte
+
+        A chave de cada registro é o hash das colunas_chave, da posição da
+        linha no arquivo (chave_por_posicao) ou, sem elas, da linha inteira;
+        importar as mesmas linhas de novo não altera o banco. Com uma chave
+        natural, a versão revisada de uma linha atualiza o registro em vez de
+        criar outro ao lado do antigo.
+
+        Args:
+            fonte (str): Identificador da fonte (ex.: FONTE_BOLETIM)
+            cabecalho (list): Nomes das colunas
+            linhas (iterable): Linhas (listas de valores)
+            arquivo_origem (str, optional): Arquivo de onde as linhas vieram; os registros
+                inalterados também passam a apontar para ele
+            colunas_chave (list|callable, optional): Colunas que identificam o registro, ou
+                função que as escolhe a partir dos nomes das colunas
+            coluna_data (str, optional): Coluna da data de notificação. Se None, detecta pelo nome
+            coluna_municipio (str, optional): Coluna do município. Se None, detecta pelo nome
+            chave_por_posicao (bool): Identifica cada registro por (arquivo_origem, índice da
+                linha) e remove os registros do arquivo que não vieram nesta importação
+            valores_fixos (dict, optional): Colunas acrescentadas a todas as linhas, se o
+                cabeçalho não tiver coluna com o mesmo nome (ex.: {'uf': 'AM'})
+
+        Returns:
+            dict: Contagem de linhas 'inseridas', 'atualizadas', 'inalteradas' e 'removidas'
+        """
+        if chave_por_posicao and not arquivo_origem:
+            raise ValueError("chave_por_posicao requer o arquivo_origem")
+        nomes = list(cabecalho)
+        normalizados = {_normalizar_nome(nome) for nome in nomes}
+        fixos = {
+            nome: valor for nome, valor in (valores_fixos or {}).items()
+            if _normalizar_nome(nome) not in normalizados
+        }
+        nomes += list(fixos)
+        valores = list(fixos.values())
+        if callable(colunas_chave):
+            colunas_chave = colunas_chave(nomes)
+        indice_data = nomes.index(coluna_data) if coluna_data else _localizar_coluna(nomes, PADRAO_COLUNA_DATA)
+        if indice_data is None:
+            print(
+                f"Aviso: nenhuma coluna de data de notificação em {arquivo_origem or fonte}; "
+                "os registros ficam sem data e fora dos resumos (informe coluna_data)"
+            )
+        indice_municipio = (
+            nomes.index(coluna_municipio) if coluna_municipio
+            else _localizar_coluna(nomes, PADRAO_COLUNA_MUNICIPIO)
+        )
+        indices_chave = [nomes.index(coluna) for coluna in colunas_chave] if colunas_chave else None
+        agora = datetime.now().isoformat(timespec="seconds")
+
+        def preparar(indice, linha):
+            linha = ["" if valor is None else valor for valor in linha]
+            if valores:
+                # Linhas curtas são completadas para os valores fixos caírem nas suas colunas
+                linha = linha + [""] * (len(cabecalho) - len(linha)) + valores
+            # Campos além do cabeçalho (ex.: nomes de município com espaços) ganham nomes genéricos
+            colunas = nomes + [f"coluna_{i + 1}" for i in range(len(nomes), len(linha))]
+            dados = json.dumps(dict(zip(colunas, linha)), ensure_ascii=False, default=str)
+            if chave_por_posicao:
+                partes = [arquivo_origem, indice]
+            elif indices_chave:
+                partes = [linha[i] if i < len(linha) else "" for i in indices_chave]
+            else:
+                partes = linha
+            chave = hashlib.sha1(
+                json.dumps(partes, ensure_ascii=False, default=str).encode("utf-8")
+            ).hexdigest()
+
+            data_notificacao = None
+            if indice_data is not None and indice_data < len(linha):
+                data_notificacao = converter_data_iso(linha[indice_data])
+            municipio = None
+            if indice_municipio is not None and indice_municipio < len(linha):
+                municipio = str(linha[indice_municipio]).strip().upper() or None
+            return (fonte, chave, data_notificacao, municipio, dados, arquivo_origem, agora, agora)
+
+        contagem = {"inseridas": 0, "atualizadas": 0, "inalteradas": 0, "removidas": 0}
+        lote = []
+        gravadas = set()
+        for indice, linha in enumerate(linhas):
+            lote.append(preparar(indice, linha))
+            if len(lote) >= LINHAS_POR_LOTE:
+                self._gravar_lote(fonte, lote, contagem)
+                gravadas.update(registro[1] for registro in lote)
+                lote = []
+        if lote:
+            self._gravar_lote(fonte, lote, contagem)
+            gravadas.update(registro[1] for registro in lote)
+        if chave_por_posicao:
+            # Versão revisada com menos linhas: as linhas que sobraram da anterior saem do banco
+            self._remover_ausentes(fonte, arquivo_origem, gravadas, contagem)
+        return contagem
+
+    def _gravar_lote(self, fonte, lote, contagem):
+        """Grava um lote em uma transação e atualiza a contagem"""
+        chaves = list({registro[1] for registro in lote})
+        with self.conexao:
+            existentes = 0
+            for i in range(0, len(chaves), CHAVES_POR_CONSULTA):
+                parte = chaves[i:i + CHAVES_POR_CONSULTA]
+                existentes += self.conexao.execute(
+                    f"SELECT COUNT(*) FROM registros WHERE fonte = ? AND chave IN ({','.join('?' * len(parte))})",
+                    [fonte, *parte],
+                ).fetchone()[0]
+            # rowcount não conta as linhas gravadas pelos gatilhos, ao contrário de total_changes
+            alteradas = self.conexao.executemany(UPSERT, lote).rowcount
+            arquivo_origem = lote[0][5]
+            if arquivo_origem:
+                # Registros inalterados também fazem parte do arquivo mais recente (ver _recalcular_vacinacao)
+                self.conexao.executemany(
+                    "UPDATE registros SET arquivo_origem = ? "
+                    "WHERE fonte = ? AND chave = ? AND arquivo_origem IS NOT ?",
+                    [(arquivo_origem, fonte, chave, arquivo_origem) for chave in chaves],
+                )
+        inseridas = len(chaves) - existentes
+        contagem["inseridas"] += inseridas
+        contagem["atualizadas"] += alteradas - inseridas
+        contagem["inalteradas"] += len(lote) - alteradas
+
+    def _remover_ausentes(self, fonte, arquivo_origem, chaves, contagem):
+        """Remove os registros do arquivo cujas chaves não estão entre as importadas"""
+        ausentes = [
+            (fonte, linha[0]) for linha in self.conexao.execute(
+                "SELECT chave FROM registros WHERE fonte = ? AND arquivo_origem = ?", (fonte, arquivo_origem)
+            )
+            if linha[0] not in chaves
+        ]
+        if ausentes:
+            with self.conexao:
+                self.conexao.executemany("DELETE FROM registros WHERE fonte = ? AND chave = ?", ausentes)
+        contagem["removidas"] += len(ausentes)
+
+    def arquivo_importado(self, caminho, sha256=None):
+        """Verifica se o arquivo já foi importado com o conteúdo atual"""
+        linha = self.conexao.execute(
+            "SELECT sha256 FROM arquivos WHERE caminho = ?", (os.path.abspath(caminho),)
+        ).fetchone()
+        return bool(linha) and linha["sha256"] == (sha256 or calcular_sha256(caminho))
+
+    def _registrar_arquivo(self, caminho, fonte, sha256, linhas):
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO arquivos (caminho, fonte, sha256, linhas, importado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(caminho), fonte, sha256, linhas, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def importar_linhas_arquivo(self, caminho, fonte, cabecalho, linhas, forcar=False, **opcoes):
+        """
+        Importa as linhas de um arquivo, ignorando arquivos já importados sem alterações
+
+        Returns:
+            dict: Contagem do upsert, ou None se o arquivo foi ignorado
+        """
+        sha256 = calcular_sha256(caminho)
+        if not forcar and self.arquivo_importado(caminho, sha256):
+            return None
+        contagem = self.upsert(fonte, cabecalho, linhas, os.path.basename(caminho), **opcoes)
+        self._registrar_arquivo(caminho, fonte, sha256, sum(contagem.values()))
+        return contagem
+
+    def importar_pdf(self, caminho_pdf, forcar=False):
+        """Importa as linhas de um boletim em PDF (extrair_dados_pdf)"""
+        from srag_hospitalizados.covid19_srag_hospitalizados_process_pdf import extrair_dados_pdf, resolver_extrator
+
+        if not forcar and self.arquivo_importado(caminho_pdf):
+            return None
+        cabecalho, dados = extrair_dados_pdf(caminho_pdf, extrator=resolver_extrator())
+        if cabecalho is None:
+            return None
+        return self.importar_linhas_arquivo(
+            caminho_pdf, FONTE_BOLETIM, cabecalho, dados, forcar=True, chave_por_posicao=True
+        )
+
+    def importar_planilha(self, caminho, fonte, forcar=False, **opcoes):
+        """
+        Importa um CSV (separado por vírgula ou ponto e vírgula) ou XLSX
+
+        Usado para os CSVs gerados dos boletins e para as exportações do vacinômetro.
+
+        Returns:
+            dict: Contagem do upsert, ou None se o arquivo foi ignorado
+        """
+        if not forcar and self.arquivo_importado(caminho):
+            return None
+        if caminho.lower().endswith(".xlsx"):
+            import openpyxl
+
+            pasta_trabalho = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+            try:
+                linhas = pasta_trabalho.worksheets[0].iter_rows(values_only=True)
+                cabecalho = [str(nome) if nome is not None else "" for nome in next(linhas, ())]
+                return self.importar_linhas_arquivo(caminho, fonte, cabecalho, linhas, forcar=True, **opcoes)
+            finally:
+                pasta_trabalho.close()
+
+        with open(caminho, newline="", encoding="utf-8-sig") as f:
+            amostra = f.read(4096)
+            f.seek(0)
+            delimitador = ";" if amostra.count(";") > amostra.count(",") else ","
+            leitor = csv.reader(f, delimiter=delimitador)
+            cabecalho = next(leitor, [])
+            return self.importar_linhas_arquivo(caminho, fonte, cabecalho, leitor, forcar=True, **opcoes)
+
+    def consultar(self, fonte=None, inicio=None, fim=None, municipio=None, limite=None):
+        """
+        Consulta registros por fonte, período de notificação e município
+
+        Args:
+            fonte (str, optional): Fonte dos registros
+            inicio (date|str, optional): Data inicial (inclusive)
+            fim (date|str, optional): Data final (inclusive)
+            municipio (str, optional): Nome do município
+            limite (int, optional): Máximo de registros
+
+        Returns:
+            list: Dicionários com os dados de cada registro e os campos do índice
+        """
+        condicoes, parametros = [], []
+        if fonte:
+            condicoes.append("fonte = ?")
+            parametros.append(fonte)
+        if inicio:
+            condicoes.append("data_notificacao >= ?")
+            parametros.append(converter_data_iso(inicio) or str(inicio))
+        if fim:
+            condicoes.append("data_notificacao <= ?")
+            parametros.append(converter_data_iso(fim) or str(fim))
+        if municipio:
+            condicoes.append("municipio = ?")
+            parametros.append(municipio.strip().upper())
+        return self._selecionar(condicoes, parametros, "data_notificacao", limite)
+
+    def alterados_desde(self, momento, fonte=None):
+        """
+        Registros inseridos ou atualizados a partir de um momento
+
+        Args:
+            momento (datetime|str): Ex.: datetime.now() - timedelta(days=7)
+            fonte (str, optional): Fonte dos registros
+
+        Returns:
+            list: Registros como em consultar()
+        """
+        momento = momento.isoformat(timespec="seconds") if isinstance(momento, datetime) else str(momento)
+        fontes = [fonte] if fonte else [
+            linha[0] for linha in self.conexao.execute("SELECT DISTINCT fonte FROM registros")
+        ]
+        # Uma consulta por fonte usa o índice (fonte, atualizado_em)
+        registros = []
+        for nome in fontes:
+            registros += self._selecionar(["fonte = ?", "atualizado_em >= ?"], [nome, momento], "atualizado_em")
+        return registros
+
+    def atualizar_resumos(self):
+        """
+        Recalcula as partições dos resumos afetadas desde a última atualização
+
+        Cada partição é refeita a partir dos seus registros, com uma consulta
+        pelos índices de município e data; as demais não são lidas.
+
+        Returns:
+            dict: Partições recalculadas de cada resumo ('srag' e 'vacinacao')
+        """
+        with self.conexao:
+            pendentes = [
+                tuple(linha) for linha in
+                self.conexao.execute("SELECT fonte, data_notificacao, municipio FROM particoes_pendentes")
+            ]
+            particoes_srag, semanas_vacinacao = set(), set()
+            for fonte, data_notificacao, municipio in pendentes:
+                try:
+                    semana = inicio_semana_epidemiologica(date.fromisoformat(data_notificacao))
+                except ValueError:
+                    continue  # Registros sem data válida não entram nos resumos
+                if fonte == FONTE_BOLETIM:
+                    particoes_srag.add((semana, _rotulo(municipio)))
+                elif fonte == FONTE_VACINOMETRO:
+                    semanas_vacinacao.add(semana)
+
+            for semana, municipio in sorted(particoes_srag):
+                self._recalcular_srag(semana, municipio)
+            for semana in sorted(semanas_vacinacao):
+                self._recalcular_vacinacao(semana)
+            self.conexao.executemany(
+                "DELETE FROM particoes_pendentes WHERE fonte = ? AND data_notificacao = ? AND municipio = ?",
+                pendentes,
+            )
+        return {"srag": len(particoes_srag), "vacinacao": len(semanas_vacinacao)}
+
+    def reconstruir_resumos(self):
+        """
+        Refaz os resumos a partir de todos os registros
+
+        Returns:
+            dict: Partições recalculadas, como em atualizar_resumos()
+        """
+        with self.conexao:
+            self.conexao.execute("DELETE FROM resumo_srag_semanal")
+            self.conexao.execute("DELETE FROM resumo_vacinacao_semanal")
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO particoes_pendentes SELECT DISTINCT fonte, "
+                "COALESCE(data_notificacao, ''), COALESCE(municipio, '') FROM registros"
+            )
+        return self.atualizar_resumos()
+
+    def _registros_semana(self, fonte, semana, condicoes=(), parametros=()):
+        """Arquivo de origem e dados (JSON) dos registros da fonte notificados na semana epidemiológica"""
+        sql = "SELECT arquivo_origem, dados FROM registros WHERE " + " AND ".join(
+            [*condicoes, "data_notificacao BETWEEN ? AND ?", "fonte = ?"]
+        )
+        fim = semana + timedelta(days=6)
+        for arquivo, dados in self.conexao.execute(sql, [*parametros, semana.isoformat(), fim.isoformat(), fonte]):
+            yield arquivo, json.loads(dados)
+
+    def _ordem_arquivos(self, fonte):
+        """Posição de cada arquivo importado da fonte, pela data de importação (e nome, nos empates)"""
+        return {
+            os.path.basename(caminho): (importado_em, os.path.basename(caminho))
+            for caminho, importado_em in self.conexao.execute(
+                "SELECT caminho, importado_em FROM arquivos WHERE fonte = ?", (fonte,)
+            )
+        }
+
+    def _recalcular_srag(self, semana, municipio):
+        """Refaz os casos de uma semana e município no resumo da SRAG"""
+        if municipio == NAO_INFORMADO:
+            condicao = "(municipio = ? OR municipio IS NULL)"
+        else:
+            condicao = "municipio = ?"
+        nomes = {}
+        casos = {}
+        for _, dados in self._registros_semana(FONTE_BOLETIM, semana, [condicao], [municipio]):
+            classificacao = _rotulo(_valor_coluna(dados, PADRAO_COLUNA_CLASSIFICACAO, nomes))
+            casos[classificacao] = casos.get(classificacao, 0) + 1
+
+        ano_epi, semana_epi = semana_epidemiologica(semana)
+        self.conexao.execute(
+            "DELETE FROM resumo_srag_semanal WHERE semana_inicio = ? AND municipio = ?",
+            (semana.isoformat(), municipio),
+        )
+        self.conexao.executemany(
+            "INSERT INTO resumo_srag_semanal "
+            "(semana_inicio, ano_epi, semana_epi, municipio, classificacao, casos) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (semana.isoformat(), ano_epi, semana_epi, municipio, classificacao, total)
+                for classificacao, total in casos.items()
+            ],
+        )
+
+    def _recalcular_vacinacao(self, semana):
+        """
+        Refaz as doses de uma semana no resumo da vacinação
+
+        Cada exportação é um retrato do painel: de cada UF, só entram os
+        registros da exportação mais recente que tem dados da semana, sem
+        somar retratos anteriores.
+        """
+        ordem = self._ordem_arquivos(FONTE_VACINOMETRO)
+        nomes = {}
+        doses = {}
+        for arquivo, dados in self._registros_semana(FONTE_VACINOMETRO, semana):
+            uf = _rotulo(_valor_coluna(dados, PADRAO_COLUNA_UF, nomes))
+            # Sem coluna de doses, cada registro é uma dose aplicada (microdados)
+            quantidade = converter_numero(_valor_coluna(dados, PADRAO_COLUNA_DOSES, nomes, ausente=1)) or 0
+            posicao = ordem.get(arquivo, ("", arquivo or ""))
+            total = doses.get(uf)
+            if total is None or posicao > total[2]:
+                total = doses[uf] = [0, 0, posicao]
+            elif posicao < total[2]:
+                continue
+            total[0] += quantidade
+            total[1] += 1
+
+        ano_epi, semana_epi = semana_epidemiologica(semana)
+        self.conexao.execute("DELETE FROM resumo_vacinacao_semanal WHERE semana_inicio = ?", (semana.isoformat(),))
+        self.conexao.executemany(
+            "INSERT INTO resumo_vacinacao_semanal "
+            "(semana_inicio, ano_epi, semana_epi, uf, doses, registros) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (semana.isoformat(), ano_epi, semana_epi, uf, quantidade, registros)
+                for uf, (quantidade, registros, _) in doses.items()
+            ],
+        )
+
+    def consultar_resumo_srag(self, inicio=None, fim=None, municipio=None, classificacao=None):
+        """
+        Casos de SRAG por semana epidemiológica, município e classificação final
+
+        Args:
+            inicio (date|str, optional): Primeira semana (a que contém esta data)
+            fim (date|str, optional): Última semana (a que contém esta data)
+            municipio (str, optional): Nome do município
+            classificacao (str, optional): Classificação final (ex.: '5')
+
+        Returns:
+            list: Dicionários com 'semana_inicio', 'ano_epi', 'semana_epi', 'municipio',
+                  'classificacao' e 'casos'
+        """
+        filtros = {"municipio": municipio, "classificacao": classificacao}
+        return self._consultar_resumo("resumo_srag_semanal", inicio, fim, filtros, "semana_inicio, municipio")
+
+    def consultar_resumo_vacinacao(self, inicio=None, fim=None, uf=None):
+        """
+        Doses aplicadas por semana epidemiológica e UF
+
+        Args:
+            inicio (date|str, optional): Primeira semana (a que contém esta data)
+            fim (date|str, optional): Última semana (a que contém esta data)
+            uf (str, optional): Sigla da UF (ex.: 'AM')
+
+        Returns:
+            list: Dicionários com 'semana_inicio', 'ano_epi', 'semana_epi', 'uf', 'doses' e
+                  'registros' (linhas importadas que somaram as doses)
+        """
+        return self._consultar_resumo("resumo_vacinacao_semanal", inicio, fim, {"uf": uf}, "semana_inicio, uf")
+
+    def _consultar_resumo(self, tabela, inicio, fim, filtros, ordem):
+        """Consulta um resumo, atualizando antes as partições pendentes"""
+        if self.conexao.execute("SELECT 1 FROM particoes_pendentes LIMIT 1").fetchone():
+            self.atualizar_resumos()
+
+        condicoes, parametros = [], []
+        for operador, data in ((">=", inicio), ("<=", fim)):
+            if data:
+                condicoes.append(f"semana_inicio {operador} ?")
+                data = date.fromisoformat(converter_data_iso(data) or str(data))
+                parametros.append(inicio_semana_epidemiologica(data).isoformat())
+        for coluna, valor in filtros.items():
+            if valor:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(str(valor).strip().upper())
+        sql = f"SELECT * FROM {tabela}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        return [dict(linha) for linha in self.conexao.execute(f"{sql} ORDER BY {ordem}", parametros)]
+
+    def _selecionar(self, condicoes, parametros, ordem, limite=None):
+        sql = (
+            "SELECT fonte, chave, data_notificacao, municipio, dados, arquivo_origem, "
+            "inserido_em, atualizado_em FROM registros"
+        )
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += f" ORDER BY {ordem}"
+        if limite:
+            sql += " LIMIT ?"
+            parametros = list(parametros) + [int(limite)]
+        registros = []
+        for linha in self.conexao.execute(sql, parametros):
+            registro = dict(linha)
+            registro["dados"] = json.loads(registro["dados"])
+            registros.append(registro)
+        return registros
+
+
+def importar_tudo(banco=None, forcar=False):
+    """
+    Importa os CSVs gerados dos boletins e as exportações do vacinômetro
+
+    Arquivos já importados e sem alterações são ignorados.
+
+    Args:
+        banco (BancoDados, optional): Banco de destino. Se None, abre (e fecha) o banco padrão
+        forcar (bool): Reimporta mesmo os arquivos sem alterações
+    """
+    from srag_hospitalizados.covid19_srag_hospitalizados_process_pdf import OUTPUT_DIR
+
+    if banco is None:
+        with BancoDados() as banco:
+            return importar_tudo(banco, forcar)
+
+    fontes = [(OUTPUT_DIR, FONTE_BOLETIM, (".csv",)), (VACINOMETRO_DADOS_DIR, FONTE_VACINOMETRO, (".csv", ".xlsx"))]
+    for pasta, fonte, extensoes in fontes:
+        if not os.path.isdir(pasta):
+            continue
+        for nome in sorted(os.listdir(pasta)):
+            if not nome.lower().endswith(extensoes):
+                continue
+            caminho = os.path.join(pasta, nome)
+            # Chaves naturais: posição da linha no boletim; UF, data e dimensões na exportação
+            if fonte == FONTE_BOLETIM:
+                opcoes = {"chave_por_posicao": True}
+            else:
+                uf = uf_do_arquivo(nome)
+                opcoes = {"colunas_chave": colunas_chave_vacinometro, "valores_fixos": {"uf": uf} if uf else None}
+            try:
+                contagem = banco.importar_planilha(caminho, fonte, forcar=forcar, **opcoes)
+            except Exception as e:
+                print(f"Erro ao importar {caminho}: {e}")
+                continue
+            if contagem is None:
+                print(f"{nome}: sem alterações desde a última importação")
+            else:
+                print(
+                    f"{nome}: {contagem['inseridas']} inseridas, {contagem['atualizadas']} atualizadas, "
+                    f"{contagem['inalteradas']} inalteradas, {contagem['removidas']} removidas"
+                )
+
+    particoes = banco.atualizar_resumos()
+    print(
+        f"Resumos semanais: {particoes['srag']} partições da SRAG e "
+        f"{particoes['vacinacao']} semanas da vacinação recalculadas"
+    )
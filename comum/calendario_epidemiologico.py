@@ -0,0 +1,42 @@
+"""
+Semanas epidemiológicas, como nos boletins do Ministério da Saúde
+
+As semanas começam no domingo e a semana 1 é a primeira com pelo menos
+quatro dias no ano.
+"""
+
+from datetime import date, timedelta
+
+
+def _inicio_ano_epidemiologico(ano):
+    """Retorna o domingo em que começa a semana epidemiológica 1 do ano"""
+    primeiro = date(ano, 1, 1)
+    dia_semana = (primeiro.weekday() + 1) % 7  # domingo = 0
+    if dia_semana <= 3:
+        return primeiro - timedelta(days=dia_semana)
+    return primeiro + timedelta(days=7 - dia_semana)
+
+
+def inicio_semana_epidemiologica(data):
+    """Retorna o domingo que inicia a semana epidemiológica da data"""
+    return data - timedelta(days=(data.weekday() + 1) % 7)
+
+
+def semana_epidemiologica(data):
+    """
+    Retorna o ano e a semana epidemiológica de uma data
+
+    Returns:
+        tuple: (ano epidemiológico, semana epidemiológica)
+    """
+    ano = data.year
+    inicio = _inicio_ano_epidemiologico(ano)
+    if data < inicio:
+        ano -= 1
+        inicio = _inicio_ano_epidemiologico(ano)
+    else:
+        inicio_seguinte = _inicio_ano_epidemiologico(ano + 1)
+        if data >= inicio_seguinte:
+            ano += 1
+            inicio = inicio_seguinte
+    return ano, (data - inicio).days // 7 + 1
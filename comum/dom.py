@@ -0,0 +1,136 @@
+"""
+Consultas ao DOM feitas dentro do navegador, em uma única chamada
+
+Cada find_elements, .text, is_displayed ou switch_to.frame é uma ida e volta
+ao chromedriver. Para procurar um elemento entre dezenas de candidatos (as
+opções de um dropdown, os iframes de uma página), os scripts deste módulo
+percorrem os candidatos no próprio navegador com execute_script e devolvem
+apenas o elemento ou o valor encontrado.
+"""
+
+from selenium.webdriver.common.by import By
+
+# Estratégias de localização que os scripts sabem avaliar no navegador
+ESTRATEGIAS_SUPORTADAS = (By.CSS_SELECTOR, By.XPATH)
+
+# Funções compartilhadas pelos scripts: candidatos de um seletor, texto
+# renderizado (equivalente ao .text do Selenium) e visibilidade
+_FUNCOES_JS = """
+function candidatos(raiz, porXpath, seletor) {
+    if (!porXpath) {
+        return Array.from(raiz.querySelectorAll(seletor));
+    }
+    var doc = raiz.ownerDocument || raiz;
+    var resultado = doc.evaluate(seletor, raiz, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var elementos = [];
+    for (var i = 0; i < resultado.snapshotLength; i++) {
+        elementos.push(resultado.snapshotItem(i));
+    }
+    return elementos;
+}
+function textoDe(elemento) {
+    return (elemento.innerText || elemento.textContent || '').replace(/\\s+/g, ' ').trim();
+}
+function visivel(elemento) {
+    if (elemento.checkVisibility) {
+        return elemento.checkVisibility({visibilityProperty: true});
+    }
+    var estilo = window.getComputedStyle(elemento);
+    return elemento.getClientRects().length > 0 && estilo.visibility !== 'hidden';
+}
+"""
+
+SCRIPT_BUSCAR_POR_TEXTO = _FUNCOES_JS + """
+var porXpath = arguments[0], seletor = arguments[1], texto = arguments[2];
+var exato = arguments[3], somenteVisiveis = arguments[4];
+var elementos = candidatos(document, porXpath, seletor);
+for (var i = 0; i < elementos.length; i++) {
+    var atual = textoDe(elementos[i]);
+    var confere = exato ? atual === texto : atual.indexOf(texto) !== -1;
+    if (confere && (!somenteVisiveis || visivel(elementos[i]))) {
+        return elementos[i];
+    }
+}
+return null;
+"""
+
+# Percorre o documento e, recursivamente, os iframes de mesma origem. Iframes
+# de outra origem não podem ser lidos pelo script: o documento principal
+# devolve os elementos deles para a busca continuar com switch_to.frame
+SCRIPT_BUSCAR_XPATH_FRAMES = _FUNCOES_JS + """
+var xpath = arguments[0], atributo = arguments[1];
+var outrasOrigens = [];
+function buscar(doc, principal) {
+    var elementos = candidatos(doc, true, xpath);
+    if (elementos.length) {
+        // Como o get_attribute do Selenium: a propriedade (href absoluto) antes do atributo
+        var valor = elementos[0][atributo];
+        if (valor === undefined || valor === null) {
+            valor = elementos[0].getAttribute(atributo);
+        }
+        return valor === null ? '' : String(valor);
+    }
+    var frames = doc.querySelectorAll('iframe, frame');
+    for (var i = 0; i < frames.length; i++) {
+        var interno = null;
+        try {
+            interno = frames[i].contentDocument;
+        } catch (e) {
+            interno = null;
+        }
+        if (!interno) {
+            if (principal) {
+                outrasOrigens.push(frames[i]);
+            }
+            continue;
+        }
+        var achado = buscar(interno, false);
+        if (achado !== null) {
+            return achado;
+        }
+    }
+    return null;
+}
+var valor = buscar(document, true);
+return {valor: valor, outras_origens: valor === null ? outrasOrigens : []};
+"""
+
+
+def buscar_por_texto(driver, by, seletor, texto, exato=True, somente_visiveis=True):
+    """
+    Procura, entre os elementos do seletor, o primeiro com o texto informado
+
+    Args:
+        driver: Instância do WebDriver
+        by: By.CSS_SELECTOR ou By.XPATH
+        seletor (str): Seletor dos candidatos
+        texto (str): Texto procurado, comparado ao texto renderizado sem espaços nas pontas
+        exato (bool): Se False, basta o texto do elemento conter o texto procurado
+        somente_visiveis (bool): Ignorar elementos ocultos
+
+    Returns:
+        O elemento encontrado, ou None
+    """
+    if by not in ESTRATEGIAS_SUPORTADAS:
+        raise ValueError(f"Estratégia não suportada: {by}")
+    return driver.execute_script(
+        SCRIPT_BUSCAR_POR_TEXTO, by == By.XPATH, seletor, texto, exato, somente_visiveis
+    )
+
+
+def buscar_xpath_em_frames(driver, xpath, atributo="href"):
+    """
+    Procura um elemento pelo XPath no documento atual e nos iframes de mesma origem
+
+    Args:
+        driver: Instância do WebDriver
+        xpath (str): XPath do elemento, avaliado em cada documento
+        atributo (str): Atributo do elemento a retornar
+
+    Returns:
+        tuple: (valor do atributo ou None, iframes de outra origem que não puderam ser
+               verificados). O valor é '' se o elemento existir sem o atributo; a lista
+               de iframes só é preenchida quando o elemento não foi encontrado
+    """
+    resultado = driver.execute_script(SCRIPT_BUSCAR_XPATH_FRAMES, xpath, atributo) or {}
+    return resultado.get("valor"), resultado.get("outras_origens") or []
@@ -0,0 +1,338 @@
+"""
+Download direto por HTTP, sem navegador
+
+Usa uma sessão com pool de conexões e novas tentativas, grava o arquivo em
+blocos e retoma downloads interrompidos com requisições Range e If-Range. Os validadores
+de cada fonte (ETag, Last-Modified, tamanho e SHA-256) ficam em cache para
+que arquivos sem alteração não sejam baixados nem processados de novo.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Tamanho dos blocos gravados em disco
+TAMANHO_BLOCO = 1024 * 1024
+
+# Tempo máximo (em segundos) para conectar e entre dois blocos recebidos
+TIMEOUT_HTTP = (10, 60)
+
+# Respostas com estes tipos indicam página de login/erro no lugar do arquivo
+TIPOS_NAO_ARQUIVO = ('text/html',)
+
+
+# Respostas que indicam URL expirada ou sem permissão (ex.: token temporário do SharePoint)
+STATUS_ACESSO_NEGADO = (401, 403, 410)
+
+
+class ErroDownload(Exception):
+    """Falha ao baixar um arquivo diretamente por HTTP"""
+
+
+class AcessoNegado(ErroDownload):
+    """O servidor recusou o acesso à URL ou devolveu uma página de login: a URL expirou"""
+
+
+def criar_sessao(tentativas=3, tamanho_pool=4):
+    """
+    Cria uma sessão HTTP com pool de conexões e novas tentativas com backoff
+
+    Args:
+        tentativas (int): Número de novas tentativas em erros de conexão e 5xx
+        tamanho_pool (int): Conexões mantidas abertas por host
+
+    Returns:
+        requests.Session: Sessão pronta para uso
+    """
+    retry = Retry(
+        total=tentativas,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+    )
+    adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=retry)
+    sessao = requests.Session()
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    sessao.headers["User-Agent"] = "Mozilla/5.0 (X11; Linux x86_64) srag-project"
+    return sessao
+
+
+def calcular_sha256(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos"""
+    sha256 = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+class CacheDownloads:
+    """
+    Validadores dos arquivos baixados de cada fonte, persistidos em JSON
+
+    Pode ser compartilhado entre threads (ex.: vários navegadores baixando ao mesmo tempo).
+    """
+
+    def __init__(self, caminho):
+        """
+        Carrega o cache do disco
+
+        Args:
+            caminho (str): Arquivo JSON do cache
+        """
+        self.caminho = caminho
+        self.fontes = {}
+        self._trava = threading.RLock()
+
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, encoding="utf-8") as f:
+                    self.fontes = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Aviso: cache de downloads ilegível, será recriado: {e}")
+
+    def obter(self, fonte):
+        """Retorna os validadores registrados para a fonte (ou um dicionário vazio)"""
+        return self.fontes.get(fonte, {})
+
+    def arquivo_atual(self, fonte):
+        """Retorna o último arquivo registrado para a fonte, se ainda existir em disco"""
+        arquivo = self.obter(fonte).get("arquivo")
+        return arquivo if arquivo and os.path.exists(arquivo) else None
+
+    def registrar(self, fonte, arquivo, etag=None, last_modified=None):
+        """
+        Registra um arquivo baixado e informa se o conteúdo mudou
+
+        Args:
+            fonte (str): Identificador da fonte (ex.: 'srag_microdados')
+            arquivo (str): Caminho do arquivo baixado
+            etag (str, optional): Cabeçalho ETag da resposta
+            last_modified (str, optional): Cabeçalho Last-Modified da resposta
+
+        Returns:
+            bool: True se o conteúdo é diferente do último registrado para a fonte
+        """
+        sha256 = calcular_sha256(arquivo)
+        with self._trava:
+            anterior = self.obter(fonte)
+            self.fontes[fonte] = {
+                "arquivo": arquivo,
+                "sha256": sha256,
+                "tamanho": os.path.getsize(arquivo),
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+            self.salvar()
+        return sha256 != anterior.get("sha256")
+
+    def registrar_download(self, fonte, arquivo):
+        """
+        Registra um arquivo baixado pelo navegador, descartando cópias idênticas
+
+        Se o conteúdo for igual ao do último arquivo da fonte, o arquivo novo é
+        removido e o anterior continua valendo.
+
+        Returns:
+            tuple: (caminho do arquivo vigente, True se o conteúdo mudou)
+        """
+        atual = self.arquivo_atual(fonte)
+        if (
+            atual
+            and os.path.abspath(atual) != os.path.abspath(arquivo)
+            and calcular_sha256(arquivo) == self.obter(fonte).get("sha256")
+        ):
+            os.remove(arquivo)
+            return atual, False
+        return arquivo, self.registrar(fonte, arquivo)
+
+    def salvar(self):
+        """Grava o cache de forma atômica"""
+        with self._trava:
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.fontes, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+
+
+def baixar_arquivo(url, destino, sessao=None, tamanho_bloco=TAMANHO_BLOCO, timeout=TIMEOUT_HTTP):
+    """
+    Baixa um arquivo em blocos, retomando um download parcial se existir
+
+    O conteúdo é gravado em '<destino>.part' e renomeado para o destino só
+    quando o download termina, então o destino nunca fica incompleto.
+
+    Args:
+        url (str): URL do arquivo
+        destino (str): Caminho final do arquivo
+        sessao (requests.Session, optional): Sessão a reutilizar. Se None, cria uma nova
+        tamanho_bloco (int): Tamanho dos blocos gravados em disco
+        timeout (tuple): Tempos máximos de conexão e de leitura
+
+    Returns:
+        str: Caminho do arquivo baixado
+
+    Raises:
+        ErroDownload: Se o servidor recusar a requisição ou não devolver um arquivo
+        AcessoNegado: Se a URL expirou ou exige login (401, 403, 410 ou página HTML)
+    """
+    caminho, _ = _baixar(url, destino, sessao or criar_sessao(), {}, tamanho_bloco, timeout)
+    return caminho
+
+
+def baixar_se_alterado(url, destino, cache, fonte, sessao=None,
+                       tamanho_bloco=TAMANHO_BLOCO, timeout=TIMEOUT_HTTP):
+    """
+    Baixa um arquivo só se ele mudou desde o último download da fonte
+
+    Envia If-None-Match/If-Modified-Since com os validadores em cache; uma
+    resposta 304 encerra sem transferir nada. Servidores que não suportam
+    requisições condicionais têm o conteúdo comparado pelo SHA-256.
+
+    Args:
+        url (str): URL do arquivo
+        destino (str): Caminho final do arquivo
+        cache (CacheDownloads): Cache de validadores
+        fonte (str): Identificador da fonte no cache
+        sessao (requests.Session, optional): Sessão a reutilizar. Se None, cria uma nova
+
+    Returns:
+        tuple: (caminho do arquivo, True se o conteúdo mudou)
+
+    Raises:
+        ErroDownload: Se o servidor recusar a requisição ou não devolver um arquivo
+        AcessoNegado: Se a URL expirou ou exige login (401, 403, 410 ou página HTML)
+    """
+    anterior = cache.obter(fonte)
+    condicionais = {}
+    # Sem o arquivo anterior em disco não há o que reaproveitar
+    if cache.arquivo_atual(fonte) and not os.path.exists(destino + ".part"):
+        if anterior.get("etag"):
+            condicionais["If-None-Match"] = anterior["etag"]
+        if anterior.get("last_modified"):
+            condicionais["If-Modified-Since"] = anterior["last_modified"]
+
+    caminho, headers = _baixar(url, destino, sessao or criar_sessao(), condicionais, tamanho_bloco, timeout)
+    if caminho is None:
+        return cache.arquivo_atual(fonte), False
+
+    alterado = cache.registrar(fonte, caminho, headers.get("ETag"), headers.get("Last-Modified"))
+    return caminho, alterado
+
+
+def _validadores_resposta(headers):
+    """ETag e Last-Modified de uma resposta"""
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _ler_validadores_parcial(parcial):
+    """Validadores da resposta que originou o download parcial (ou um dicionário vazio)"""
+    try:
+        with open(parcial + ".json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_validadores_parcial(parcial, validadores):
+    """Grava ao lado do '.part' os validadores da resposta, para a retomada enviar If-Range"""
+    temporario = parcial + ".json.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(validadores, f)
+    os.replace(temporario, parcial + ".json")
+
+
+def _descartar_parcial(parcial):
+    """Remove o download parcial e seus validadores"""
+    for caminho in (parcial, parcial + ".json"):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def _if_range(validadores):
+    """Valor do If-Range: ETag forte ou, sem ela, Last-Modified (ou None)"""
+    etag = validadores.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return validadores.get("last_modified")
+
+
+def _baixar(url, destino, sessao, condicionais, tamanho_bloco, timeout):
+    """
+    Executa o download e retorna (caminho, cabeçalhos da resposta)
+
+    A retomada envia Range com If-Range, usando os validadores guardados em
+    '<destino>.part.json': se o arquivo mudou no servidor, a resposta é o
+    arquivo inteiro (200) e a parte local é descartada, sem misturar versões.
+    Uma parte sem validadores, ou um 206 com validadores diferentes, é
+    descartada e o download recomeça do zero.
+
+    O caminho é None quando o servidor responde 304 (não modificado).
+    """
+    parcial = destino + ".part"
+
+    for tentativa_range in (True, False):
+        ja_baixado = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+        validadores = _ler_validadores_parcial(parcial) if ja_baixado else {}
+        headers = dict(condicionais)
+        if tentativa_range and ja_baixado:
+            if_range = _if_range(validadores)
+            if if_range is None:
+                # Sem como saber se a parte local é da versão atual do arquivo
+                _descartar_parcial(parcial)
+                continue
+            headers["Range"] = f"bytes={ja_baixado}-"
+            headers["If-Range"] = if_range
+
+        try:
+            resposta = sessao.get(url, headers=headers, stream=True, timeout=timeout)
+        except requests.RequestException as e:
+            raise ErroDownload(f"Falha de conexão ao baixar {url}: {e}") from e
+
+        with resposta:
+            if resposta.status_code == 304:
+                return None, resposta.headers
+            if resposta.status_code == 416:
+                # Parte local inválida para o arquivo atual, recomeçar do zero
+                _descartar_parcial(parcial)
+                continue
+            if resposta.status_code in STATUS_ACESSO_NEGADO:
+                raise AcessoNegado(f"HTTP {resposta.status_code} ao baixar {url}")
+            if resposta.status_code not in (200, 206):
+                raise ErroDownload(f"HTTP {resposta.status_code} ao baixar {url}")
+
+            tipo = resposta.headers.get("Content-Type", "")
+            if tipo.startswith(TIPOS_NAO_ARQUIVO):
+                raise AcessoNegado(f"Resposta não é um arquivo ({tipo}) ao baixar {url}")
+
+            if resposta.status_code == 206:
+                recebidos = _validadores_resposta(resposta.headers)
+                if any(validadores.get(nome) != valor for nome, valor in recebidos.items() if valor):
+                    # Servidor ignorou o If-Range e devolveu parte de outra versão do arquivo
+                    _descartar_parcial(parcial)
+                    continue
+            else:
+                # 200 traz o arquivo inteiro: a parte anterior é substituída
+                _gravar_validadores_parcial(parcial, _validadores_resposta(resposta.headers))
+
+            # 206 continua a parte já baixada; 200 traz o arquivo inteiro
+            modo = "ab" if resposta.status_code == 206 else "wb"
+            try:
+                with open(parcial, modo) as f:
+                    for bloco in resposta.iter_content(chunk_size=tamanho_bloco):
+                        f.write(bloco)
+            except requests.RequestException as e:
+                # A parte gravada fica em disco para a próxima tentativa retomar
+                raise ErroDownload(f"Download interrompido: {e}") from e
+
+        os.replace(parcial, destino)
+        _descartar_parcial(parcial)
+        return destino, resposta.headers
+
+    raise ErroDownload(f"Servidor recusou a retomada do download de {url}")
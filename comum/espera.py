@@ -0,0 +1,203 @@
+"""
+Esperas baseadas em condições para os scrapers
+
+Substitui pausas fixas (time.sleep) por esperas que terminam assim que a
+condição é atendida, limitadas por um tempo máximo configurável.
+"""
+
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from comum.dom import buscar_por_texto
+
+# Tempo máximo padrão (em segundos) para elementos e páginas
+TIMEOUT_PADRAO = 30
+
+# Tempo máximo padrão (em segundos) para um download terminar
+TIMEOUT_DOWNLOAD = 300
+
+# Intervalo entre verificações das condições
+INTERVALO_POLLING = 0.2
+
+# Extensões de arquivos que o Chrome (e outros navegadores) usam durante o download.
+# '.tmp' fica de fora: os caches gravados na pasta de dados usam '.tmp' nas escritas atômicas
+EXTENSOES_PARCIAIS = ('.crdownload', '.part')
+
+
+def aguardar_condicao(driver, condicao, timeout=TIMEOUT_PADRAO):
+    """
+    Aguarda até que a condição retorne um valor verdadeiro
+
+    Args:
+        driver: Instância do WebDriver
+        condicao (callable): Função que recebe o driver e retorna o resultado
+        timeout (float): Tempo máximo de espera em segundos
+
+    Returns:
+        O resultado da condição, ou None se o tempo se esgotar
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=INTERVALO_POLLING).until(condicao)
+    except TimeoutException:
+        return None
+
+
+def aguardar_pagina_carregada(driver, timeout=TIMEOUT_PADRAO):
+    """Aguarda o document.readyState da página ficar 'complete'"""
+    return aguardar_condicao(
+        driver,
+        lambda d: d.execute_script("return document.readyState") == "complete",
+        timeout,
+    )
+
+
+def aguardar_elemento(driver, by, seletor, timeout=TIMEOUT_PADRAO):
+    """Aguarda um elemento estar presente no DOM e o retorna (ou None)"""
+    return aguardar_condicao(driver, EC.presence_of_element_located((by, seletor)), timeout)
+
+
+def aguardar_clicavel(driver, by, seletor, timeout=TIMEOUT_PADRAO):
+    """Aguarda um elemento estar visível e habilitado e o retorna (ou None)"""
+    return aguardar_condicao(driver, EC.element_to_be_clickable((by, seletor)), timeout)
+
+
+def aguardar_invisivel(driver, by, seletor, timeout=TIMEOUT_PADRAO):
+    """Aguarda os elementos do seletor saírem da tela (ex.: dropdown fechado)"""
+    return aguardar_condicao(driver, EC.invisibility_of_element_located((by, seletor)), timeout)
+
+
+def aguardar_opcao(driver, by, seletor, texto, timeout=TIMEOUT_PADRAO):
+    """
+    Aguarda as opções de um dropdown serem renderizadas e retorna a que tem o texto
+
+    Args:
+        driver: Instância do WebDriver
+        by: Estratégia de localização (By.CSS_SELECTOR, By.XPATH, ...)
+        seletor (str): Seletor das opções do dropdown
+        texto (str): Texto exato da opção procurada
+        timeout (float): Tempo máximo de espera em segundos
+
+    Returns:
+        O elemento da opção visível, ou None se não aparecer a tempo
+    """
+    # Cada verificação é um único execute_script, em vez de .text e
+    # is_displayed() para cada opção do dropdown
+    def opcao_visivel(d):
+        try:
+            return buscar_por_texto(d, by, seletor, texto) or False
+        except WebDriverException:
+            # Dropdown re-renderizado durante a verificação, tentar de novo
+            return False
+
+    return aguardar_condicao(driver, opcao_visivel, timeout)
+
+
+def aguardar_url(driver, trecho, timeout=TIMEOUT_PADRAO):
+    """Aguarda a URL atual conter o trecho informado"""
+    return aguardar_condicao(driver, EC.url_contains(trecho), timeout)
+
+
+def rolar_ate_fim(driver, timeout=TIMEOUT_PADRAO):
+    """
+    Rola até o fim da página até que a altura pare de crescer
+
+    Páginas com conteúdo carregado sob demanda crescem ao rolar; a rolagem
+    termina quando duas verificações seguidas encontram a mesma altura.
+
+    Returns:
+        bool: True se a altura estabilizou dentro do tempo limite
+    """
+    limite = time.monotonic() + timeout
+    altura_anterior = None
+    while time.monotonic() < limite:
+        altura = driver.execute_script(
+            "window.scrollTo(0, document.body.scrollHeight);"
+            "return document.body.scrollHeight;"
+        )
+        if altura == altura_anterior:
+            return True
+        altura_anterior = altura
+        time.sleep(INTERVALO_POLLING)
+    return False
+
+
+def listar_arquivos(pasta):
+    """Retorna o conjunto de nomes de arquivos de uma pasta"""
+    with os.scandir(pasta) as entradas:
+        return {entrada.name for entrada in entradas if entrada.is_file()}
+
+
+def download_em_andamento(pasta, arquivos_anteriores=frozenset()):
+    """
+    Verifica se há arquivos parciais de download na pasta
+
+    Args:
+        pasta (str): Pasta de download
+        arquivos_anteriores (set, optional): Arquivos existentes antes do download. Parciais
+            que já estavam lá (ex.: '.part' de um download HTTP a retomar ou '.crdownload'
+            de um navegador encerrado) não são deste download e são ignorados
+    """
+    return any(
+        nome.endswith(EXTENSOES_PARCIAIS) for nome in listar_arquivos(pasta) - arquivos_anteriores
+    )
+
+
+def novos_downloads(pasta, arquivos_anteriores, extensoes=None):
+    """
+    Lista os arquivos que apareceram na pasta desde o snapshot informado
+
+    Args:
+        pasta (str): Pasta de download
+        arquivos_anteriores (set): Arquivos existentes antes do download
+        extensoes (tuple, optional): Considerar apenas estas extensões
+
+    Returns:
+        list: Nomes dos novos arquivos completos (sem os parciais)
+    """
+    novos = listar_arquivos(pasta) - arquivos_anteriores
+    return sorted(
+        nome for nome in novos
+        if not nome.endswith(EXTENSOES_PARCIAIS)
+        and (extensoes is None or nome.lower().endswith(extensoes))
+    )
+
+
+def aguardar_download(pasta, arquivos_anteriores, extensoes=None, timeout=TIMEOUT_DOWNLOAD):
+    """
+    Aguarda um download terminar na pasta
+
+    O download só é considerado concluído quando um novo arquivo aparece, não
+    resta nenhum arquivo parcial (.crdownload) novo na pasta e o tamanho do
+    arquivo não muda entre duas verificações seguidas.
+
+    Args:
+        pasta (str): Pasta de download
+        arquivos_anteriores (set): Arquivos existentes antes do clique, ver listar_arquivos()
+        extensoes (tuple, optional): Considerar apenas estas extensões
+        timeout (float): Tempo máximo de espera em segundos
+
+    Returns:
+        str: Caminho do arquivo baixado, ou None se o download não terminar a tempo
+    """
+    limite = time.monotonic() + timeout
+    tamanho_anterior = None
+    while time.monotonic() < limite:
+        novos = novos_downloads(pasta, arquivos_anteriores, extensoes)
+        if novos and not download_em_andamento(pasta, arquivos_anteriores):
+            try:
+                caminho = max(
+                    (os.path.join(pasta, nome) for nome in novos), key=os.path.getmtime
+                )
+                tamanho = os.path.getsize(caminho)
+            except OSError:
+                # Arquivo renomeado entre a listagem e a leitura, verificar de novo
+                tamanho = None
+            if tamanho is not None and tamanho == tamanho_anterior:
+                return caminho
+            tamanho_anterior = tamanho
+        time.sleep(INTERVALO_POLLING)
+    return None
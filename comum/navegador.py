@@ -0,0 +1,139 @@
+"""
+Perfis do Chrome usados pelos scrapers
+
+O perfil 'completo' abre o Chrome visível e maximizado, carregando tudo o que
+as páginas pedem, como um usuário veria (útil para acompanhar e depurar uma
+coleta). O perfil 'enxuto', padrão, roda sem interface e com janela de
+tamanho fixo, desliga os serviços de fundo do Chrome (sincronização,
+atualização de componentes, tradução...) e bloqueia por regras de rede do
+DevTools imagens, mídia, fontes e hosts de terceiros (análise de tráfego,
+anúncios, redes sociais), que os scrapers não usam: as páginas ficam prontas
+antes e cada navegador consome menos CPU e memória.
+"""
+
+PERFIL_ENXUTO = "enxuto"
+PERFIL_COMPLETO = "completo"
+PERFIS = (PERFIL_ENXUTO, PERFIL_COMPLETO)
+
+# Janela fixa do perfil enxuto, do tamanho de uma tela Full HD para os
+# painéis terem o mesmo layout do Chrome maximizado
+TAMANHO_JANELA = (1920, 1080)
+
+ARGUMENTOS_ENXUTOS = (
+    "--headless=new",
+    "--force-device-scale-factor=1",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+)
+
+PREFERENCIAS_ENXUTAS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "credentials_enable_service": False,
+    "profile.password_manager_enabled": False,
+    "translate.enabled": False,
+}
+
+# Tipos de recurso bloqueados, pela extensão do endereço
+EXTENSOES_BLOQUEADAS = (
+    "png", "jpg", "jpeg", "gif", "webp", "ico", "bmp",
+    "mp4", "webm", "mp3", "ogg",
+    "woff", "woff2", "ttf", "otf", "eot",
+)
+
+# Hosts de terceiros sem papel na coleta
+HOSTS_BLOQUEADOS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "facebook.net",
+    "facebook.com",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "nr-data.net",
+    "youtube.com",
+    "ytimg.com",
+    "twitter.com",
+    "platform.twitter.com",
+)
+
+
+def padroes_bloqueados():
+    """Padrões de URL (com curinga *) para Network.setBlockedURLs"""
+    padroes = [f"*.{extensao}" for extensao in EXTENSOES_BLOQUEADAS]
+    padroes += [f"*.{extensao}?*" for extensao in EXTENSOES_BLOQUEADAS]
+    padroes += [f"*://{host}/*" for host in HOSTS_BLOQUEADOS]
+    padroes += [f"*://*.{host}/*" for host in HOSTS_BLOQUEADOS]
+    return padroes
+
+
+def configurar_perfil(chrome_options, perfil, prefs):
+    """
+    Aplica o perfil às opções do Chrome
+
+    Args:
+        chrome_options: Options do Chrome a configurar
+        perfil (str): 'enxuto' ou 'completo'
+        prefs (dict): Preferências próprias do scraper (ex.: pasta de download), que
+                      prevalecem sobre as do perfil
+
+    Returns:
+        As mesmas opções, configuradas
+    """
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil de navegador desconhecido: {perfil} (use {' ou '.join(PERFIS)})")
+
+    if perfil == PERFIL_COMPLETO:
+        chrome_options.add_argument("--start-maximized")  # Iniciar maximizado
+        chrome_options.add_experimental_option("prefs", prefs)
+        return chrome_options
+
+    largura, altura = TAMANHO_JANELA
+    chrome_options.add_argument(f"--window-size={largura},{altura}")
+    for argumento in ARGUMENTOS_ENXUTOS:
+        chrome_options.add_argument(argumento)
+    chrome_options.add_experimental_option("prefs", {**PREFERENCIAS_ENXUTAS, **prefs})
+    return chrome_options
+
+
+def aplicar_bloqueios(driver, perfil, pasta_download=None):
+    """
+    Ativa as regras de rede do perfil no navegador recém-aberto
+
+    No perfil enxuto, bloqueia os recursos pelo DevTools e libera os downloads
+    do Chrome sem interface na pasta informada. Um navegador que não aceita os
+    comandos do DevTools continua funcionando, apenas sem os bloqueios.
+
+    Args:
+        driver: Instância do WebDriver do Chrome
+        perfil (str): 'enxuto' ou 'completo'
+        pasta_download (str, optional): Pasta onde o Chrome grava os downloads
+    """
+    if perfil != PERFIL_ENXUTO:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes_bloqueados()})
+        if pasta_download:
+            driver.execute_cdp_cmd(
+                "Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": pasta_download}
+            )
+    except Exception as e:
+        print(f"Aviso: bloqueio de recursos não aplicado: {e}")
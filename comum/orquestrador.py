@@ -0,0 +1,270 @@
+"""
+Orquestrador do pipeline scraping → processamento → armazenamento
+
+As etapas formam um grafo de dependências. Etapas independentes rodam em
+paralelo, cada uma em seu próprio processo com tempo limite, e uma etapa
+começa assim que todas as suas dependências terminam.
+
+Cada etapa roda em seu próprio grupo de processos. Ao passar do tempo limite,
+ela recebe SIGTERM, que vira SystemExit para os blocos finally (ex.: o
+fechar_driver dos scrapers) rodarem; o que restar do grupo, como um Chrome ou
+chromedriver que não fechou, é encerrado com SIGKILL.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+
+# Situações possíveis de uma etapa ao final da execução
+OK = "ok"
+SEM_ALTERACOES = "sem alterações"
+ERRO = "erro"
+TIMEOUT = "timeout"
+IGNORADA = "ignorada"
+
+# Segundos para uma etapa interrompida fechar seus recursos antes de o grupo ser morto
+ESPERA_ENCERRAMENTO = 15
+
+
+class Etapa:
+    """Uma etapa do pipeline e suas dependências"""
+
+    def __init__(self, nome, funcao, dependencias=(), timeout=None, argumentos=(), qualquer_dependencia=False):
+        """
+        Define uma etapa
+
+        Args:
+            nome (str): Nome único da etapa
+            funcao (callable): Função de nível de módulo executada em um processo separado.
+                               Retornar False indica que não há dados novos, e as etapas
+                               dependentes são ignoradas
+            dependencias (iterable, optional): Nomes das etapas que precisam terminar antes
+            timeout (float, optional): Tempo máximo em segundos. Se None, sem limite
+            argumentos (tuple, optional): Argumentos posicionais passados à função
+            qualquer_dependencia (bool): Se True, a etapa roda quando ao menos uma das
+                                         dependências terminou com dados novos, em vez
+                                         de exigir todas
+        """
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.timeout = timeout
+        self.argumentos = tuple(argumentos)
+        self.qualquer_dependencia = qualquer_dependencia
+
+        # Preenchidos durante a execução
+        self.situacao = None
+        self.resultado = None
+        self.detalhe = ""
+        self.inicio = None
+        self.fim = None
+
+    @property
+    def duracao(self):
+        """Duração da etapa em segundos (None se não executou)"""
+        if self.inicio is None or self.fim is None:
+            return None
+        return self.fim - self.inicio
+
+
+def _interromper_etapa(sinal, quadro):
+    """Converte o SIGTERM do tempo limite em SystemExit no processo da etapa"""
+    raise SystemExit(f"interrompida pelo sinal {sinal}")
+
+
+def _executar_etapa(funcao, argumentos, conexao):
+    """Executa a função da etapa no processo filho e envia o resultado ao pai"""
+    if hasattr(os, "setpgrp"):
+        # Navegador e driver iniciados pela etapa herdam o grupo e são encerrados com ela
+        os.setpgrp()
+    signal.signal(signal.SIGTERM, _interromper_etapa)
+    try:
+        conexao.send((OK, funcao(*argumentos)))
+    except Exception as e:
+        conexao.send((ERRO, f"{type(e).__name__}: {e}"))
+    finally:
+        conexao.close()
+
+
+def _encerrar(processo):
+    """
+    Encerra o processo de uma etapa e os processos que ela iniciou
+
+    O processo recebe SIGTERM e tem ESPERA_ENCERRAMENTO segundos para terminar;
+    depois, todo o seu grupo recebe SIGKILL. Sem grupos de processos (Windows),
+    só o próprio processo é encerrado.
+    """
+    processo.terminate()
+    processo.join(ESPERA_ENCERRAMENTO)
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(processo.pid, signal.SIGKILL)
+        except OSError:
+            # Grupo já vazio, ou o processo não chegou a criá-lo
+            pass
+    elif processo.is_alive():
+        processo.kill()
+    processo.join()
+
+
+class Orquestrador:
+    """Executa as etapas respeitando as dependências, com paralelismo entre ramos independentes"""
+
+    def __init__(self, etapas, max_paralelo=None):
+        """
+        Prepara a execução
+
+        Args:
+            etapas (list): Lista de Etapa
+            max_paralelo (int, optional): Máximo de etapas simultâneas. Se None, sem limite
+        """
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.max_paralelo = max_paralelo
+        self.inicio = None
+        self.fim = None
+
+        for etapa in etapas:
+            for dependencia in etapa.dependencias:
+                if dependencia not in self.etapas:
+                    raise ValueError(f"Etapa '{etapa.nome}' depende de '{dependencia}', que não existe")
+        self._verificar_ciclos()
+
+    def _verificar_ciclos(self):
+        """Garante que o grafo de dependências não tem ciclos"""
+        visitando, visitadas = set(), set()
+
+        def visitar(nome):
+            if nome in visitadas:
+                return
+            if nome in visitando:
+                raise ValueError(f"Ciclo de dependências envolvendo a etapa '{nome}'")
+            visitando.add(nome)
+            for dependencia in self.etapas[nome].dependencias:
+                visitar(dependencia)
+            visitando.discard(nome)
+            visitadas.add(nome)
+
+        for nome in self.etapas:
+            visitar(nome)
+
+    def _motivo_para_ignorar(self, etapa):
+        """Retorna por que a etapa não deve rodar, ou None se ela pode rodar"""
+        motivos = []
+        for dependencia in etapa.dependencias:
+            anterior = self.etapas[dependencia]
+            if anterior.situacao == OK:
+                if etapa.qualquer_dependencia:
+                    return None
+                continue
+            if anterior.situacao == SEM_ALTERACOES:
+                motivo = f"'{dependencia}' sem dados novos"
+            else:
+                motivo = f"'{dependencia}' terminou com {anterior.situacao}"
+            if not etapa.qualquer_dependencia:
+                return motivo
+            motivos.append(motivo)
+        return ", ".join(motivos) or None
+
+    def _pronta(self, etapa):
+        """Verifica se todas as dependências da etapa já terminaram"""
+        return all(self.etapas[d].situacao is not None for d in etapa.dependencias)
+
+    def executar(self):
+        """
+        Executa o pipeline até todas as etapas terminarem
+
+        Returns:
+            dict: Etapas por nome, com situação, resultado e tempos preenchidos
+        """
+        self.inicio = time.monotonic()
+        pendentes = list(self.etapas.values())
+        em_execucao = {}  # conexão -> (etapa, processo)
+
+        while pendentes or em_execucao:
+            # Iniciar (ou ignorar) as etapas cujas dependências terminaram
+            for etapa in [e for e in pendentes if self._pronta(e)]:
+                motivo = self._motivo_para_ignorar(etapa)
+                if motivo:
+                    pendentes.remove(etapa)
+                    etapa.situacao, etapa.detalhe = IGNORADA, motivo
+                    print(f"[{etapa.nome}] ignorada: {motivo}")
+                    continue
+                if self.max_paralelo and len(em_execucao) >= self.max_paralelo:
+                    break
+                pendentes.remove(etapa)
+                em_execucao.update(self._iniciar(etapa))
+
+            if not em_execucao:
+                continue
+
+            # Aguardar o próximo resultado ou o próximo tempo limite
+            agora = time.monotonic()
+            prazos = [
+                etapa.inicio + etapa.timeout - agora
+                for etapa, _ in em_execucao.values() if etapa.timeout
+            ]
+            espera = max(0, min(prazos)) if prazos else None
+            for conexao in wait(list(em_execucao), timeout=espera):
+                etapa, processo = em_execucao.pop(conexao)
+                self._concluir(etapa, processo, conexao)
+
+            # Encerrar as etapas que passaram do tempo limite
+            agora = time.monotonic()
+            for conexao, (etapa, processo) in list(em_execucao.items()):
+                if etapa.timeout and agora - etapa.inicio >= etapa.timeout:
+                    del em_execucao[conexao]
+                    _encerrar(processo)
+                    conexao.close()
+                    etapa.fim = agora
+                    etapa.situacao, etapa.detalhe = TIMEOUT, f"excedeu {etapa.timeout}s"
+                    print(f"[{etapa.nome}] interrompida: excedeu {etapa.timeout}s")
+
+        self.fim = time.monotonic()
+        return self.etapas
+
+    def _iniciar(self, etapa):
+        """Inicia a etapa em um processo filho"""
+        print(f"[{etapa.nome}] iniciando...")
+        receptor, emissor = multiprocessing.Pipe(duplex=False)
+        processo = multiprocessing.Process(
+            target=_executar_etapa,
+            args=(etapa.funcao, etapa.argumentos, emissor),
+            name=etapa.nome,
+        )
+        etapa.inicio = time.monotonic()
+        processo.start()
+        emissor.close()
+        return {receptor: (etapa, processo)}
+
+    def _concluir(self, etapa, processo, conexao):
+        """Registra o resultado enviado pelo processo da etapa"""
+        try:
+            situacao, valor = conexao.recv()
+        except EOFError:
+            # Processo terminou sem enviar resultado (ex.: encerrado pelo sistema)
+            situacao, valor = ERRO, "processo terminou sem resultado"
+        conexao.close()
+        processo.join()
+        etapa.fim = time.monotonic()
+
+        if situacao == OK:
+            etapa.resultado = valor
+            etapa.situacao = SEM_ALTERACOES if valor is False else OK
+        else:
+            etapa.situacao, etapa.detalhe = ERRO, valor
+        print(f"[{etapa.nome}] {etapa.situacao} em {etapa.duracao:.1f}s")
+
+    def imprimir_resumo(self):
+        """Imprime a situação e os tempos de cada etapa"""
+        print("\nResumo do pipeline:")
+        print(f"{'Etapa':<25} {'Situação':<16} {'Início':>8} {'Duração':>9}")
+        for etapa in sorted(self.etapas.values(), key=lambda e: (e.inicio is None, e.inicio or 0)):
+            inicio = f"{etapa.inicio - self.inicio:7.1f}s" if etapa.inicio is not None else "-"
+            duracao = f"{etapa.duracao:8.1f}s" if etapa.duracao is not None else "-"
+            print(f"{etapa.nome:<25} {etapa.situacao or '-':<16} {inicio:>8} {duracao:>9}")
+            if etapa.detalhe:
+                print(f"    {etapa.detalhe}")
+        if self.inicio is not None and self.fim is not None:
+            print(f"Tempo total: {self.fim - self.inicio:.1f}s")
@@ -0,0 +1,323 @@
+"""
+Spans de tempo por etapa e contadores de cada execução
+
+Cada execução (de um scraper ou do processamento dos PDFs) tem um Rastreador:
+as etapas ficam registradas como spans, com início, duração, span pai e
+atributos, e os volumes (linhas, páginas, bytes) como contadores. Ao final a
+execução é exportada em dois arquivos na pasta de métricas:
+
+    <servico>_<AAAAMMDD_HHMMSS>.trace.json   todos os spans e contadores da execução
+    <servico>.prom                           métricas no formato texto do Prometheus
+
+O arquivo .prom tem nome fixo e é substituído a cada execução, como espera o
+coletor textfile do node_exporter; os traces ficam um por execução, para
+comparar execuções e achar onde o tempo foi gasto. Os contadores do .prom
+(*_total e o summary das etapas) são acumulados entre as execuções, em
+<servico>.totais.json, para nunca diminuírem como o Prometheus espera; só o
+início e a duração se referem à última execução.
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_METRICAS = os.path.join(RAIZ_PROJETO, "dados", "metricas")
+
+# Prefixo dos nomes das métricas exportadas
+PREFIXO_METRICAS = "srag_projeto"
+
+
+def _escapar_rotulo(valor):
+    """Escapa o valor de um rótulo no formato texto do Prometheus"""
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(rotulos):
+    """Formata {'a': 1} como '{a="1"}'"""
+    if not rotulos:
+        return ""
+    pares = ",".join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in sorted(rotulos.items()))
+    return "{" + pares + "}"
+
+
+def _gravar_atomico(caminho, conteudo):
+    """Grava o arquivo de uma vez, para o coletor nunca ler um arquivo pela metade"""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def _ler_totais(caminho):
+    """Totais acumulados das execuções anteriores (vazio se o arquivo não existe ou está corrompido)"""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class Rastreador:
+    """Spans e contadores de uma execução, compartilháveis entre threads"""
+
+    def __init__(self, servico, pasta=PASTA_METRICAS):
+        """
+        Args:
+            servico (str): Nome da execução nas métricas (ex.: 'srag_scraper')
+            pasta (str): Pasta onde o trace e as métricas são exportados
+        """
+        self.servico = servico
+        self.pasta = pasta
+        # Com microssegundos, execuções iniciadas no mesmo segundo não sobrescrevem o
+        # trace uma da outra nem se confundem no índice do acervo
+        self.execucao = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.iniciado_em = time.time()
+        self.spans = []
+        self.contadores = {}  # (nome, rótulos ordenados) -> valor
+        self._ids = itertools.count(1)
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    def _pilha(self):
+        """Spans abertos na thread atual, para encadear os spans filhos"""
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def span(self, nome, **atributos):
+        """
+        Mede o bloco como um span filho do span aberto na mesma thread
+
+        Os atributos podem ser completados dentro do bloco:
+
+            with rastreador.span("download", url=url) as atributos:
+                atributos["bytes"] = tamanho
+
+        Uma exceção marca o span com status 'erro' e é relançada.
+        """
+        pilha = self._pilha()
+        registro = {
+            "id": next(self._ids),
+            "pai": pilha[-1]["id"] if pilha else None,
+            "nome": nome,
+            "inicio": time.time(),
+            "duracao_s": None,
+            "thread": threading.current_thread().name,
+            "status": "ok",
+            "atributos": atributos,
+        }
+        pilha.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield atributos
+        except BaseException as e:
+            registro["status"] = "erro"
+            registro["erro"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro["duracao_s"] = time.perf_counter() - inicio
+            pilha.pop()
+            with self._trava:
+                self.spans.append(registro)
+
+    def registrar_span(self, nome, inicio, duracao_s, **atributos):
+        """
+        Registra um span medido fora deste processo (ex.: página lida por um worker)
+
+        O span fica como filho do span aberto na thread atual.
+        """
+        pilha = self._pilha()
+        with self._trava:
+            self.spans.append({
+                "id": next(self._ids),
+                "pai": pilha[-1]["id"] if pilha else None,
+                "nome": nome,
+                "inicio": inicio,
+                "duracao_s": duracao_s,
+                "thread": threading.current_thread().name,
+                "status": "ok",
+                "atributos": atributos,
+            })
+
+    def contar(self, nome, valor=1, **rotulos):
+        """Soma valor ao contador (ex.: contar('linhas', 120, pdf='boletim.pdf'))"""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def resumo_etapas(self):
+        """
+        Tempo total por nome de span
+
+        Returns:
+            dict: nome -> {'chamadas', 'total_s', 'max_s', 'erros'}
+        """
+        resumo = {}
+        with self._trava:
+            spans = list(self.spans)
+        for span in spans:
+            etapa = resumo.setdefault(span["nome"], {"chamadas": 0, "total_s": 0.0, "max_s": 0.0, "erros": 0})
+            etapa["chamadas"] += 1
+            etapa["total_s"] += span["duracao_s"]
+            etapa["max_s"] = max(etapa["max_s"], span["duracao_s"])
+            if span["status"] == "erro":
+                etapa["erros"] += 1
+        return resumo
+
+    def trace(self):
+        """Spans (na ordem de início) e contadores da execução, serializáveis em JSON"""
+        with self._trava:
+            spans = sorted(self.spans, key=lambda span: (span["inicio"], span["id"]))
+            contadores = [
+                {"nome": nome, "rotulos": dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(self.contadores.items())
+            ]
+        return {
+            "servico": self.servico,
+            "execucao": self.execucao,
+            "iniciado_em": datetime.fromtimestamp(self.iniciado_em).isoformat(timespec="seconds"),
+            "duracao_s": time.time() - self.iniciado_em,
+            "spans": spans,
+            "contadores": contadores,
+        }
+
+    def totais(self, anteriores=None):
+        """
+        Etapas e contadores desta execução somados aos totais das anteriores
+
+        Args:
+            anteriores (dict, optional): Totais das execuções anteriores, como retornados por este método
+
+        Returns:
+            dict: {'etapas': {nome: {'chamadas', 'total_s', 'erros'}},
+                   'contadores': [{'nome', 'rotulos', 'valor'}]}
+        """
+        anteriores = anteriores or {}
+        etapas = {nome: dict(dados) for nome, dados in anteriores.get("etapas", {}).items()}
+        for nome, dados in self.resumo_etapas().items():
+            total = etapas.setdefault(nome, {"chamadas": 0, "total_s": 0.0, "erros": 0})
+            for campo in ("chamadas", "total_s", "erros"):
+                total[campo] += dados[campo]
+
+        def chave(nome, rotulos):
+            return nome, tuple(sorted((rotulo, str(valor)) for rotulo, valor in rotulos))
+
+        contadores = {
+            chave(item["nome"], item["rotulos"].items()): item["valor"]
+            for item in anteriores.get("contadores", [])
+        }
+        with self._trava:
+            atuais = list(self.contadores.items())
+        for (nome, rotulos), valor in atuais:
+            serie = chave(nome, rotulos)
+            contadores[serie] = contadores.get(serie, 0) + valor
+        return {
+            "etapas": etapas,
+            "contadores": [
+                {"nome": nome, "rotulos": dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(contadores.items())
+            ],
+        }
+
+    def metricas_prometheus(self, totais=None):
+        """
+        Métricas no formato texto do Prometheus
+
+        Args:
+            totais (dict, optional): Totais acumulados (ver totais()). Se None, só os desta execução
+        """
+        totais = totais or self.totais()
+        servico = {"servico": self.servico}
+        linhas = [
+            f"# HELP {PREFIXO_METRICAS}_execucao_inicio_segundos Início da última execução (epoch)",
+            f"# TYPE {PREFIXO_METRICAS}_execucao_inicio_segundos gauge",
+            f"{PREFIXO_METRICAS}_execucao_inicio_segundos{_formatar_rotulos(servico)} {self.iniciado_em:.3f}",
+            f"# HELP {PREFIXO_METRICAS}_execucao_duracao_segundos Duração da última execução",
+            f"# TYPE {PREFIXO_METRICAS}_execucao_duracao_segundos gauge",
+            f"{PREFIXO_METRICAS}_execucao_duracao_segundos{_formatar_rotulos(servico)} "
+            f"{time.time() - self.iniciado_em:.6f}",
+        ]
+
+        resumo = totais["etapas"]
+        if resumo:
+            nome = f"{PREFIXO_METRICAS}_etapa_duracao_segundos"
+            linhas += [f"# HELP {nome} Tempo gasto em cada etapa", f"# TYPE {nome} summary"]
+            for etapa, dados in sorted(resumo.items()):
+                rotulos = _formatar_rotulos({**servico, "etapa": etapa})
+                linhas.append(f"{nome}_sum{rotulos} {dados['total_s']:.6f}")
+                linhas.append(f"{nome}_count{rotulos} {dados['chamadas']}")
+            nome = f"{PREFIXO_METRICAS}_etapa_erros_total"
+            linhas += [f"# HELP {nome} Etapas encerradas por exceção", f"# TYPE {nome} counter"]
+            for etapa, dados in sorted(resumo.items()):
+                linhas.append(f"{nome}{_formatar_rotulos({**servico, 'etapa': etapa})} {dados['erros']}")
+
+        declarados = set()
+        for contador in totais["contadores"]:
+            nome = f"{PREFIXO_METRICAS}_{contador['nome']}_total"
+            if nome not in declarados:
+                linhas.append(f"# TYPE {nome} counter")
+                declarados.add(nome)
+            linhas.append(f"{nome}{_formatar_rotulos({**servico, **contador['rotulos']})} {contador['valor']}")
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self):
+        """
+        Grava o trace JSON da execução e substitui o arquivo .prom do serviço
+
+        Os contadores do .prom somam os desta execução aos totais acumulados
+        em '<servico>.totais.json', que também é atualizado.
+
+        Returns:
+            tuple: (caminho do trace, caminho das métricas), ou (None, None) se falhar
+        """
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            caminho_trace = os.path.join(self.pasta, f"{self.servico}_{self.execucao}.trace.json")
+            caminho_metricas = os.path.join(self.pasta, f"{self.servico}.prom")
+            caminho_totais = os.path.join(self.pasta, f"{self.servico}.totais.json")
+            _gravar_atomico(caminho_trace, json.dumps(self.trace(), ensure_ascii=False, indent=2))
+            totais = self.totais(_ler_totais(caminho_totais))
+            _gravar_atomico(caminho_totais, json.dumps(totais, ensure_ascii=False, indent=2))
+            _gravar_atomico(caminho_metricas, self.metricas_prometheus(totais))
+        except Exception as e:
+            print(f"Aviso: métricas da execução não foram exportadas: {e}")
+            return None, None
+        print(f"Trace da execução salvo em: {caminho_trace}")
+        return caminho_trace, caminho_metricas
+
+    def imprimir_resumo(self, limite=10):
+        """Imprime as etapas que mais consumiram tempo"""
+        resumo = sorted(self.resumo_etapas().items(), key=lambda item: item[1]["total_s"], reverse=True)
+        if not resumo:
+            return
+        print(f"\nEtapas mais demoradas ({self.servico}):")
+        for etapa, dados in resumo[:limite]:
+            print(f"  {etapa:<30} {dados['total_s']:8.2f}s em {dados['chamadas']} chamada(s)")
+
+
+def resultado_execucao(dados_alterados):
+    """Rótulo do retorno de executar_scraping nas métricas"""
+    if dados_alterados is None:
+        return "falha"
+    return "dados_novos" if dados_alterados else "sem_alteracoes"
+
+
+def medir_etapa(metodo):
+    """
+    Registra cada chamada do método como um span do rastreador da instância
+
+    A instância precisa do atributo 'rastreador'; o span leva o nome do método.
+    """
+    @functools.wraps(metodo)
+    def medido(self, *args, **kwargs):
+        with self.rastreador.span(metodo.__name__):
+            return metodo(self, *args, **kwargs)
+
+    return medido
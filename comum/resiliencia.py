@@ -0,0 +1,227 @@
+"""
+Etapas dos scrapers com novas tentativas, checkpoint e disjuntor
+
+Cada etapa de um scraper é executada por executar_etapa: uma falha (exceção
+ou retorno falso) é tentada de novo depois de uma espera exponencial com
+jitter, sem refazer as etapas anteriores. As etapas concluídas ficam em um
+checkpoint em disco, e uma execução que falhou retoma da última etapa
+concluída. O disjuntor de cada fonte abre depois de várias falhas seguidas e
+impede novas tentativas até o fim do intervalo de espera, mesmo entre
+execuções diferentes.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+# Tentativas por etapa e espera antes de cada nova tentativa (em segundos)
+TENTATIVAS_PADRAO = 3
+ESPERA_BASE = 2
+ESPERA_MAXIMA = 60
+
+# Falhas seguidas que abrem o disjuntor e tempo (em segundos) até a próxima tentativa
+LIMIAR_FALHAS = 5
+TEMPO_ABERTO = 15 * 60
+
+# Checkpoints mais antigos que isso (em segundos) são descartados: os dados podem ter mudado
+VALIDADE_CHECKPOINT = 6 * 60 * 60
+
+
+class CircuitoAberto(Exception):
+    """A fonte falhou seguidamente e está em intervalo de espera"""
+
+
+class FalhaEtapa(Exception):
+    """Uma etapa esgotou as tentativas"""
+
+
+def calcular_espera(tentativa, espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA):
+    """
+    Espera antes da nova tentativa, com backoff exponencial e jitter completo
+
+    Sorteada entre 0 e min(espera_maxima, espera_base * 2^(tentativa - 1)),
+    para que vários scrapers não voltem a acessar a fonte ao mesmo tempo.
+
+    Args:
+        tentativa (int): Número da tentativa que falhou, a partir de 1
+    """
+    return random.uniform(0, min(espera_maxima, espera_base * 2 ** (tentativa - 1)))
+
+
+class _ArquivoJson:
+    """Estado persistido em JSON, compartilhável entre threads"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.estado = {}
+        self._trava = threading.RLock()
+
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, encoding="utf-8") as f:
+                    self.estado = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Aviso: '{self.caminho}' ilegível, será recriado: {e}")
+
+    def salvar(self):
+        """Grava o estado de forma atômica"""
+        with self._trava:
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.estado, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+
+
+class Disjuntor(_ArquivoJson):
+    """
+    Disjuntor (circuit breaker) por fonte, persistido em JSON
+
+    Fechado, as chamadas passam normalmente. Depois de limiar_falhas falhas
+    seguidas, abre e recusa chamadas por tempo_aberto segundos; passado esse
+    tempo, uma chamada de teste é permitida: se der certo o disjuntor fecha,
+    se falhar abre de novo.
+    """
+
+    def __init__(self, caminho, limiar_falhas=LIMIAR_FALHAS, tempo_aberto=TEMPO_ABERTO):
+        """
+        Args:
+            caminho (str): Arquivo JSON com o estado das fontes
+            limiar_falhas (int): Falhas seguidas que abrem o disjuntor
+            tempo_aberto (float): Segundos em que o disjuntor fica aberto
+        """
+        super().__init__(caminho)
+        self.limiar_falhas = limiar_falhas
+        self.tempo_aberto = tempo_aberto
+
+    def verificar(self, fonte):
+        """Lança CircuitoAberto se a fonte estiver em intervalo de espera"""
+        aberto_ate = self.estado.get(fonte, {}).get("aberto_ate")
+        if aberto_ate and time.time() < aberto_ate:
+            horario = datetime.fromtimestamp(aberto_ate).strftime("%H:%M:%S")
+            raise CircuitoAberto(f"Fonte '{fonte}' indisponível, nova tentativa após {horario}")
+
+    def registrar_sucesso(self, fonte):
+        """Fecha o disjuntor da fonte"""
+        with self._trava:
+            if self.estado.pop(fonte, None):
+                self.salvar()
+
+    def registrar_falha(self, fonte):
+        """Conta uma falha e abre o disjuntor ao atingir o limiar"""
+        with self._trava:
+            situacao = self.estado.setdefault(fonte, {"falhas": 0, "aberto_ate": None})
+            situacao["falhas"] += 1
+            if situacao["falhas"] >= self.limiar_falhas:
+                situacao["aberto_ate"] = time.time() + self.tempo_aberto
+                print(f"Disjuntor da fonte '{fonte}' aberto por {self.tempo_aberto:.0f}s "
+                      f"após {situacao['falhas']} falhas seguidas")
+            self.salvar()
+
+
+class Checkpoint(_ArquivoJson):
+    """
+    Etapas concluídas de uma execução e os dados que elas produziram
+
+    Um checkpoint mais antigo que a validade é ignorado ao carregar.
+    """
+
+    def __init__(self, caminho, validade=VALIDADE_CHECKPOINT):
+        """
+        Args:
+            caminho (str): Arquivo JSON do checkpoint
+            validade (float): Idade máxima, em segundos, de um checkpoint retomado
+        """
+        super().__init__(caminho)
+        if time.time() - self.estado.get("iniciado_em", 0) > validade:
+            self.estado = {}
+        if self.estado.get("etapas"):
+            print(f"Retomando execução anterior, etapas já concluídas: {', '.join(self.estado['etapas'])}")
+        self.estado.setdefault("iniciado_em", time.time())
+        self.estado.setdefault("etapas", {})
+
+    def concluida(self, etapa):
+        """Retorna os dados da etapa concluída, ou None se ela ainda não foi concluída"""
+        return self.estado["etapas"].get(etapa)
+
+    def marcar(self, etapa, dados=True):
+        """Registra a etapa como concluída, com os dados necessários para retomar depois dela"""
+        with self._trava:
+            self.estado["etapas"][etapa] = dados
+            self.salvar()
+
+    def desmarcar(self, etapa):
+        """Volta a etapa para não concluída (ex.: o estado que ela produziu se perdeu)"""
+        with self._trava:
+            if self.estado["etapas"].pop(etapa, None) is not None:
+                self.salvar()
+
+    def limpar(self):
+        """Remove o checkpoint ao fim de uma execução completa"""
+        with self._trava:
+            self.estado = {"iniciado_em": time.time(), "etapas": {}}
+            if os.path.exists(self.caminho):
+                os.remove(self.caminho)
+
+
+def executar_etapa(nome, funcao, fonte, disjuntor=None, checkpoint=None,
+                   tentativas=TENTATIVAS_PADRAO, espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA):
+    """
+    Executa uma etapa com novas tentativas, respeitando o disjuntor e o checkpoint
+
+    Uma etapa já concluída no checkpoint não é executada de novo: o resultado
+    salvo é retornado. Exceções e retornos falsos (None, False, '') contam
+    como falha.
+
+    Args:
+        nome (str): Nome da etapa no checkpoint
+        funcao (callable): Função sem argumentos; o retorno (serializável em JSON) vai para o checkpoint
+        fonte (str): Fonte acessada pela etapa, para o disjuntor
+        disjuntor (Disjuntor, optional): Disjuntor das fontes
+        checkpoint (Checkpoint, optional): Checkpoint da execução
+        tentativas (int): Número máximo de tentativas
+        espera_base (float): Espera antes da segunda tentativa, em segundos
+        espera_maxima (float): Espera máxima entre tentativas, em segundos
+
+    Returns:
+        O retorno da função
+
+    Raises:
+        CircuitoAberto: O disjuntor da fonte está aberto
+        FalhaEtapa: Todas as tentativas falharam
+    """
+    if checkpoint is not None:
+        salvo = checkpoint.concluida(nome)
+        if salvo is not None:
+            print(f"Etapa '{nome}' já concluída, retomando a partir dela")
+            return salvo
+
+    erro = None
+    for tentativa in range(1, tentativas + 1):
+        if disjuntor is not None:
+            disjuntor.verificar(fonte)
+        try:
+            resultado = funcao()
+            erro = None if resultado else "etapa não foi concluída"
+        except CircuitoAberto:
+            raise
+        except Exception as e:
+            erro = e
+        if erro is None:
+            if disjuntor is not None:
+                disjuntor.registrar_sucesso(fonte)
+            if checkpoint is not None:
+                checkpoint.marcar(nome, resultado)
+            return resultado
+
+        if disjuntor is not None:
+            disjuntor.registrar_falha(fonte)
+        if tentativa < tentativas:
+            espera = calcular_espera(tentativa, espera_base, espera_maxima)
+            print(f"Etapa '{nome}' falhou ({erro}), tentativa {tentativa + 1}/{tentativas} em {espera:.1f}s")
+            time.sleep(espera)
+
+    raise FalhaEtapa(f"Etapa '{nome}' falhou após {tentativas} tentativas: {erro}")
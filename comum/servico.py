@@ -0,0 +1,366 @@
+"""
+Modo serviço: coletas periódicas com navegadores mantidos abertos
+
+O serviço mantém uma instância de cada scraper, com manter_driver=True, e
+executa as coletas a cada intervalo ou quando acionado. O Chrome de cada
+scraper é aberto uma vez e reaproveitado: entre as coletas fica parado em
+about:blank e, na coleta seguinte, apenas navega de novo até a página. O
+navegador é reciclado (fechado e aberto na próxima coleta) quando passa da
+idade ou da memória máximas, ou quando para de responder.
+
+Uma coleta pode ser pedida a qualquer momento por HTTP local
+(POST http://127.0.0.1:<porta>/atualizar), pelo sinal SIGUSR1 ou com
+acionar(); GET /estado retorna o estado do serviço em JSON.
+"""
+
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Intervalo padrão entre coletas, em segundos
+INTERVALO_PADRAO = 6 * 60 * 60
+
+# Limites para reciclar o navegador
+IDADE_MAXIMA_NAVEGADOR = 24 * 60 * 60
+MEMORIA_MAXIMA_NAVEGADOR_MB = 1500
+
+# Porta local para acionar coletas e consultar o estado
+PORTA_GATILHO = 8765
+
+PAGINA_OCIOSA = "about:blank"
+
+
+def _processos_descendentes(pid):
+    """PIDs do processo e de todos os seus descendentes, lidos de /proc (Linux)"""
+    filhos = {}
+    for nome in os.listdir("/proc"):
+        if not nome.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nome}/stat") as f:
+                # O nome do processo (2º campo) pode ter espaços: o pai vem depois do ')'
+                pai = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(pai, []).append(int(nome))
+
+    pids, pendentes = [], [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pids.append(atual)
+        pendentes.extend(filhos.get(atual, []))
+    return pids
+
+
+def memoria_navegador_mb(driver):
+    """
+    Memória residente do chromedriver e de todos os processos do Chrome, em MB
+
+    Usa o psutil se estiver instalado e, sem ele, o /proc do Linux.
+
+    Returns:
+        float: Memória em MB, ou None se não for possível medir nesta plataforma
+    """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    try:
+        if psutil is not None:
+            processo = psutil.Process(pid)
+            processos = [processo] + processo.children(recursive=True)
+            return sum(p.memory_info().rss for p in processos) / 1024 ** 2
+        if not os.path.isdir("/proc"):
+            return None
+        tamanho_pagina = os.sysconf("SC_PAGE_SIZE")
+        total = 0
+        for descendente in _processos_descendentes(pid):
+            try:
+                with open(f"/proc/{descendente}/statm") as f:
+                    total += int(f.read().split()[1]) * tamanho_pagina
+            except (OSError, IndexError, ValueError):
+                continue
+        return total / 1024 ** 2
+    except Exception:
+        return None
+
+
+def cpu_navegador_s(driver):
+    """
+    Tempo de CPU (usuário + sistema) do chromedriver e dos processos do Chrome abertos, em segundos
+
+    Returns:
+        float: Tempo de CPU, ou None se não for possível medir nesta plataforma
+    """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    try:
+        if psutil is not None:
+            processo = psutil.Process(pid)
+            processos = [processo] + processo.children(recursive=True)
+            return sum(sum(p.cpu_times()[:2]) for p in processos)
+        if not os.path.isdir("/proc"):
+            return None
+        ticks = os.sysconf("SC_CLK_TCK")
+        total = 0
+        for descendente in _processos_descendentes(pid):
+            try:
+                with open(f"/proc/{descendente}/stat") as f:
+                    campos = f.read().rsplit(")", 1)[1].split()
+                # utime e stime são os campos 14 e 15 do stat (11 e 12 depois do nome)
+                total += int(campos[11]) + int(campos[12])
+            except (OSError, IndexError, ValueError):
+                continue
+        return total / ticks
+    except Exception:
+        return None
+
+
+def navegador_responde(driver):
+    """Verifica se o navegador ainda responde a comandos"""
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+def acionar(porta=PORTA_GATILHO, timeout=10):
+    """
+    Pede uma coleta imediata ao serviço em execução
+
+    Returns:
+        bool: True se o serviço recebeu o pedido
+    """
+    # Requisição escrita direto no socket: urllib e http.client levam dezenas de ms para
+    # importar, e este é o caminho do comando 'acionar'
+    try:
+        with socket.create_connection(("127.0.0.1", porta), timeout=timeout) as conexao:
+            conexao.sendall(b"POST /atualizar HTTP/1.0\r\nContent-Length: 0\r\n\r\n")
+            status = conexao.recv(1024).split(b"\r\n", 1)[0].split()
+    except OSError as e:
+        print(f"Serviço não respondeu na porta {porta}: {e}")
+        return False
+    return len(status) >= 2 and status[1] == b"202"
+
+
+class ServicoColeta:
+    """Executa os scrapers periodicamente, reaproveitando os navegadores entre as coletas"""
+
+    def __init__(self, scrapers, intervalo=INTERVALO_PADRAO, idade_maxima=IDADE_MAXIMA_NAVEGADOR,
+                 memoria_maxima_mb=MEMORIA_MAXIMA_NAVEGADOR_MB, porta=PORTA_GATILHO, ao_concluir=None):
+        """
+        Prepara o serviço
+
+        Args:
+            scrapers (dict): Scrapers por nome; cada um precisa de executar_scraping(),
+                             fechar_driver(), driver e driver_iniciado_em
+            intervalo (float): Segundos entre o fim de uma coleta e o início da seguinte
+            idade_maxima (float): Idade, em segundos, a partir da qual o navegador é reciclado
+            memoria_maxima_mb (float): Memória, em MB, a partir da qual o navegador é reciclado
+            porta (int, optional): Porta local do gatilho HTTP. Se None, sem gatilho HTTP
+            ao_concluir (callable, optional): Chamada com {nome: resultado} após cada coleta
+        """
+        self.scrapers = scrapers
+        self.intervalo = intervalo
+        self.idade_maxima = idade_maxima
+        self.memoria_maxima_mb = memoria_maxima_mb
+        self.porta = porta
+        self.ao_concluir = ao_concluir
+
+        for scraper in self.scrapers.values():
+            scraper.manter_driver = True
+
+        self._gatilho = threading.Event()
+        self._parar = threading.Event()
+        self._servidor = None
+
+        # Estado exposto em GET /estado
+        self.coletas = 0
+        self.ultima_coleta = None
+        self.proxima_coleta = None
+        self.resultados = {}
+        self.reciclagens = {nome: 0 for nome in scrapers}
+
+    def acionar(self):
+        """Antecipa a próxima coleta"""
+        print("Coleta solicitada")
+        self._gatilho.set()
+
+    def parar(self):
+        """Encerra o serviço ao fim da coleta em andamento"""
+        self._parar.set()
+        self._gatilho.set()
+
+    def estado(self):
+        """Estado do serviço e dos navegadores"""
+        navegadores = {}
+        for nome, scraper in self.scrapers.items():
+            if scraper.driver:
+                navegadores[nome] = {
+                    "idade_s": round(time.monotonic() - scraper.driver_iniciado_em),
+                    "memoria_mb": memoria_navegador_mb(scraper.driver),
+                    "reciclagens": self.reciclagens[nome],
+                }
+            else:
+                navegadores[nome] = {"aberto": False, "reciclagens": self.reciclagens[nome]}
+        return {
+            "coletas": self.coletas,
+            "ultima_coleta": self.ultima_coleta,
+            "proxima_coleta": self.proxima_coleta,
+            "resultados": self.resultados,
+            "navegadores": navegadores,
+        }
+
+    def _motivo_reciclagem(self, scraper):
+        """Retorna por que o navegador deve ser reciclado, ou None se ele pode ser reaproveitado"""
+        idade = time.monotonic() - scraper.driver_iniciado_em
+        if idade >= self.idade_maxima:
+            return f"aberto há {idade / 60:.0f} min"
+        memoria = memoria_navegador_mb(scraper.driver)
+        if memoria is not None and memoria >= self.memoria_maxima_mb:
+            return f"usando {memoria:.0f} MB"
+        if not navegador_responde(scraper.driver):
+            return "não responde"
+        return None
+
+    def _coletar(self, nome, scraper):
+        """Executa um scraper com o navegador reaproveitado ou reciclado"""
+        if scraper.driver:
+            motivo = self._motivo_reciclagem(scraper)
+            if motivo:
+                print(f"[{nome}] Reciclando navegador: {motivo}")
+                self.reciclagens[nome] += 1
+                try:
+                    scraper.fechar_driver()
+                except Exception:
+                    scraper.driver = None
+            else:
+                print(f"[{nome}] Reaproveitando navegador aberto")
+
+        resultado = scraper.executar_scraping()
+
+        # Entre as coletas, a página fica vazia para o navegador não consumir CPU e rede
+        if scraper.driver:
+            try:
+                scraper.driver.get(PAGINA_OCIOSA)
+            except Exception:
+                pass
+        return resultado
+
+    def executar_coleta(self):
+        """
+        Executa uma coleta de todos os scrapers em paralelo
+
+        Returns:
+            dict: Resultado de cada scraper (True, False ou None, como em executar_scraping)
+        """
+        inicio = time.monotonic()
+        print(f"\n=== Coleta {self.coletas + 1} ({datetime.now():%Y-%m-%d %H:%M:%S}) ===")
+        with ThreadPoolExecutor(max_workers=len(self.scrapers)) as executor:
+            futuros = {nome: executor.submit(self._coletar, nome, s) for nome, s in self.scrapers.items()}
+        resultados = {}
+        for nome, futuro in futuros.items():
+            try:
+                resultados[nome] = futuro.result()
+            except Exception as e:
+                print(f"[{nome}] Erro na coleta: {e}")
+                resultados[nome] = None
+
+        self.coletas += 1
+        self.ultima_coleta = datetime.now().isoformat(timespec="seconds")
+        self.resultados = resultados
+        print(f"Coleta concluída em {time.monotonic() - inicio:.1f}s: {resultados}")
+
+        if self.ao_concluir:
+            try:
+                self.ao_concluir(resultados)
+            except Exception as e:
+                print(f"Erro após a coleta: {e}")
+        return resultados
+
+    def _iniciar_gatilho_http(self):
+        """Sobe o servidor HTTP local do gatilho em uma thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        servico = self
+
+        class Gatilho(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != "/atualizar":
+                    self.send_error(404)
+                    return
+                servico.acionar()
+                self.send_response(202)
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path.rstrip("/") != "/estado":
+                    self.send_error(404)
+                    return
+                corpo = json.dumps(servico.estado(), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", self.porta), Gatilho)
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        print(f"Gatilho em http://127.0.0.1:{self._servidor.server_address[1]}/atualizar")
+
+    def _instalar_sinais(self):
+        """SIGUSR1 antecipa a coleta; SIGTERM e SIGINT encerram o serviço"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda *_: self.acionar())
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sinal, lambda *_: self.parar())
+
+    def executar(self):
+        """Executa coletas até o serviço ser parado, fechando os navegadores ao final"""
+        self._instalar_sinais()
+        if self.porta is not None:
+            self._iniciar_gatilho_http()
+        print(f"Serviço iniciado: coleta a cada {self.intervalo / 60:.0f} min (PID {os.getpid()})")
+        try:
+            while not self._parar.is_set():
+                self._gatilho.clear()
+                self.executar_coleta()
+                self.proxima_coleta = datetime.fromtimestamp(time.time() + self.intervalo).isoformat(
+                    timespec="seconds"
+                )
+                self._gatilho.wait(self.intervalo)
+        finally:
+            print("Encerrando serviço...")
+            if self._servidor:
+                self._servidor.shutdown()
+                self._servidor.server_close()
+            for scraper in self.scrapers.values():
+                try:
+                    scraper.fechar_driver()
+                except Exception:
+                    pass
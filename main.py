@@ -1,9 +1,317 @@
-from srag_hospitalizados.covid19_srag_hospitalizados_scraper import SragHospitalizadosScraper
-from vacinometro.vacinometro_covid_scrap import VacinometroCovidScraper
+"""
+Ponto de entrada único do projeto
+
+    python main.py                       pipeline completo (o mesmo que 'all')
+    python main.py scrape-srag           baixa os microdados de SRAG hospitalizados
+    python main.py scrape-vacinometro    baixa a exportação do vacinômetro
+    python main.py process-pdf [opções]  extrai os dados dos boletins em PDF
+    python main.py process-pdf --calibrar  escolhe o extrator de texto mais rápido
+    python main.py servico               coleta periodicamente com navegadores abertos
+    python main.py acionar               pede uma coleta imediata ao serviço
+    python main.py artefatos [execução]  lista as execuções e os arquivos guardados no acervo
+
+Selenium, PyPDF2, pandas e os módulos de cada etapa só são importados pelo
+comando que precisa deles, então comandos leves (ex.: acionar, --help)
+iniciam rápido; ver benchmarks/benchmark_inicializacao.py.
+"""
+
+import argparse
+import sys
+
+# Tempos máximos de cada etapa, em segundos
+TIMEOUT_SCRAPING = 15 * 60
+TIMEOUT_PROCESSAMENTO = 60 * 60
+
+
+def _opcoes_scraper(perfil=None, capturas=None, **opcoes):
+    """Argumentos dos scrapers; sem perfil ou política de capturas informados, vale o padrão do scraper"""
+    if perfil:
+        opcoes["perfil"] = perfil
+    if capturas:
+        opcoes["capturas"] = capturas
+    return opcoes
+
+
+def scrape_srag(perfil=None, capturas=None):
+    """Baixa os microdados de SRAG hospitalizados da FVS-AM"""
+    from srag_hospitalizados.covid19_srag_hospitalizados_scraper import SragHospitalizadosScraper
+
+    return SragHospitalizadosScraper(**_opcoes_scraper(perfil, capturas)).executar_scraping()
+
+
+def scrape_vacinometro(perfil=None, capturas=None):
+    """Baixa a exportação do vacinômetro COVID-19"""
+    from vacinometro.vacinometro_covid_scrap import VacinometroCovidScraper
+
+    return VacinometroCovidScraper(**_opcoes_scraper(perfil, capturas)).executar_scraping()
+
+
+def processar_pdfs():
+    """
+    Extrai os dados dos boletins em PDF da pasta dados/fvs_raw
+
+    Returns:
+        bool: False se nenhum PDF novo ou alterado foi processado
+    """
+    from srag_hospitalizados import covid19_srag_hospitalizados_process_pdf
+
+    return bool(covid19_srag_hospitalizados_process_pdf.main([]))
+
+
+def ingerir_microdados():
+    """Converte a planilha de microdados de SRAG em Parquet tipado"""
+    from srag_hospitalizados import covid19_srag_hospitalizados_ingestao_xlsx
+
+    covid19_srag_hospitalizados_ingestao_xlsx.main([])
+
+
+def armazenar_dados():
+    """Importa os CSVs dos boletins e as exportações do vacinômetro no banco SQLite"""
+    from comum.banco_dados import importar_tudo
+
+    importar_tudo()
+
+
+def resultado_coleta(resultado):
+    """Repete o resultado de uma coleta já feita (scrapers do modo serviço)"""
+    # Coleta com falha vira erro, para as etapas dependentes serem ignoradas
+    if resultado is None:
+        raise RuntimeError("coleta falhou")
+    return resultado
+
+
+def montar_pipeline(resultados_coleta=None, perfil=None, capturas=None):
+    """
+    Define as etapas do pipeline e suas dependências
+
+    Args:
+        resultados_coleta (dict, optional): Resultados de scrape_srag e scrape_vacinometro já
+                                            executados fora do pipeline. Se None, os scrapers
+                                            rodam como etapas
+        perfil (str, optional): Perfil do Chrome dos scrapers ('enxuto' ou 'completo')
+        capturas (str, optional): Política de capturas de tela dos scrapers ('falha', 'sempre' ou 'nunca')
+    """
+    from comum.orquestrador import Etapa
+
+    if resultados_coleta is None:
+        coletas = [
+            Etapa("scrape_srag", scrape_srag, timeout=TIMEOUT_SCRAPING, argumentos=(perfil, capturas)),
+            Etapa(
+                "scrape_vacinometro", scrape_vacinometro, timeout=TIMEOUT_SCRAPING, argumentos=(perfil, capturas)
+            ),
+        ]
+    else:
+        coletas = [
+            Etapa(nome, resultado_coleta, argumentos=(resultados_coleta.get(nome),))
+            for nome in ("scrape_srag", "scrape_vacinometro")
+        ]
+    return coletas + [
+        # Os boletins em PDF não vêm do scrape_srag (que baixa a planilha de microdados)
+        Etapa(
+            "processar_pdfs",
+            processar_pdfs,
+            timeout=TIMEOUT_PROCESSAMENTO,
+        ),
+        Etapa(
+            "ingerir_microdados",
+            ingerir_microdados,
+            dependencias=["scrape_srag"],
+            timeout=TIMEOUT_PROCESSAMENTO,
+        ),
+        # Importa os CSVs dos boletins e as exportações do vacinômetro: basta uma delas ter dados novos
+        Etapa(
+            "armazenar_dados",
+            armazenar_dados,
+            dependencias=["processar_pdfs", "scrape_vacinometro"],
+            timeout=TIMEOUT_PROCESSAMENTO,
+            qualquer_dependencia=True,
+        ),
+    ]
+
+
+def executar_pipeline(resultados_coleta=None, perfil=None, capturas=None):
+    """Executa o pipeline e imprime o resumo"""
+    from comum.orquestrador import Orquestrador
+
+    orquestrador = Orquestrador(montar_pipeline(resultados_coleta, perfil, capturas))
+    orquestrador.executar()
+    orquestrador.imprimir_resumo()
+    return orquestrador
+
+
+def processar_coleta(resultados):
+    """Executa as etapas de processamento após uma coleta do modo serviço"""
+    if not any(resultados.values()):
+        print("Nenhum dado novo, processamento ignorado")
+        return
+    executar_pipeline(resultados)
+
+
+def comando_all(args, extras):
+    """Pipeline completo: scrapers, processamento e armazenamento"""
+    executar_pipeline(perfil=args.perfil, capturas=args.capturas)
+    return 0
+
+
+def comando_scrape_srag(args, extras):
+    """Apenas o scraper de SRAG hospitalizados"""
+    return 1 if scrape_srag(args.perfil, args.capturas) is None else 0
+
+
+def comando_scrape_vacinometro(args, extras):
+    """Apenas o scraper do vacinômetro"""
+    return 1 if scrape_vacinometro(args.perfil, args.capturas) is None else 0
+
+
+def comando_process_pdf(args, extras):
+    """Processador de PDFs, com as opções repassadas a ele (ex.: --workers 4 --force)"""
+    from srag_hospitalizados import covid19_srag_hospitalizados_process_pdf
+
+    covid19_srag_hospitalizados_process_pdf.main(extras)
+    return 0
+
+
+def comando_servico(args, extras):
+    """Mantém os scrapers com navegadores abertos, coletando a cada intervalo"""
+    from comum import servico
+    from srag_hospitalizados.covid19_srag_hospitalizados_scraper import SragHospitalizadosScraper
+    from vacinometro.vacinometro_covid_scrap import VacinometroCovidScraper
+
+    scrapers = {
+        "scrape_srag": SragHospitalizadosScraper(
+            **_opcoes_scraper(args.perfil, args.capturas, manter_driver=True)
+        ),
+        "scrape_vacinometro": VacinometroCovidScraper(
+            **_opcoes_scraper(args.perfil, args.capturas, manter_driver=True)
+        ),
+    }
+    servico.ServicoColeta(
+        scrapers,
+        intervalo=args.intervalo * 60 if args.intervalo else servico.INTERVALO_PADRAO,
+        idade_maxima=args.idade_maxima * 60 if args.idade_maxima else servico.IDADE_MAXIMA_NAVEGADOR,
+        memoria_maxima_mb=args.memoria_maxima or servico.MEMORIA_MAXIMA_NAVEGADOR_MB,
+        porta=args.porta or servico.PORTA_GATILHO,
+        ao_concluir=processar_coleta,
+    ).executar()
+    return 0
+
+
+def comando_acionar(args, extras):
+    """Pede uma coleta imediata ao serviço em execução"""
+    from comum import servico
+
+    return 0 if servico.acionar(args.porta or servico.PORTA_GATILHO) else 1
+
+
+def comando_artefatos(args, extras):
+    """Lista as execuções no acervo ou os artefatos de uma delas, extraindo-os se pedido"""
+    import os
+
+    from comum.acervo import Acervo
+
+    with Acervo() as acervo:
+        if not args.execucao:
+            for execucao in acervo.execucoes(args.servico):
+                situacao = {None: "em andamento", 1: "sucesso", 0: "falha"}[execucao["sucesso"]]
+                print(
+                    f"{execucao['servico']:<22} {execucao['execucao']}  {situacao:<12} "
+                    f"{execucao['artefatos']} artefato(s)"
+                )
+            return 0
+
+        artefatos = acervo.artefatos(args.execucao, args.servico)
+        if not artefatos:
+            print(f"Nenhum artefato da execução {args.execucao}")
+            return 1
+        for artefato in artefatos:
+            print(
+                f"{artefato['tipo']:<13} {artefato['nome']}  {artefato['tamanho'] / 1024:.0f} KB "
+                f"({artefato['tamanho_armazenado'] / 1024:.0f} KB no acervo)  {artefato['sha256'][:12]}"
+            )
+            if args.extrair:
+                os.makedirs(args.extrair, exist_ok=True)
+                acervo.restaurar(artefato["sha256"], os.path.join(args.extrair, artefato["nome"]))
+        if args.extrair:
+            print(f"{len(artefatos)} artefato(s) extraídos em {args.extrair}")
+    return 0
+
+
+def _adicionar_perfil(subparser):
+    """Opções --perfil e --capturas dos comandos que abrem o Chrome (ver comum.navegador e comum.acervo)"""
+    subparser.add_argument(
+        "--perfil", choices=("enxuto", "completo"),
+        help="Perfil do Chrome: 'enxuto' sem janela nem imagens, fontes e rastreadores, "
+             "ou 'completo' visível e maximizado (padrão: enxuto)"
+    )
+    subparser.add_argument(
+        "--capturas", choices=("falha", "sempre", "nunca"),
+        help="Capturas de tela guardadas no acervo: só as de coletas com 'falha', "
+             "'sempre' ou 'nunca' (padrão: falha)"
+    )
+
+
+def construir_parser():
+    """
+    Monta o parser da linha de comando
+
+    Os padrões do modo serviço ficam em comum.servico e não são importados
+    aqui, para o --help não carregar o módulo.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="Coleta e processamento dos dados de SRAG e vacinação"
+    )
+    parser.set_defaults(executar=comando_all, perfil=None, capturas=None)
+    comandos = parser.add_subparsers(title="comandos", metavar="comando")
+
+    todos = comandos.add_parser("all", help="Pipeline completo (padrão)")
+    todos.set_defaults(executar=comando_all)
+    _adicionar_perfil(todos)
+    srag = comandos.add_parser("scrape-srag", help="Baixa os microdados de SRAG hospitalizados")
+    srag.set_defaults(executar=comando_scrape_srag)
+    _adicionar_perfil(srag)
+    vacinometro = comandos.add_parser("scrape-vacinometro", help="Baixa a exportação do vacinômetro")
+    vacinometro.set_defaults(executar=comando_scrape_vacinometro)
+    _adicionar_perfil(vacinometro)
+    # Sem -h próprio: 'process-pdf --help' mostra as opções do processador
+    comandos.add_parser(
+        "process-pdf", add_help=False,
+        help="Extrai os dados dos boletins em PDF (opções: process-pdf --help)"
+    ).set_defaults(executar=comando_process_pdf)
+
+    servico = comandos.add_parser(
+        "servico", help="Coleta periodicamente, reaproveitando os navegadores entre as coletas"
+    )
+    servico.set_defaults(executar=comando_servico)
+    servico.add_argument("--intervalo", type=float, help="Minutos entre as coletas (padrão: 360)")
+    servico.add_argument("--idade-maxima", type=float, help="Minutos até reciclar o navegador (padrão: 1440)")
+    servico.add_argument(
+        "--memoria-maxima", type=float, help="Memória do navegador, em MB, que dispara a reciclagem (padrão: 1500)"
+    )
+    servico.add_argument("--porta", type=int, help="Porta local do gatilho HTTP (padrão: 8765)")
+    _adicionar_perfil(servico)
+
+    acionar = comandos.add_parser("acionar", help="Pede uma coleta imediata ao serviço em execução")
+    acionar.set_defaults(executar=comando_acionar)
+    acionar.add_argument("--porta", type=int, help="Porta local do gatilho HTTP (padrão: 8765)")
+
+    artefatos = comandos.add_parser(
+        "artefatos", help="Lista as execuções e os arquivos guardados no acervo (dados/acervo)"
+    )
+    artefatos.set_defaults(executar=comando_artefatos)
+    artefatos.add_argument("execucao", nargs="?", help="Execução (AAAAMMDD_HHMMSS) cujos artefatos listar")
+    artefatos.add_argument("--servico", help="Só as execuções do serviço (ex.: vacinometro_scraper)")
+    artefatos.add_argument("--extrair", metavar="PASTA", help="Grava os artefatos da execução na pasta")
+    return parser
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = construir_parser()
+    args, extras = parser.parse_known_args(argv)
+    if extras and args.executar is not comando_process_pdf:
+        parser.error(f"argumentos não reconhecidos: {' '.join(extras)}")
+    return args.executar(args, extras)
+
 
 if __name__ == "__main__":
-    scraper_hospitalizados = SragHospitalizadosScraper()
-    scraper_hospitalizados.executar_scraping()
-    
-    scraper_vacinometro = VacinometroCovidScraper()
-    scraper_vacinometro.executar_scraping()
\ No newline at end of file
+    sys.exit(main())
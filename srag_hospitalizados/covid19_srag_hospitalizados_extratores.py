@@ -0,0 +1,273 @@
+"""
+Extratores de texto dos boletins em PDF
+
+Todos os extratores entregam o texto de cada página no mesmo formato: uma
+linha de texto por linha da tabela, sem quebra de linha no fim da página. O
+filtro de linhas do processador (parsear_linhas) roda igual sobre qualquer
+um deles.
+
+    pypdf2   PyPDF2 (padrão, referência das linhas extraídas)
+    pypdf    pypdf, sucessor mantido do PyPDF2, também em Python puro
+    poppler  pdftotext do poppler, em um único processo por intervalo de páginas
+    tabula   tabula-java pelo tabula-py, que reconhece as células da tabela; com
+             o jpype instalado a JVM é iniciada uma vez por processo e reaproveitada
+             em todas as páginas do lote
+
+Cada processo mantém uma instância de cada extrator (obter_extrator), então
+estados caros de iniciar, como a JVM do tabula, duram a execução inteira. O
+comando de calibração do processador (--calibrar) mede os extratores
+disponíveis nos boletins e escolhe o mais rápido que gera as mesmas linhas
+do PyPDF2.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+
+PYPDF2 = 'pypdf2'
+PYPDF = 'pypdf'
+POPPLER = 'poppler'
+TABULA = 'tabula'
+
+# Extrator usado quando nenhum foi escolhido nem calibrado
+EXTRATOR_PADRAO = PYPDF2
+
+# Tamanho das leituras da saída do pdftotext
+TAMANHO_LEITURA = 64 * 1024
+
+# Bytes finais da saída de erros do pdftotext mostrados quando ele falha
+TAMANHO_ERROS = 2000
+
+# Separador de páginas na saída do pdftotext
+SEPARADOR_PAGINAS = '\f'
+
+
+class ExtratorTexto(ABC):
+    """Interface dos extratores: contar as páginas e gerar o texto de cada uma"""
+
+    nome = None
+
+    @classmethod
+    @abstractmethod
+    def disponivel(cls):
+        """Verifica se as dependências do extrator estão instaladas"""
+
+    @classmethod
+    @abstractmethod
+    def versao(cls):
+        """Versão da dependência do extrator, que também muda o texto extraído"""
+
+    @abstractmethod
+    def contar_paginas(self, arquivo_pdf):
+        """Retorna o número de páginas do PDF"""
+
+    @abstractmethod
+    def iterar_paginas(self, arquivo_pdf, inicio=0, fim=None):
+        """Gera o texto de cada página [inicio, fim) do PDF"""
+
+
+class ExtratorPyPDF2(ExtratorTexto):
+    """PdfReader().extract_text() do PyPDF2"""
+
+    nome = PYPDF2
+    modulo = 'PyPDF2'
+
+    @classmethod
+    def disponivel(cls):
+        try:
+            __import__(cls.modulo)
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def versao(cls):
+        return getattr(__import__(cls.modulo), '__version__', '')
+
+    def _leitor(self, arquivo):
+        return __import__(self.modulo).PdfReader(arquivo)
+
+    def contar_paginas(self, arquivo_pdf):
+        with open(arquivo_pdf, 'rb') as arquivo:
+            return len(self._leitor(arquivo).pages)
+
+    def iterar_paginas(self, arquivo_pdf, inicio=0, fim=None):
+        with open(arquivo_pdf, 'rb') as arquivo:
+            leitor = self._leitor(arquivo)
+            if fim is None:
+                fim = len(leitor.pages)
+            for i in range(inicio, fim):
+                yield leitor.pages[i].extract_text()
+
+
+class ExtratorPypdf(ExtratorPyPDF2):
+    """PdfReader().extract_text() do pypdf, com a mesma interface do PyPDF2"""
+
+    nome = PYPDF
+    modulo = 'pypdf'
+
+
+class ExtratorPoppler(ExtratorTexto):
+    """pdftotext -layout, lido página a página enquanto o processo escreve"""
+
+    nome = POPPLER
+
+    @classmethod
+    def disponivel(cls):
+        return shutil.which('pdftotext') is not None
+
+    @classmethod
+    def versao(cls):
+        # 'pdftotext -v' escreve a versão na saída de erros ('pdftotext version 22.02.0')
+        resultado = subprocess.run(['pdftotext', '-v'], capture_output=True, text=True)
+        linhas = (resultado.stderr + resultado.stdout).splitlines()
+        return next((linha.strip() for linha in linhas if 'version' in linha.lower()), '')
+
+    def contar_paginas(self, arquivo_pdf):
+        # Sem depender do pdfinfo: o PyPDF2 só lê a árvore de páginas
+        return ExtratorPyPDF2().contar_paginas(arquivo_pdf)
+
+    def iterar_paginas(self, arquivo_pdf, inicio=0, fim=None):
+        if fim is None:
+            fim = self.contar_paginas(arquivo_pdf)
+        if inicio >= fim:
+            return
+        comando = [
+            'pdftotext', '-layout', '-enc', 'UTF-8', '-f', str(inicio + 1), '-l', str(fim),
+            arquivo_pdf, '-',
+        ]
+        # Avisos vão para um arquivo temporário: um pipe só lido no fim encheria
+        # e travaria o pdftotext enquanto a saída ainda é lida
+        erros = tempfile.TemporaryFile()
+        processo = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=erros)
+        try:
+            pendente = ''
+            paginas = 0
+            for bloco in iter(lambda: processo.stdout.read(TAMANHO_LEITURA), b''):
+                pendente += bloco.decode('utf-8', errors='replace')
+                *prontas, pendente = pendente.split(SEPARADOR_PAGINAS)
+                for texto in prontas:
+                    paginas += 1
+                    yield self._normalizar(texto)
+            if processo.wait() != 0:
+                # Só o fim da saída de erros, onde fica a causa da falha
+                erros.seek(max(0, os.fstat(erros.fileno()).st_size - TAMANHO_ERROS))
+                mensagem = erros.read().decode('utf-8', errors='replace').strip()
+                raise RuntimeError(f"pdftotext falhou ({processo.returncode}): {mensagem}")
+            # Cada página termina com o separador; texto depois do último é uma página sem ele
+            if pendente.strip():
+                paginas += 1
+                yield self._normalizar(pendente)
+            for _ in range(paginas, fim - inicio):
+                yield ''
+        finally:
+            if processo.poll() is None:
+                processo.kill()
+            processo.stdout.close()
+            processo.wait()
+            erros.close()
+
+    @staticmethod
+    def _normalizar(texto):
+        """
+        Aproxima o texto do -layout do texto do PyPDF2
+
+        Tira o recuo e as linhas em branco do alinhamento e a quebra de linha
+        do fim da página; o espaçamento entre as colunas não importa, porque
+        o filtro de linhas divide os campos por qualquer sequência de espaços.
+        """
+        return '\n'.join(linha.strip() for linha in texto.split('\n') if linha.strip())
+
+
+class ExtratorTabula(ExtratorTexto):
+    """Células das tabelas de cada página pelo tabula-java, uma linha por linha da tabela"""
+
+    nome = TABULA
+
+    def __init__(self):
+        self._tabula = None
+
+    @classmethod
+    def disponivel(cls):
+        try:
+            import tabula
+        except ImportError:
+            return False
+        # O pacote 'tabula' do PyPI não é o tabula-py: conferir a função usada
+        return hasattr(tabula, 'read_pdf') and shutil.which('java') is not None
+
+    @classmethod
+    def versao(cls):
+        import tabula
+
+        return getattr(tabula, '__version__', '')
+
+    def contar_paginas(self, arquivo_pdf):
+        return ExtratorPyPDF2().contar_paginas(arquivo_pdf)
+
+    def iterar_paginas(self, arquivo_pdf, inicio=0, fim=None):
+        if self._tabula is None:
+            import tabula
+
+            self._tabula = tabula
+        if fim is None:
+            fim = self.contar_paginas(arquivo_pdf)
+        for i in range(inicio, fim):
+            # force_subprocess=False: chamada pelo jpype na JVM já aberta, sem um java por página
+            tabelas = self._tabula.read_pdf(
+                arquivo_pdf, pages=i + 1, stream=True, multiple_tables=True, silent=True,
+                force_subprocess=False, pandas_options={'header': None, 'dtype': str},
+            )
+            linhas = []
+            for tabela in tabelas:
+                for valores in tabela.itertuples(index=False, name=None):
+                    campos = [str(valor).strip() for valor in valores if isinstance(valor, str) and valor.strip()]
+                    if campos:
+                        linhas.append(' '.join(campos))
+            yield '\n'.join(linhas)
+
+
+EXTRATORES = {
+    classe.nome: classe for classe in (ExtratorPyPDF2, ExtratorPypdf, ExtratorPoppler, ExtratorTabula)
+}
+
+# Instâncias deste processo, reaproveitadas entre PDFs e blocos de páginas
+_instancias = {}
+
+
+def extratores_disponiveis():
+    """Nomes dos extratores com as dependências instaladas"""
+    return [nome for nome, classe in EXTRATORES.items() if classe.disponivel()]
+
+
+def assinatura_extrator(nome=None):
+    """Nome e versão do extrator (ex.: 'pypdf2 3.0.1'), para o manifesto do processador"""
+    nome = nome or EXTRATOR_PADRAO
+    try:
+        versao = EXTRATORES[nome].versao()
+    except Exception:
+        versao = ''
+    return f"{nome} {versao}".strip()
+
+
+def obter_extrator(nome=None):
+    """
+    Retorna a instância do extrator neste processo
+
+    Args:
+        nome (str, optional): Nome do extrator. Se None, usa o EXTRATOR_PADRAO
+
+    Raises:
+        ValueError: Extrator desconhecido
+        RuntimeError: Dependências do extrator não instaladas
+    """
+    nome = nome or EXTRATOR_PADRAO
+    if nome not in _instancias:
+        if nome not in EXTRATORES:
+            raise ValueError(f"Extrator desconhecido: {nome} (opções: {', '.join(EXTRATORES)})")
+        if not EXTRATORES[nome].disponivel():
+            raise RuntimeError(f"Extrator '{nome}' indisponível: dependências não instaladas")
+        _instancias[nome] = EXTRATORES[nome]()
+    return _instancias[nome]
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ingestão dos microdados de SRAG hospitalizados (planilha XLSX)
+
+A planilha baixada pelo scraper é lida em modo streaming, em blocos de linhas,
+sem carregar a pasta de trabalho inteira em memória. Cada coluna recebe um tipo
+compacto (datas, inteiros pequenos e categorias para municípios e códigos de
+classificação) e os blocos são gravados em um único Parquet. A conversão só é
+refeita quando a planilha muda; as análises leem o Parquet com
+carregar_microdados().
+"""
+
+import os
+import glob
+import argparse
+from datetime import date, datetime
+
+from comum.download_http import calcular_sha256
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+XLSX_DIR = os.path.join(SCRIPT_DIR, 'dados/fvs_raw')
+MICRODADOS_DIR = os.path.join(SCRIPT_DIR, 'dados_processados', 'microdados')
+PADRAO_PLANILHAS = 'sraghospitalizado_*_microdados.xlsx'
+
+# Incrementar ao mudar as regras de tipagem, para reconverter planilhas já ingeridas
+VERSAO_INGESTAO = 1
+
+# Linhas convertidas e gravadas por vez
+LINHAS_POR_BLOCO = 50_000
+
+# Colunas com prefixo DT_ são datas (padrão do dicionário de dados do SIVEP-Gripe)
+PREFIXO_DATA = 'DT_'
+
+# Colunas numéricas de fato; as demais (códigos, municípios, classificações) viram categorias
+COLUNAS_INTEIRAS = {
+    'SEM_NOT': 'int8',
+    'SEM_PRI': 'int8',
+    'NU_IDADE_N': 'int16',
+    'TP_IDADE': 'int8',
+    'DOSE_REF': 'int8',
+}
+
+# Faixa de valores de cada tipo inteiro usado
+LIMITES_INTEIROS = {
+    'int8': (-2 ** 7, 2 ** 7 - 1),
+    'int16': (-2 ** 15, 2 ** 15 - 1),
+    'int32': (-2 ** 31, 2 ** 31 - 1),
+}
+
+# Formatos aceitos para datas gravadas como texto na planilha
+FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y')
+
+# Chaves dos metadados do Parquet que identificam a planilha de origem
+META_SHA256 = b'origem_sha256'
+META_VERSAO = b'versao_ingestao'
+
+
+def _importar_dependencias():
+    """Importa openpyxl e pyarrow, que só são necessários na ingestão"""
+    try:
+        import openpyxl
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Ingestão dos microdados requer 'openpyxl' e 'pyarrow' (pip install .[microdados])"
+        ) from e
+    return openpyxl, pa, pq
+
+
+def tipo_coluna(nome):
+    """
+    Define o tipo de armazenamento de uma coluna pelo nome
+
+    Returns:
+        str: 'data', um tipo inteiro ('int8', 'int16', ...) ou 'categoria'
+    """
+    nome = nome.upper()
+    if nome.startswith(PREFIXO_DATA):
+        return 'data'
+    return COLUNAS_INTEIRAS.get(nome, 'categoria')
+
+
+def converter_data(valor):
+    """Converte uma célula em date (None se vazia ou inválida)"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str):
+        valor = valor.strip()
+        for formato in FORMATOS_DATA:
+            try:
+                return datetime.strptime(valor, formato).date()
+            except ValueError:
+                continue
+    return None
+
+
+def converter_inteiro(valor, tipo):
+    """Converte uma célula em int dentro da faixa do tipo (None se vazia ou inválida)"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    elif isinstance(valor, str) and valor.strip().lstrip('-').isdigit():
+        valor = int(valor.strip())
+    if not isinstance(valor, int):
+        return None
+    minimo, maximo = LIMITES_INTEIROS[tipo]
+    return valor if minimo <= valor <= maximo else None
+
+
+def converter_texto(valor):
+    """Converte uma célula em texto (códigos numéricos sem o '.0' do Excel)"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _vazio(valor):
+    """Verifica se a célula está vazia"""
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def montar_esquema(cabecalho):
+    """
+    Monta o esquema Arrow da planilha a partir do cabeçalho
+
+    Categorias usam dicionário com índices int32, iguais em todos os blocos,
+    para que o ParquetWriter aceite blocos com conjuntos de valores diferentes.
+    """
+    _, pa, _ = _importar_dependencias()
+    campos = []
+    for nome in cabecalho:
+        tipo = tipo_coluna(nome)
+        if tipo == 'data':
+            tipo_arrow = pa.date32()
+        elif tipo == 'categoria':
+            tipo_arrow = pa.dictionary(pa.int32(), pa.string())
+        else:
+            tipo_arrow = pa.type_for_alias(tipo)
+        campos.append(pa.field(nome, tipo_arrow))
+    return pa.schema(campos)
+
+
+def converter_bloco(cabecalho, linhas, esquema, invalidos):
+    """
+    Converte um bloco de linhas da planilha em uma tabela Arrow
+
+    Args:
+        cabecalho (list): Nomes das colunas
+        linhas (list): Tuplas de valores das células
+        esquema (pyarrow.Schema): Esquema de montar_esquema()
+        invalidos (dict): Contagem de valores não convertidos por coluna (atualizada)
+
+    Returns:
+        pyarrow.Table: Bloco tipado
+    """
+    _, pa, _ = _importar_dependencias()
+    total = len(cabecalho)
+    # Linhas curtas (células finais vazias) são completadas com None
+    colunas = list(zip(*(tuple(linha[:total]) + (None,) * (total - len(linha)) for linha in linhas)))
+
+    arrays = []
+    for nome, valores in zip(cabecalho, colunas):
+        tipo = tipo_coluna(nome)
+        if tipo == 'data':
+            convertidos = [converter_data(v) for v in valores]
+        elif tipo == 'categoria':
+            convertidos = [converter_texto(v) for v in valores]
+        else:
+            convertidos = [converter_inteiro(v, tipo) for v in valores]
+
+        perdidos = sum(1 for v, c in zip(valores, convertidos) if c is None and not _vazio(v))
+        if perdidos:
+            invalidos[nome] = invalidos.get(nome, 0) + perdidos
+
+        if tipo == 'categoria':
+            array = pa.array(convertidos, type=pa.string()).dictionary_encode()
+        else:
+            array = pa.array(convertidos, type=esquema.field(nome).type)
+        arrays.append(array)
+
+    return pa.Table.from_arrays(arrays, schema=esquema)
+
+
+def _normalizar_cabecalho(cabecalho):
+    """Remove espaços dos nomes e nomeia colunas sem título"""
+    nomes = []
+    for i, nome in enumerate(cabecalho):
+        nome = str(nome).strip() if nome is not None else ''
+        nomes.append(nome or f'COLUNA_{i + 1}')
+    return nomes
+
+
+def caminho_parquet(caminho_xlsx):
+    """Retorna o caminho do Parquet gerado para uma planilha"""
+    nome = os.path.splitext(os.path.basename(caminho_xlsx))[0]
+    return os.path.join(MICRODADOS_DIR, f'{nome}.parquet')
+
+
+def esta_atualizado(caminho_xlsx, caminho_saida, sha256=None):
+    """Verifica se o Parquet já foi gerado a partir desta planilha e desta versão da ingestão"""
+    if not os.path.exists(caminho_saida):
+        return False
+    _, _, pq = _importar_dependencias()
+    try:
+        metadados = pq.read_schema(caminho_saida).metadata or {}
+    except Exception:
+        return False
+    sha256 = sha256 or calcular_sha256(caminho_xlsx)
+    return (
+        metadados.get(META_SHA256) == sha256.encode()
+        and metadados.get(META_VERSAO) == str(VERSAO_INGESTAO).encode()
+    )
+
+
+def ingerir_xlsx(caminho_xlsx, caminho_saida=None, linhas_por_bloco=LINHAS_POR_BLOCO, forcar=False):
+    """
+    Converte a planilha de microdados em Parquet tipado, bloco a bloco
+
+    Args:
+        caminho_xlsx (str): Caminho da planilha
+        caminho_saida (str, optional): Parquet de destino. Se None, usa dados_processados/microdados
+        linhas_por_bloco (int): Linhas convertidas e gravadas por vez
+        forcar (bool): Reconverte mesmo que a planilha não tenha mudado
+
+    Returns:
+        int: Número de linhas gravadas (0 se a conversão foi ignorada), ou None em caso de erro
+    """
+    openpyxl, _, pq = _importar_dependencias()
+    caminho_saida = caminho_saida or caminho_parquet(caminho_xlsx)
+
+    sha256 = calcular_sha256(caminho_xlsx)
+    if not forcar and esta_atualizado(caminho_xlsx, caminho_saida, sha256):
+        print(f"'{os.path.basename(caminho_xlsx)}' sem alterações, conversão ignorada")
+        return 0
+
+    os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
+    temporario = caminho_saida + '.tmp'
+    invalidos = {}
+    total_linhas = 0
+
+    try:
+        print(f"Convertendo '{os.path.basename(caminho_xlsx)}'...")
+        # read_only lê a planilha sob demanda, sem montar todas as células em memória
+        pasta_trabalho = openpyxl.load_workbook(caminho_xlsx, read_only=True, data_only=True)
+        try:
+            linhas = pasta_trabalho.worksheets[0].iter_rows(values_only=True)
+            cabecalho = _normalizar_cabecalho(next(linhas, None) or [])
+            if not cabecalho:
+                print(f"Planilha '{caminho_xlsx}' vazia")
+                return None
+
+            esquema = montar_esquema(cabecalho).with_metadata({
+                META_SHA256: sha256.encode(),
+                META_VERSAO: str(VERSAO_INGESTAO).encode(),
+            })
+            with pq.ParquetWriter(temporario, esquema, compression='zstd') as escritor:
+                bloco = []
+                for linha in linhas:
+                    if all(_vazio(v) for v in linha):
+                        continue
+                    bloco.append(linha)
+                    if len(bloco) >= linhas_por_bloco:
+                        escritor.write_table(converter_bloco(cabecalho, bloco, esquema, invalidos))
+                        total_linhas += len(bloco)
+                        print(f"  {total_linhas} linhas convertidas")
+                        bloco = []
+                if bloco:
+                    escritor.write_table(converter_bloco(cabecalho, bloco, esquema, invalidos))
+                    total_linhas += len(bloco)
+        finally:
+            pasta_trabalho.close()
+
+        os.replace(temporario, caminho_saida)
+
+    except Exception as e:
+        print(f"Erro ao converter a planilha {caminho_xlsx}: {e}")
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return None
+
+    for nome, quantidade in sorted(invalidos.items()):
+        print(f"  Aviso: {quantidade} valores inválidos na coluna '{nome}' gravados como nulos")
+    print(f"{total_linhas} linhas salvas em {caminho_saida}")
+    return total_linhas
+
+
+def carregar_microdados(caminho=None, colunas=None, filtros=None):
+    """
+    Carrega os microdados convertidos em um DataFrame com tipos compactos
+
+    Categorias chegam como pandas.Categorical e inteiros como Int8/Int16
+    (aceitam nulos sem virar float).
+
+    Args:
+        caminho (str, optional): Parquet gerado por ingerir_xlsx(). Se None, usa o mais recente
+        colunas (list, optional): Colunas a carregar. Se None, carrega todas
+        filtros (list, optional): Filtros do pyarrow, ex.: [('SG_UF_NOT', '=', 'AM')]
+
+    Returns:
+        pandas.DataFrame: Microdados
+    """
+    import pandas as pd
+    _, pa, pq = _importar_dependencias()
+
+    if caminho is None:
+        convertidos = sorted(glob.glob(os.path.join(MICRODADOS_DIR, '*.parquet')), key=os.path.getmtime)
+        if not convertidos:
+            raise FileNotFoundError(f"Nenhum microdado convertido em '{MICRODADOS_DIR}'")
+        caminho = convertidos[-1]
+
+    tipos_pandas = {
+        pa.int8(): pd.Int8Dtype(),
+        pa.int16(): pd.Int16Dtype(),
+        pa.int32(): pd.Int32Dtype(),
+    }
+    tabela = pq.read_table(caminho, columns=colunas, filters=filtros)
+    return tabela.to_pandas(types_mapper=tipos_pandas.get, date_as_object=False)
+
+
+def inteiro_positivo(valor):
+    """Tipo do argparse para opções que só aceitam inteiros maiores que zero"""
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"inteiro inválido: '{valor}'")
+    if numero < 1:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {numero}")
+    return numero
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Converte os microdados de SRAG (XLSX) em Parquet tipado")
+    parser.add_argument(
+        'planilhas', nargs='*',
+        help=f"Planilhas a converter (padrão: {PADRAO_PLANILHAS} em '{XLSX_DIR}')"
+    )
+    parser.add_argument(
+        '--linhas-por-bloco', type=inteiro_positivo, default=LINHAS_POR_BLOCO,
+        help=f"Linhas convertidas e gravadas por vez (padrão: {LINHAS_POR_BLOCO})"
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Reconverte as planilhas mesmo que não tenham mudado"
+    )
+    args = parser.parse_args(argv)
+
+    planilhas = args.planilhas or sorted(glob.glob(os.path.join(XLSX_DIR, PADRAO_PLANILHAS)))
+    if not planilhas:
+        print(f"Nenhuma planilha de microdados encontrada em '{XLSX_DIR}'.")
+        return
+
+    for planilha in planilhas:
+        ingerir_xlsx(planilha, linhas_por_bloco=args.linhas_por_bloco, forcar=args.force)
+
+if __name__ == "__main__":
+    main()
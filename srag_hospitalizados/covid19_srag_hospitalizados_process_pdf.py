@@ -3,92 +3,883 @@
 
 """
 Extração de dados de PDFs de SRAG hospitalizados
+
+As páginas são lidas uma a uma e as linhas de dados seguem direto para o CSV,
+sem montar o texto completo do PDF em memória. O texto das páginas vem de um
+dos extratores de covid19_srag_hospitalizados_extratores; com --calibrar, o
+processador mede os extratores nos boletins da pasta e passa a usar o mais
+rápido que gera exatamente as mesmas linhas.
 """
 
 import os
-import PyPDF2
 import re
 import csv
+import argparse
+import itertools
+import json
+import hashlib
+import inspect
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from comum.calendario_epidemiologico import semana_epidemiologica
+from comum.rastreamento import Rastreador
+from srag_hospitalizados.covid19_srag_hospitalizados_extratores import (
+    EXTRATOR_PADRAO,
+    EXTRATORES,
+    assinatura_extrator,
+    extratores_disponiveis,
+    obter_extrator,
+)
+from srag_hospitalizados.covid19_srag_hospitalizados_ingestao_xlsx import (
+    converter_data,
+    converter_inteiro,
+    converter_texto,
+    inteiro_positivo,
+    tipo_coluna,
+)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PDF_DIR = os.path.join(SCRIPT_DIR, 'dados/fvs_raw')
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'dados_processados')
+MANIFESTO_PATH = os.path.join(OUTPUT_DIR, 'manifesto.json')
+PARQUET_DIR = os.path.join(OUTPUT_DIR, 'parquet')
+CALIBRACAO_PATH = os.path.join(OUTPUT_DIR, 'extrator_pdf.json')
+
+# Extrator escolhido pela calibração (ou o padrão, sem calibração)
+EXTRATOR_AUTOMATICO = 'auto'
+
+# PDFs mais recentes da pasta usados na calibração
+AMOSTRA_CALIBRACAO = 3
+
+# Incrementar ao mudar as regras de extração de forma que o código não revele
+# (ex.: comportamento de uma dependência). Mudanças no código das funções de
+# análise já invalidam o manifesto automaticamente, ver assinatura_parser()
+VERSAO_PARSER = 1
+
+# Incrementar ao mudar o esquema do dataset Parquet; a versão vai nos metadados
+# dos arquivos e na assinatura do parser, então os PDFs são regravados
+VERSAO_ESQUEMA_PARQUET = 1
+META_VERSAO_ESQUEMA = b'versao_esquema'
+
+# No modo paralelo, PDFs grandes são divididos em blocos com este número de páginas
+PAGINAS_POR_BLOCO = 50
+
+# Nome das execuções do processamento no trace e nas métricas
+SERVICO_METRICAS = 'processamento_pdf'
+
+# Padrão para linhas de dados (começam com número e têm data)
+PADRAO_DADOS = re.compile(r'^\s*\d+.*\d{2}/\d{2}/\d{4}')
+
+# Datas nos campos das linhas, para particionar linhas sem a data de notificação
+PADRAO_DATA = re.compile(r'^\d{2}/\d{2}/\d{4}$')
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def extrair_dados_pdf(arquivo_pdf):
-    """Extrai dados estruturados de um arquivo PDF"""
+def extrator_calibrado(caminho=CALIBRACAO_PATH):
+    """
+    Retorna o extrator escolhido pela última calibração
+    
+    Sem calibração, ou se o extrator calibrado não estiver mais instalado,
+    retorna o EXTRATOR_PADRAO.
+    """
     try:
-        print(f"Processando {arquivo_pdf}...")
-        
-        # Extrair texto do PDF
-        with open(arquivo_pdf, 'rb') as file:
-            leitor = PyPDF2.PdfReader(file)
-            texto = ""
-            for pagina in leitor.pages:
-                texto += pagina.extract_text()
-        
-        # Dividir em linhas e encontrar dados
-        linhas = texto.split('\n')
-        dados = []
-        cabecalho = None
-        
-        # Padrão para linhas de dados (começam com número e têm data)
-        padrao_dados = re.compile(r'^\s*\d+.*\d{2}/\d{2}/\d{4}')
-        
-        for i, linha in enumerate(linhas):
-            # Primeira linha com 'Classi_Fin' é o cabeçalho
-            if i == 0 and 'Classi_Fin' in linha:
-                cabecalho = linha.split()
-            # Linhas que parecem dados SRAG
-            elif padrao_dados.match(linha) and len(linha.split()) > 5:
-                dados.append(re.split(r'\s+', linha.strip()))
+        with open(caminho, encoding='utf-8') as f:
+            nome = json.load(f).get('extrator')
+    except (OSError, ValueError):
+        return EXTRATOR_PADRAO
+    if nome in EXTRATORES and EXTRATORES[nome].disponivel():
+        return nome
+    print(f"Aviso: extrator calibrado '{nome}' indisponível, usando '{EXTRATOR_PADRAO}'")
+    return EXTRATOR_PADRAO
+
+def resolver_extrator(nome=None):
+    """Nome do extrator a usar: o informado ou, com 'auto' ou None, o calibrado"""
+    if nome in (None, EXTRATOR_AUTOMATICO):
+        return extrator_calibrado()
+    return nome
+
+def contar_paginas(arquivo_pdf, extrator=None):
+    """Retorna o número de páginas de um arquivo PDF"""
+    return obter_extrator(extrator).contar_paginas(arquivo_pdf)
+
+def iterar_paginas(arquivo_pdf, inicio=0, fim=None, rastreador=None, extrator=None):
+    """
+    Gera o texto de cada página [inicio, fim) de um arquivo PDF
+    
+    Com um rastreador, a leitura de cada página vira um span 'pagina' (só a
+    extração do texto, sem o tempo de quem consome o gerador).
+    
+    Args:
+        extrator (str, optional): Nome do extrator de texto. Se None, usa o EXTRATOR_PADRAO
+    """
+    paginas = obter_extrator(extrator).iterar_paginas(arquivo_pdf, inicio, fim)
+    if rastreador is None:
+        yield from paginas
+        return
+    nome_pdf = os.path.basename(arquivo_pdf)
+    for pagina in itertools.count(inicio + 1):
+        momento = time.time()
+        inicio_leitura = time.perf_counter()
+        texto = next(paginas, None)
+        if texto is None:
+            return
+        rastreador.registrar_span(
+            'pagina', momento, time.perf_counter() - inicio_leitura,
+            pdf=nome_pdf, pagina=pagina, caracteres=len(texto)
+        )
+        rastreador.contar('paginas')
+        yield texto
+
+def extrair_texto_paginas(arquivo_pdf, inicio=0, fim=None, extrator=None):
+    """Extrai o texto das páginas [inicio, fim) de um arquivo PDF"""
+    return list(iterar_paginas(arquivo_pdf, inicio, fim, extrator=extrator))
+
+def extrair_texto_paginas_medido(arquivo_pdf, inicio=0, fim=None, extrator=None):
+    """
+    Extrai o texto das páginas [inicio, fim) e mede a leitura de cada uma
+    
+    Executada nos processos do pool, que não compartilham o rastreador da
+    execução: as medições voltam junto com os textos, ver _textos_medidos().
+    
+    Returns:
+        tuple: (textos das páginas, [(início, duração em s, atributos) de cada página])
+    """
+    rastreador = Rastreador(SERVICO_METRICAS)
+    textos = list(iterar_paginas(arquivo_pdf, inicio, fim, rastreador, extrator))
+    return textos, [(span['inicio'], span['duracao_s'], span['atributos']) for span in rastreador.spans]
+
+def _textos_medidos(blocos, rastreador):
+    """Gera os textos dos blocos do pool na ordem, registrando as páginas no rastreador"""
+    for bloco in blocos:
+        textos, paginas = bloco.result()
+        for inicio, duracao_s, atributos in paginas:
+            rastreador.registrar_span('pagina', inicio, duracao_s, **atributos)
+        rastreador.contar('paginas', len(paginas))
+        yield from textos
+
+def iterar_linhas(textos_paginas):
+    """
+    Gera as linhas do texto das páginas sem concatenar o PDF inteiro
+    
+    O texto de uma página não termina com quebra de linha, então a última linha
+    de uma página continua na primeira linha da seguinte, exatamente como se
+    os textos fossem concatenados antes do split.
+    """
+    resto = ""
+    for texto in textos_paginas:
+        partes = (resto + texto).split('\n')
+        resto = partes.pop()
+        yield from partes
+    yield resto
+
+def parsear_linhas(linhas):
+    """
+    Separa o cabeçalho e filtra as linhas de dados
+    
+    Args:
+        linhas (iterable): Linhas de texto extraídas do PDF
         
+    Returns:
+        tuple: (cabeçalho, gerador das linhas de dados já divididas em campos)
+    """
+    linhas = iter(linhas)
+    primeira = next(linhas, '')
+    
+    # Primeira linha com 'Classi_Fin' é o cabeçalho
+    if 'Classi_Fin' in primeira:
+        cabecalho = primeira.split()
+    else:
         # Se não achou cabeçalho, usar genérico
-        if not cabecalho:
-            cabecalho = ['DADOS']
+        cabecalho = ['DADOS']
+        linhas = itertools.chain([primeira], linhas)
+        
+    return cabecalho, _filtrar_dados(linhas)
+
+def _filtrar_dados(linhas):
+    """Gera as linhas que parecem dados SRAG, divididas em campos"""
+    for linha in linhas:
+        if PADRAO_DADOS.match(linha) and len(linha.split()) > 5:
+            yield re.split(r'\s+', linha.strip())
+
+def extrair_registros_pdf(arquivo_pdf, rastreador=None, extrator=None):
+    """
+    Extrai dados de um arquivo PDF de forma incremental
+    
+    Returns:
+        tuple: (cabeçalho, gerador das linhas de dados, página por página)
+    """
+    return parsear_linhas(iterar_linhas(iterar_paginas(arquivo_pdf, rastreador=rastreador, extrator=extrator)))
+
+def extrair_dados_pdf(arquivo_pdf, rastreador=None, extrator=None, tipada=False):
+    """
+    Extrai dados estruturados de um arquivo PDF
+    
+    Args:
+        arquivo_pdf (str): Caminho do arquivo PDF
+        rastreador (Rastreador, optional): Recebe o span do PDF, os spans das
+                                           páginas e os contadores de linhas
+        extrator (str, optional): Nome do extrator de texto. Se None, usa o EXTRATOR_PADRAO
+        tipada (bool): Se True, as linhas vêm em uma TabelaSrag, com colunas
+                       tipadas pelo nome (tipo_coluna) e as linhas malformadas
+                       em tabela.invalidas; senão, em listas de strings
+                       
+    Returns:
+        tuple: (cabeçalho, linhas ou TabelaSrag); (None, []) em caso de erro
+    """
+    try:
+        print(f"Processando {arquivo_pdf}...")
+        
+        rastreador = rastreador or Rastreador(SERVICO_METRICAS)
+        with rastreador.span('extrair_dados_pdf', pdf=os.path.basename(arquivo_pdf)) as atributos:
+            cabecalho, registros = extrair_registros_pdf(arquivo_pdf, rastreador, extrator)
+            if tipada:
+                from srag_hospitalizados.covid19_srag_hospitalizados_registros import tabular_registros
+                
+                dados = tabular_registros(cabecalho, registros)
+                cabecalho = dados.cabecalho
+            else:
+                dados = list(registros)
+            atributos['linhas'] = len(dados)
+        rastreador.contar('linhas', len(dados))
         
         print(f"Encontradas {len(dados)} linhas de dados")
+        if tipada and dados.invalidas:
+            print(f"{len(dados.invalidas)} linhas malformadas ignoradas, ex.: "
+                  f"linha {dados.invalidas[0]['linha']}: {dados.invalidas[0]['motivo']}")
         return cabecalho, dados
         
     except Exception as e:
         print(f"Erro ao processar {arquivo_pdf}: {e}")
         return None, []
 
-def salvar_csv(cabecalho, dados, nome_arquivo):
-    """Salva os dados em arquivo CSV"""
+def _escrever_csv(cabecalho, dados, nome_arquivo):
+    """
+    Escreve as linhas no CSV à medida que são geradas e retorna quantas foram escritas
+    
+    A escrita é feita em um arquivo temporário renomeado ao final, para que um
+    erro no meio da extração não deixe um CSV incompleto no lugar do anterior.
+    """
+    temporario = nome_arquivo + '.tmp'
+    total = 0
     try:
-        with open(nome_arquivo, 'w', newline='', encoding='utf-8-sig') as f:
+        with open(temporario, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.writer(f)
             writer.writerow(cabecalho)
-            writer.writerows(dados)
+            for linha in dados:
+                writer.writerow(linha)
+                total += 1
+        os.replace(temporario, nome_arquivo)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return total
+
+def salvar_csv(cabecalho, dados, nome_arquivo):
+    """Salva os dados em arquivo CSV"""
+    try:
+        total = _escrever_csv(cabecalho, dados, nome_arquivo)
         print(f"Dados salvos em: {nome_arquivo}")
+        return total
     except Exception as e:
         print(f"Erro ao salvar CSV: {e}")
+        return 0
+
+def _primeira_data(linha):
+    """Retorna a primeira data válida encontrada entre os campos de uma linha"""
+    for campo in linha:
+        if PADRAO_DATA.match(campo):
+            try:
+                return datetime.strptime(campo, '%d/%m/%Y').date()
+            except ValueError:
+                continue
+    return None
+
+def colunas_particao(particao='semana'):
+    """Colunas de partição do dataset: ano e semana epidemiológica ou ano e mês"""
+    return ['ano', 'mes'] if particao == 'mes' else ['ano_epi', 'semana_epi']
+
+def esquema_parquet(nomes, particao='semana'):
+    """
+    Esquema fixo do dataset Parquet dos boletins
+    
+    O tipo de cada coluna depende só do nome, pelas mesmas regras da ingestão
+    da planilha (tipo_coluna): colunas DT_ são date32, as numéricas conhecidas
+    têm largura fixa e as demais são categorias com índices int32. Todos os
+    PDFs gravam cada coluna com o mesmo tipo no mesmo dataset, que pode então
+    ser lido inteiro.
+    """
+    import pyarrow as pa
+    
+    campos = []
+    for nome in nomes:
+        tipo = tipo_coluna(nome)
+        if tipo == 'data':
+            tipo_arrow = pa.date32()
+        elif tipo == 'categoria':
+            tipo_arrow = pa.dictionary(pa.int32(), pa.string())
+        else:
+            tipo_arrow = pa.type_for_alias(tipo)
+        campos.append(pa.field(nome, tipo_arrow))
+    campos += [pa.field(nome, pa.int16()) for nome in colunas_particao(particao)]
+    return pa.schema(campos, metadata={META_VERSAO_ESQUEMA: str(VERSAO_ESQUEMA_PARQUET).encode()})
 
-def main():
-    """Função principal"""
+def montar_tabela_arrow(cabecalho, dados, particao='semana'):
+    """
+    Monta uma tabela Arrow tipada a partir das linhas extraídas de um PDF
+    
+    Os tipos vêm do esquema fixo do dataset (esquema_parquet); valores que não
+    cabem no tipo da coluna ficam nulos. Colunas de partição são derivadas da
+    data de notificação: a primeira coluna de data cujo nome contém 'NOTIFIC',
+    ou a primeira coluna de data do arquivo. Linhas sem essa data (ex.:
+    desalinhadas por espaços em nomes) usam a primeira data da linha.
+    
+    Args:
+        cabecalho (list): Nomes das colunas
+        dados (list): Linhas de dados, listas de strings
+        particao (str): 'semana' (ano e semana epidemiológica) ou 'mes'
+        
+    Returns:
+        tuple: (tabela, lista de colunas de partição)
+    """
+    import pyarrow as pa
+    
+    total_colunas = max([len(cabecalho)] + [len(linha) for linha in dados])
+    nomes = list(cabecalho) + [f'coluna_{i + 1}' for i in range(len(cabecalho), total_colunas)]
+    colunas = list(itertools.zip_longest(*dados)) or [()] * total_colunas
+    colunas += [(None,) * len(dados)] * (total_colunas - len(colunas))
+    
+    esquema = esquema_parquet(nomes, particao)
+    arrays = []
+    datas = []
+    for nome, valores in zip(nomes, colunas):
+        tipo = tipo_coluna(nome)
+        if tipo == 'data':
+            convertidos = [converter_data(v) for v in valores]
+            arrays.append(pa.array(convertidos, type=pa.date32()))
+            datas.append((nome, convertidos))
+        elif tipo == 'categoria':
+            convertidos = [converter_texto(v) for v in valores]
+            arrays.append(pa.array(convertidos, type=pa.string()).dictionary_encode())
+        else:
+            convertidos = [converter_inteiro(v, tipo) for v in valores]
+            arrays.append(pa.array(convertidos, type=esquema.field(nome).type))
+            
+    if datas:
+        coluna_notificacao = next((d for d in datas if 'NOTIFIC' in d[0].upper()), datas[0])[1]
+    else:
+        coluna_notificacao = [None] * len(dados)
+    notificacao = [
+        data if data is not None else _primeira_data(linha)
+        for data, linha in zip(coluna_notificacao, dados)
+    ]
+    
+    if particao == 'mes':
+        valores_particao = [
+            [d.year if d else None for d in notificacao],
+            [d.month if d else None for d in notificacao],
+        ]
+    else:
+        semanas = [semana_epidemiologica(d) if d else (None, None) for d in notificacao]
+        valores_particao = [[s[0] for s in semanas], [s[1] for s in semanas]]
+    for valores in valores_particao:
+        arrays.append(pa.array(valores, type=pa.int16()))
+        
+    return pa.Table.from_arrays(arrays, schema=esquema), colunas_particao(particao)
+
+def _escrever_parquet(cabecalho, dados, pasta_destino, nome_base, particao='semana'):
+    """
+    Escreve as linhas de um PDF em um dataset Parquet particionado e comprimido
+    
+    Os arquivos de cada PDF são nomeados a partir de nome_base; os gerados em
+    uma execução anterior para o mesmo PDF são removidos antes da escrita.
+    
+    Returns:
+        int: Número de linhas escritas
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Saída em Parquet requer o pacote 'pyarrow' (pip install pyarrow)") from e
+        
+    dados = list(dados)
+    tabela, particoes = montar_tabela_arrow(cabecalho, dados, particao)
+    
+    padrao_anterior = re.compile(rf'^{re.escape(nome_base)}-\d+\.parquet$')
+    if os.path.exists(pasta_destino):
+        for raiz, _, arquivos in os.walk(pasta_destino):
+            for arquivo in arquivos:
+                if padrao_anterior.match(arquivo):
+                    os.remove(os.path.join(raiz, arquivo))
+                    
+    pq.write_to_dataset(
+        tabela,
+        pasta_destino,
+        partition_cols=particoes,
+        basename_template=f'{nome_base}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        compression='zstd',
+    )
+    return len(dados)
+
+def caminho_manifesto(formato='csv', particao='semana'):
+    """
+    Retorna o manifesto correspondente ao formato de saída
+    
+    Cada dataset Parquet (um por particionamento) guarda seu próprio manifesto;
+    o prefixo '_' faz o arquivo ser ignorado por leitores de Parquet.
+    """
+    if formato == 'parquet':
+        return os.path.join(PARQUET_DIR, particao, '_manifesto.json')
+    return MANIFESTO_PATH
+
+def preparar_saida(pdf, formato='csv', particao='semana'):
+    """
+    Define o destino e a função de escrita para o resultado de um PDF
+    
+    Returns:
+        tuple: (caminho de destino, função escritor(cabecalho, dados, destino))
+    """
+    if formato == 'parquet':
+        nome_base = pdf[:-len('.pdf')] if pdf.endswith('.pdf') else pdf
+        escritor = functools.partial(_escrever_parquet, nome_base=nome_base, particao=particao)
+        return os.path.join(PARQUET_DIR, particao), escritor
+    return os.path.join(OUTPUT_DIR, pdf.replace('.pdf', '_dados.csv')), _escrever_csv
+
+def processar_pdf(caminho_pdf, nome_csv, textos_paginas=None, escritor=_escrever_csv,
+                  rastreador=None, extrator=None):
+    """
+    Extrai as linhas de um PDF e grava direto no CSV
+    
+    As primeiras linhas chegam ao disco antes de o PDF terminar de ser lido. O
+    CSV só é criado se houver ao menos uma linha de dados.
+    
+    Args:
+        caminho_pdf (str): Caminho do arquivo PDF
+        nome_csv (str): Caminho do CSV de saída (ou do dataset, conforme o escritor)
+        textos_paginas (iterable, optional): Textos das páginas já extraídos.
+                                             Se None, lê as páginas do PDF.
+        escritor (callable, optional): Função que grava as linhas no destino.
+                                       Se None, grava em CSV.
+        rastreador (Rastreador, optional): Recebe o span do PDF, os spans das
+                                           páginas lidas aqui e os contadores de
+                                           PDFs, bytes e linhas
+        extrator (str, optional): Extrator de texto das páginas lidas aqui.
+                                  Se None, usa o EXTRATOR_PADRAO
+                                       
+    Returns:
+        int: Número de linhas de dados gravadas, ou None em caso de erro
+    """
+    print(f"Processando {caminho_pdf}...")
+    rastreador = rastreador or Rastreador(SERVICO_METRICAS)
+    with rastreador.span('processar_pdf', pdf=os.path.basename(caminho_pdf)) as atributos:
+        try:
+            if textos_paginas is None:
+                textos_paginas = iterar_paginas(caminho_pdf, rastreador=rastreador, extrator=extrator)
+            cabecalho, registros = parsear_linhas(iterar_linhas(textos_paginas))
+            
+            primeira = next(registros, None)
+            total = 0
+            if primeira is not None:
+                total = escritor(cabecalho, itertools.chain([primeira], registros), nome_csv)
+                
+            print(f"Encontradas {total} linhas de dados")
+            if total:
+                print(f"Dados salvos em: {nome_csv}")
+            atributos['linhas'] = total
+            rastreador.contar('pdfs_processados')
+            rastreador.contar('bytes_lidos', os.path.getsize(caminho_pdf))
+            rastreador.contar('linhas', total)
+            return total
+            
+        except Exception as e:
+            print(f"Erro ao processar {caminho_pdf}: {e}")
+            atributos['erro'] = str(e)
+            rastreador.contar('pdfs_com_erro')
+            return None
+
+def calcular_hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos"""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+def assinatura_parser(extrator=None):
+    """
+    Identifica as regras de extração em uso
+    
+    Combina VERSAO_PARSER e VERSAO_ESQUEMA_PARQUET com o padrão de dados, o
+    código das funções de análise e o nome e a versão do extrator de texto,
+    então qualquer mudança nas regras, no esquema do dataset ou no extrator
+    (que gera outro texto e outras linhas) invalida o manifesto.
+    
+    Args:
+        extrator (str, optional): Nome do extrator de texto. Se None, usa o EXTRATOR_PADRAO
+    """
+    partes = [
+        str(VERSAO_PARSER), str(VERSAO_ESQUEMA_PARQUET), PADRAO_DADOS.pattern, assinatura_extrator(extrator)
+    ]
+    for funcao in (iterar_linhas, parsear_linhas, _filtrar_dados):
+        try:
+            partes.append(inspect.getsource(funcao))
+        except (OSError, TypeError):
+            partes.append(funcao.__name__)
+    return hashlib.sha256('\n'.join(partes).encode('utf-8')).hexdigest()[:16]
+
+class Manifesto:
+    """Registro persistente dos PDFs já processados e dos CSVs gerados"""
+    
+    def __init__(self, caminho=MANIFESTO_PATH, extrator=None):
+        """
+        Carrega o manifesto do disco
+        
+        Args:
+            caminho (str, optional): Arquivo JSON do manifesto.
+                                     Se None, usa 'dados_processados/manifesto.json'
+            extrator (str, optional): Extrator de texto da execução; PDFs processados
+                                      com outro extrator não contam como atualizados
+        """
+        self.caminho = caminho
+        self.versao_parser = assinatura_parser(extrator)
+        self.entradas = {}
+        
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, encoding='utf-8') as f:
+                    self.entradas = json.load(f).get('arquivos', {})
+            except (OSError, ValueError) as e:
+                print(f"Aviso: manifesto ilegível, todos os PDFs serão processados: {e}")
+                
+    def esta_atualizado(self, pdf, caminho_pdf):
+        """Verifica se o PDF já foi processado com o conteúdo e as regras atuais"""
+        entrada = self.entradas.get(pdf)
+        if not entrada or entrada.get('versao_parser') != self.versao_parser:
+            return False
+            
+        saida = entrada.get('saida')
+        if saida and not os.path.exists(os.path.join(OUTPUT_DIR, saida)):
+            return False
+            
+        stat = os.stat(caminho_pdf)
+        if entrada.get('tamanho') != stat.st_size:
+            return False
+        if entrada.get('mtime_ns') == stat.st_mtime_ns:
+            return True
+            
+        # Arquivo tocado sem mudar de tamanho: confere o conteúdo
+        if entrada.get('sha256') != calcular_hash_arquivo(caminho_pdf):
+            return False
+        entrada['mtime_ns'] = stat.st_mtime_ns
+        self.salvar()
+        return True
+        
+    def registrar(self, pdf, caminho_pdf, saida, linhas, extrator=None):
+        """Registra o resultado do processamento de um PDF e salva o manifesto"""
+        stat = os.stat(caminho_pdf)
+        self.entradas[pdf] = {
+            'sha256': calcular_hash_arquivo(caminho_pdf),
+            'tamanho': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'versao_parser': self.versao_parser,
+            # Sem linhas de dados nenhuma saída é gerada
+            'saida': os.path.relpath(saida, OUTPUT_DIR) if linhas else None,
+            'linhas': linhas,
+            'extrator': extrator or EXTRATOR_PADRAO,
+        }
+        self.salvar()
+        
+    def salvar(self):
+        """Grava o manifesto de forma atômica"""
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'arquivos': self.entradas}, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+def dividir_paginas(total_paginas, paginas_por_bloco=PAGINAS_POR_BLOCO):
+    """Divide as páginas de um PDF em intervalos [inicio, fim) consecutivos"""
+    if paginas_por_bloco < 1:
+        raise ValueError(f"Páginas por bloco deve ser positivo: {paginas_por_bloco}")
+    return [
+        (inicio, min(inicio + paginas_por_bloco, total_paginas))
+        for inicio in range(0, total_paginas, paginas_por_bloco)
+    ]
+
+def processar_paralelo(pdfs, pasta_dados, workers, paginas_por_bloco=PAGINAS_POR_BLOCO,
+                       manifesto=None, formato='csv', particao='semana', rastreador=None,
+                       extrator=None):
+    """
+    Processa os PDFs em um pool de processos
+    
+    Todos os blocos de páginas de todos os arquivos são enviados ao pool de uma
+    vez. Os textos de cada arquivo são consumidos na ordem original das páginas,
+    então os CSVs gerados são idênticos aos da execução serial.
+    
+    Args:
+        pdfs (list): Nomes dos arquivos PDF a processar
+        pasta_dados (str): Pasta onde estão os PDFs
+        workers (int): Número de processos do pool
+        paginas_por_bloco (int): Tamanho máximo de cada bloco de páginas
+        manifesto (Manifesto, optional): Manifesto onde registrar os PDFs processados
+        formato (str): Formato de saída, 'csv' ou 'parquet'
+        particao (str): Particionamento da saída em Parquet, 'semana' ou 'mes'
+        rastreador (Rastreador, optional): Recebe os spans dos PDFs e das páginas
+                                           lidas nos processos do pool
+        extrator (str, optional): Extrator de texto; cada processo do pool mantém
+                                  a sua instância entre os blocos
+                                  
+    Returns:
+        int: Número de PDFs processados sem erro
+    """
+    rastreador = rastreador or Rastreador(SERVICO_METRICAS)
+    processados = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tarefas = []
+        for pdf in pdfs:
+            caminho_pdf = os.path.join(pasta_dados, pdf)
+            try:
+                total_paginas = contar_paginas(caminho_pdf, extrator)
+            except Exception as e:
+                print(f"Erro ao processar {caminho_pdf}: {e}")
+                continue
+                
+            blocos = [
+                executor.submit(extrair_texto_paginas_medido, caminho_pdf, inicio, fim, extrator)
+                for inicio, fim in dividir_paginas(total_paginas, paginas_por_bloco)
+            ]
+            tarefas.append((pdf, caminho_pdf, blocos))
+            
+        for pdf, caminho_pdf, blocos in tarefas:
+            textos_paginas = _textos_medidos(blocos, rastreador)
+            destino, escritor = preparar_saida(pdf, formato, particao)
+            linhas = processar_pdf(caminho_pdf, destino, textos_paginas, escritor, rastreador)
+            if linhas is not None:
+                processados += 1
+                if manifesto is not None:
+                    manifesto.registrar(pdf, caminho_pdf, destino, linhas, extrator)
+    return processados
+
+def _linhas_extraidas(extrator, caminho_pdf):
+    """Cabeçalho e linhas de dados de um PDF com o extrator, e o número de páginas lidas"""
+    textos = list(obter_extrator(extrator).iterar_paginas(caminho_pdf))
+    cabecalho, registros = parsear_linhas(iterar_linhas(textos))
+    return [cabecalho, *registros], len(textos)
+
+def calibrar_extratores(caminhos_pdf, repeticoes=1, caminho=CALIBRACAO_PATH):
+    """
+    Mede os extratores instalados e grava o mais rápido que reproduz as linhas do padrão
+    
+    As linhas de referência são as do EXTRATOR_PADRAO. Um extrator só é
+    elegível se gerar exatamente o mesmo cabeçalho e as mesmas linhas em todos
+    os PDFs; entre os elegíveis, vence o de menor tempo total (extração e
+    filtro de linhas, melhor de 'repeticoes' leituras de cada PDF).
+    
+    Args:
+        caminhos_pdf (list): Boletins usados na calibração
+        repeticoes (int): Leituras de cada PDF por extrator
+        caminho (str): Arquivo JSON onde a escolha é gravada
+        
+    Returns:
+        str: Nome do extrator escolhido
+    """
+    disponiveis = extratores_disponiveis()
+    if EXTRATOR_PADRAO not in disponiveis:
+        raise RuntimeError(f"Calibração requer o extrator de referência '{EXTRATOR_PADRAO}'")
+    disponiveis.remove(EXTRATOR_PADRAO)
+    
+    referencia = None
+    medidas = {}
+    for nome in [EXTRATOR_PADRAO, *disponiveis]:
+        resultados, segundos, paginas = [], 0.0, 0
+        try:
+            for caminho_pdf in caminhos_pdf:
+                tempos = []
+                for _ in range(max(repeticoes, 1)):
+                    inicio = time.perf_counter()
+                    linhas, total_paginas = _linhas_extraidas(nome, caminho_pdf)
+                    tempos.append(time.perf_counter() - inicio)
+                segundos += min(tempos)
+                paginas += total_paginas
+                resultados.append(linhas)
+        except Exception as e:
+            if referencia is None:
+                raise RuntimeError(f"Extrator de referência '{nome}' falhou: {e}") from e
+            print(f"{nome}: falhou ({e})")
+            medidas[nome] = {'erro': str(e)}
+            continue
+        if referencia is None:
+            referencia = resultados
+        medidas[nome] = {
+            'segundos': round(segundos, 4),
+            'paginas_por_s': round(paginas / segundos, 1) if segundos else None,
+            'linhas': sum(len(linhas) - 1 for linhas in resultados),
+            'pdfs_diferentes': sum(a != b for a, b in zip(resultados, referencia)),
+        }
+        
+    elegiveis = [nome for nome, medida in medidas.items() if medida.get('pdfs_diferentes') == 0]
+    escolhido = min(elegiveis, key=lambda nome: medidas[nome]['segundos'])
+    
+    print(f"\n{'Extrator':<10} {'Tempo':>9} {'Páginas/s':>10} {'Linhas':>8}  Mesmas linhas")
+    for nome, medida in medidas.items():
+        if 'erro' in medida:
+            print(f"{nome:<10} {'-':>9} {'-':>10} {'-':>8}  erro")
+            continue
+        identico = 'sim' if medida['pdfs_diferentes'] == 0 else f"não ({medida['pdfs_diferentes']} PDFs)"
+        print(
+            f"{nome:<10} {medida['segundos']:8.2f}s {medida['paginas_por_s'] or 0:10.1f} "
+            f"{medida['linhas']:8d}  {identico}"
+        )
+        
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({
+            'extrator': escolhido,
+            'calibrado_em': datetime.now().isoformat(timespec='seconds'),
+            'pdfs': [os.path.basename(caminho_pdf) for caminho_pdf in caminhos_pdf],
+            'medidas': medidas,
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+    print(f"\nExtrator escolhido: {escolhido} (salvo em {caminho})")
+    return escolhido
+
+def _calibrar_pasta(args):
+    """Calibra os extratores com os PDFs mais recentes da pasta de dados"""
+    if not os.path.exists(PDF_DIR):
+        print(f"Pasta '{PDF_DIR}' não encontrada.")
+        return None
+    caminhos = sorted(
+        (os.path.join(PDF_DIR, f) for f in os.listdir(PDF_DIR) if f.endswith('.pdf')),
+        key=os.path.getmtime, reverse=True
+    )[:args.amostra]
+    if not caminhos:
+        print(f"Nenhum arquivo PDF encontrado na pasta '{PDF_DIR}'.")
+        return None
+    print(f"Calibrando os extratores com {len(caminhos)} PDFs: {', '.join(map(os.path.basename, caminhos))}")
+    return calibrar_extratores(caminhos, args.repeticoes)
+
+def main(argv=None):
+    """
+    Função principal
+    
+    Returns:
+        int: Número de PDFs processados (None na calibração)
+    """
+    parser = argparse.ArgumentParser(description="Extrai dados dos PDFs de SRAG hospitalizados")
+    parser.add_argument(
+        '--workers', type=inteiro_positivo, default=1,
+        help="Número de processos para extração em paralelo (padrão: 1, execução serial)"
+    )
+    parser.add_argument(
+        '--paginas-por-bloco', type=inteiro_positivo, default=PAGINAS_POR_BLOCO,
+        help=f"Páginas por bloco ao dividir PDFs grandes (padrão: {PAGINAS_POR_BLOCO})"
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Reprocessa todos os PDFs, mesmo os que não mudaram desde a última execução"
+    )
+    parser.add_argument(
+        '--formato', choices=['csv', 'parquet'], default='csv',
+        help="Formato de saída: CSV por PDF ou Parquet tipado e particionado (padrão: csv)"
+    )
+    parser.add_argument(
+        '--particao', choices=['semana', 'mes'], default='semana',
+        help="Particionamento da saída em Parquet: semana epidemiológica ou mês (padrão: semana)"
+    )
+    parser.add_argument(
+        '--extrator', choices=[EXTRATOR_AUTOMATICO, *EXTRATORES], default=EXTRATOR_AUTOMATICO,
+        help=f"Extrator do texto das páginas; 'auto' usa o da última calibração "
+             f"ou, sem calibração, {EXTRATOR_PADRAO} (padrão: auto)"
+    )
+    parser.add_argument(
+        '--calibrar', action='store_true',
+        help="Mede os extratores instalados nos PDFs mais recentes e grava o mais rápido "
+             "que gera as mesmas linhas, sem processar os PDFs"
+    )
+    parser.add_argument(
+        '--amostra', type=inteiro_positivo, default=AMOSTRA_CALIBRACAO,
+        help=f"PDFs usados na calibração (padrão: {AMOSTRA_CALIBRACAO})"
+    )
+    parser.add_argument(
+        '--repeticoes', type=inteiro_positivo, default=1,
+        help="Leituras de cada PDF por extrator na calibração (padrão: 1)"
+    )
+    args = parser.parse_args(argv)
+    
+    if args.calibrar:
+        _calibrar_pasta(args)
+        return
+    args.extrator = resolver_extrator(args.extrator)
+    
+    # Spans de cada PDF e página e contadores da execução, exportados ao final
+    rastreador = Rastreador(SERVICO_METRICAS)
+    try:
+        with rastreador.span('processar_pdfs', workers=args.workers, formato=args.formato,
+                             extrator=args.extrator):
+            return _processar_pasta(args, rastreador)
+    finally:
+        rastreador.imprimir_resumo()
+        rastreador.exportar()
+
+def _processar_pasta(args, rastreador):
+    """
+    Processa os PDFs novos ou alterados da pasta de dados, conforme as opções de main()
+    
+    Returns:
+        int: Número de PDFs processados
+    """
     # Buscar PDFs na pasta dados
     pasta_dados = PDF_DIR
     if not os.path.exists(pasta_dados):
         print(f"Pasta '{pasta_dados}' não encontrada.")
-        return
-    
+        return 0
+        
     pdfs = [f for f in os.listdir(pasta_dados) if f.endswith('.pdf')]
     
     if not pdfs:
         print(f"Nenhum arquivo PDF encontrado na pasta '{pasta_dados}'.")
-        return
-    
+        return 0
+        
     print(f"Encontrados {len(pdfs)} arquivos PDF na pasta '{pasta_dados}'")
     
+    # Ignorar PDFs que não mudaram desde o último processamento
+    manifesto = Manifesto(caminho_manifesto(args.formato, args.particao), args.extrator)
+    if not args.force:
+        pendentes = [
+            pdf for pdf in pdfs
+            if not manifesto.esta_atualizado(pdf, os.path.join(pasta_dados, pdf))
+        ]
+        if len(pendentes) < len(pdfs):
+            print(f"{len(pdfs) - len(pendentes)} PDFs sem alterações foram ignorados")
+            rastreador.contar('pdfs_ignorados', len(pdfs) - len(pendentes))
+        pdfs = pendentes
+        
+    if not pdfs:
+        print("Nenhum PDF novo ou alterado para processar.")
+        return 0
+        
+    if args.workers > 1:
+        return processar_paralelo(
+            pdfs, pasta_dados, args.workers, args.paginas_por_bloco,
+            manifesto, args.formato, args.particao, rastreador, args.extrator
+        )
+        
+    processados = 0
     for pdf in pdfs:
         caminho_pdf = os.path.join(pasta_dados, pdf)
-        cabecalho, dados = extrair_dados_pdf(caminho_pdf)
-        
-        if dados:
-            nome_csv = pdf.replace('.pdf', '_dados.csv')
-            salvar_csv(cabecalho, dados, os.path.join(OUTPUT_DIR, nome_csv))
+        destino, escritor = preparar_saida(pdf, args.formato, args.particao)
+        linhas = processar_pdf(
+            caminho_pdf, destino, escritor=escritor, rastreador=rastreador, extrator=args.extrator
+        )
+        if linhas is not None:
+            processados += 1
+            manifesto.registrar(pdf, caminho_pdf, destino, linhas, args.extrator)
+    return processados
 
 if __name__ == "__main__":
     main()
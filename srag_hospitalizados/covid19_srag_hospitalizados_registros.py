@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Representação tipada e colunar das linhas extraídas dos boletins de SRAG
+
+As linhas do parser (listas de strings) são convertidas em blocos: cada
+coluna vira um array NumPy. O tipo de cada coluna depende só do nome, pelas
+mesmas regras da ingestão da planilha e do Parquet (tipo_coluna): colunas DT_
+viram datetime64[D], as numéricas conhecidas o inteiro de largura fixa e as
+demais códigos de categoria. Assim todos os boletins têm os mesmos tipos.
+Linhas que não se encaixam no cabeçalho ou com campos inválidos ficam de fora
+e são listadas em TabelaSrag.invalidas.
+
+Uso:
+    from srag_hospitalizados.covid19_srag_hospitalizados_process_pdf import extrair_dados_pdf
+
+    cabecalho, tabela = extrair_dados_pdf('boletim.pdf', tipada=True)
+    df = tabela.para_dataframe()
+"""
+
+import re
+import itertools
+from collections import Counter
+
+import numpy as np
+
+from srag_hospitalizados.covid19_srag_hospitalizados_ingestao_xlsx import (
+    converter_data,
+    converter_inteiro,
+    converter_texto,
+    tipo_coluna,
+)
+
+# Linhas convertidas por vez; limita a memória das listas de strings intermediárias
+LINHAS_POR_BLOCO = 50000
+
+# Colunas que podem conter espaços (ex.: 'SAO GABRIEL DA CACHOEIRA') e absorvem campos excedentes
+PADRAO_COLUNA_TEXTO_LIVRE = re.compile(r'munic', re.IGNORECASE)
+
+TIPO_DATA = 'data'
+TIPO_CATEGORIA = 'categoria'
+
+
+def _tipo_codigo(total_categorias):
+    """Menor tipo inteiro sem sinal que indexa as categorias"""
+    for tipo in (np.uint8, np.uint16, np.uint32):
+        if total_categorias <= np.iinfo(tipo).max + 1:
+            return tipo
+    return np.uint64
+
+
+def converter_coluna(valores, tipo):
+    """
+    Converte os valores de uma coluna inteira com as regras de tipo_coluna
+
+    Args:
+        valores (sequence): Strings da coluna
+        tipo (str): 'data', um tipo inteiro ('int8', 'int16', ...) ou 'categoria'
+
+    Returns:
+        tuple: (array da coluna, máscara booleana dos valores válidos)
+    """
+    if tipo == TIPO_CATEGORIA:
+        convertidos = [converter_texto(v) or '' for v in valores]
+        return np.array(convertidos, dtype=str), np.ones(len(convertidos), dtype=bool)
+    if tipo == TIPO_DATA:
+        convertidos = [converter_data(v) for v in valores]
+        coluna = np.array(convertidos, dtype='datetime64[D]')
+    else:
+        convertidos = [converter_inteiro(v, tipo) for v in valores]
+        coluna = np.array([v if v is not None else 0 for v in convertidos], dtype=tipo)
+    return coluna, np.array([v is not None for v in convertidos], dtype=bool)
+
+
+class TabelaSrag:
+    """Linhas de um boletim em colunas tipadas, mais as linhas rejeitadas"""
+
+    def __init__(self, cabecalho, tipos, colunas, categorias, invalidas):
+        """
+        Args:
+            cabecalho (list): Nomes das colunas
+            tipos (dict): Tipo de cada coluna (tipo_coluna)
+            colunas (dict): Array de cada coluna; categorias guardam os códigos
+            categorias (dict): Valores das colunas de categoria, indexados pelos códigos
+            invalidas (list): Linhas rejeitadas, dicts com 'linha', 'motivo' e 'campos'
+        """
+        self.cabecalho = list(cabecalho)
+        self.tipos = tipos
+        self.colunas = colunas
+        self.categorias = categorias
+        self.invalidas = invalidas
+
+    def __len__(self):
+        return len(self.colunas[self.cabecalho[0]]) if self.cabecalho else 0
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays das colunas e das categorias, em bytes"""
+        total = sum(coluna.nbytes for coluna in self.colunas.values())
+        return total + sum(valores.nbytes for valores in self.categorias.values())
+
+    def coluna(self, nome):
+        """Valores de uma coluna; categorias são decodificadas para texto"""
+        if self.tipos[nome] == TIPO_CATEGORIA:
+            return self.categorias[nome][self.colunas[nome]]
+        return self.colunas[nome]
+
+    def para_dataframe(self):
+        """Converte em DataFrame do pandas, com as colunas de texto como Categorical"""
+        import pandas as pd
+
+        dados = {}
+        for nome in self.cabecalho:
+            if self.tipos[nome] == TIPO_CATEGORIA:
+                dados[nome] = pd.Categorical.from_codes(
+                    self.colunas[nome].astype(np.int64), categories=self.categorias[nome]
+                )
+            else:
+                dados[nome] = self.colunas[nome]
+        return pd.DataFrame(dados)
+
+
+class _Acumulador:
+    """Converte blocos de linhas alinhadas e junta os arrays de cada coluna"""
+
+    def __init__(self, cabecalho):
+        self.cabecalho = cabecalho
+        self.tipos = [tipo_coluna(nome) for nome in cabecalho]
+        self.partes = {nome: [] for nome in cabecalho}
+        self.mapas = {nome: {} for nome, tipo in zip(cabecalho, self.tipos) if tipo == TIPO_CATEGORIA}
+        self.invalidas = []
+
+    def adicionar(self, linhas, numeros):
+        """Converte um bloco; linhas com campos inválidos vão para self.invalidas"""
+        if not linhas:
+            return
+        convertidas, validos = [], np.ones(len(linhas), dtype=bool)
+        motivos = [None] * len(linhas)
+        for nome, tipo, valores in zip(self.cabecalho, self.tipos, zip(*linhas)):
+            coluna, ok = converter_coluna(valores, tipo)
+            for i in np.flatnonzero(~ok & validos):
+                motivos[i] = f"valor inválido para {tipo} em '{nome}': '{valores[i]}'"
+            validos &= ok
+            convertidas.append(coluna)
+
+        for i in np.flatnonzero(~validos):
+            self.invalidas.append({'linha': numeros[i], 'motivo': motivos[i], 'campos': list(linhas[i])})
+
+        for nome, tipo, coluna in zip(self.cabecalho, self.tipos, convertidas):
+            coluna = coluna[validos]
+            if tipo == TIPO_CATEGORIA:
+                unicos, inversos = np.unique(coluna, return_inverse=True)
+                mapa = self.mapas[nome]
+                globais = np.array([mapa.setdefault(valor, len(mapa)) for valor in unicos.tolist()], dtype=np.int64)
+                coluna = globais[inversos].astype(np.uint32)
+            self.partes[nome].append(coluna)
+
+    def rejeitar(self, numero, motivo, campos):
+        self.invalidas.append({'linha': numero, 'motivo': motivo, 'campos': list(campos)})
+
+    def finalizar(self):
+        """Monta a TabelaSrag; códigos de categoria usam o menor tipo que os indexa"""
+        tipos, colunas, categorias = {}, {}, {}
+        for nome, tipo in zip(self.cabecalho, self.tipos):
+            partes = self.partes[nome]
+            tipos[nome] = tipo
+            if tipo == TIPO_CATEGORIA:
+                codigos = np.concatenate(partes) if partes else np.array([], dtype=np.uint32)
+                mapa = self.mapas[nome]
+                colunas[nome] = codigos.astype(_tipo_codigo(len(mapa)))
+                categorias[nome] = np.array(list(mapa), dtype=str)
+            else:
+                vazia = np.array([], dtype='datetime64[D]' if tipo == TIPO_DATA else tipo)
+                colunas[nome] = np.concatenate(partes) if partes else vazia
+        self.invalidas.sort(key=lambda invalida: invalida['linha'])
+        return TabelaSrag(self.cabecalho, tipos, colunas, categorias, self.invalidas)
+
+
+def _alinhar(campos, total_colunas, coluna_texto_livre):
+    """
+    Ajusta os campos de uma linha ao número de colunas do cabeçalho
+
+    Campos excedentes são devolvidos à coluna de texto livre (município com
+    espaços no nome). Retorna None se a linha não puder ser alinhada.
+    """
+    excedentes = len(campos) - total_colunas
+    if excedentes == 0:
+        return campos
+    if excedentes < 0 or coluna_texto_livre is None:
+        return None
+    fim = coluna_texto_livre + excedentes + 1
+    return campos[:coluna_texto_livre] + [' '.join(campos[coluna_texto_livre:fim])] + campos[fim:]
+
+
+def tabular_registros(cabecalho, registros, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Converte as linhas do parser em uma TabelaSrag
+
+    As linhas seguem em blocos, então a lista de strings completa nunca fica
+    em memória.
+
+    Args:
+        cabecalho (list): Nomes das colunas (['DADOS'] quando o PDF não tem cabeçalho)
+        registros (iterable): Linhas de dados, listas de strings
+        linhas_por_bloco (int): Linhas convertidas por vez
+
+    Returns:
+        TabelaSrag: Colunas tipadas e linhas rejeitadas
+    """
+    registros = iter(registros)
+    bloco = list(itertools.islice(registros, linhas_por_bloco))
+
+    if list(cabecalho) == ['DADOS']:
+        # Sem cabeçalho: as colunas seguem o número de campos mais comum
+        total_colunas = Counter(map(len, bloco)).most_common(1)[0][0] if bloco else 1
+        cabecalho = [f'coluna_{i + 1}' for i in range(total_colunas)]
+    cabecalho = list(cabecalho)
+    coluna_texto_livre = next(
+        (i for i, nome in enumerate(cabecalho) if PADRAO_COLUNA_TEXTO_LIVRE.search(nome)), None
+    )
+    acumulador = _Acumulador(cabecalho)
+
+    numero = 0
+    while bloco:
+        alinhadas, numeros = [], []
+        for campos in bloco:
+            numero += 1
+            linha = _alinhar(campos, len(cabecalho), coluna_texto_livre)
+            if linha is None:
+                acumulador.rejeitar(numero, f"{len(campos)} campos para {len(cabecalho)} colunas", campos)
+            else:
+                alinhadas.append(linha)
+                numeros.append(numero)
+        acumulador.adicionar(alinhadas, numeros)
+        bloco = list(itertools.islice(registros, linhas_por_bloco))
+
+    return acumulador.finalizar()
@@ -1,3 +1,5 @@
+import functools
+import json
 import os
 import time
 from datetime import datetime
@@ -6,17 +8,94 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 
+from comum.espera import (
+    TIMEOUT_DOWNLOAD,
+    TIMEOUT_PADRAO,
+    aguardar_clicavel,
+    aguardar_condicao,
+    aguardar_download,
+    aguardar_elemento,
+    aguardar_pagina_carregada,
+    aguardar_url,
+    download_em_andamento,
+    listar_arquivos,
+    novos_downloads,
+)
+from comum.acervo import CAPTURAS_FALHA, PASTA_ACERVO, Acervo, validar_politica
+from comum.dom import buscar_xpath_em_frames
+from comum.navegador import PERFIL_ENXUTO, aplicar_bloqueios, configurar_perfil
+from comum.rastreamento import PASTA_METRICAS, Rastreador, medir_etapa, resultado_execucao
+from comum.download_http import (
+    STATUS_ACESSO_NEGADO,
+    AcessoNegado,
+    CacheDownloads,
+    baixar_se_alterado,
+    criar_sessao,
+)
+from comum.resiliencia import (
+    TENTATIVAS_PADRAO,
+    Checkpoint,
+    CircuitoAberto,
+    Disjuntor,
+    FalhaEtapa,
+    executar_etapa,
+)
+
+# Página da sala de situação da FVS-AM com o link para a pasta do SharePoint
+URL_SALA_SITUACAO = "https://www.fvs.am.gov.br/indicadorSalaSituacao_view/60/2"
+
+# Trecho da URL que identifica a página do SharePoint
+DOMINIO_SHAREPOINT = "sharepoint.com"
+
+# Link para a pasta do SharePoint na página da sala de situação
+XPATH_LINK_SHAREPOINT = 'id("tabZoneId104")/DIV[1]/DIV[1]/DIV[1]/DIV[1]/DIV[1]/SPAN[1]/DIV[10]/SPAN[2]/A[1]'
+
+# Arquivo de microdados publicado na pasta do SharePoint
+ARQUIVO_MICRODADOS = "sraghospitalizado_25set2024_microdados.xlsx"
+
+# Cache do link do SharePoint e da URL de download resolvidos pelo navegador
+NOME_CACHE_DOWNLOAD = "cache_download.json"
+
+# Validadores (ETag, Last-Modified, tamanho e SHA-256) dos arquivos já baixados
+NOME_CACHE_VALIDADORES = "validadores_download.json"
+FONTE_MICRODADOS = "srag_microdados"
+
+# Etapas concluídas da execução atual e disjuntor das fontes acessadas pelo navegador
+NOME_CHECKPOINT = "checkpoint_execucao.json"
+NOME_DISJUNTOR = "disjuntores.json"
+FONTE_SALA_SITUACAO = "fvs_sala_situacao"
+FONTE_SHAREPOINT = "fvs_sharepoint"
+
+# Nome das execuções deste scraper no trace e nas métricas
+SERVICO_METRICAS = "srag_scraper"
+
 
 class SragHospitalizadosScraper:
     """Classe para fazer scraping de dados de SRAG hospitalizados do site da FVS-AM"""
     
-    def __init__(self, dados_dir=None):
+    def __init__(self, dados_dir=None, timeout=TIMEOUT_PADRAO, timeout_download=TIMEOUT_DOWNLOAD,
+                 download_direto=True, url_pagina=URL_SALA_SITUACAO,
+                 dominio_sharepoint=DOMINIO_SHAREPOINT, tentativas=TENTATIVAS_PADRAO,
+                 manter_driver=False, perfil=PERFIL_ENXUTO, capturas=CAPTURAS_FALHA):
         """
         Inicializa o scraper
         
         Args:
             dados_dir (str, optional): Diretório para salvar os dados. 
                                      Se None, usa pasta padrão 'dados/fvs_raw'
+            timeout (float, optional): Tempo máximo de espera por páginas e elementos, em segundos
+            timeout_download (float, optional): Tempo máximo de espera pelo download, em segundos
+            download_direto (bool, optional): Tentar baixar por HTTP com a URL em cache
+                                              antes de abrir o navegador
+            url_pagina (str, optional): Página com o link do SharePoint (ex.: um site simulado local)
+            dominio_sharepoint (str, optional): Trecho da URL que identifica a página do SharePoint
+            tentativas (int, optional): Tentativas de cada etapa do navegador antes de desistir
+            manter_driver (bool, optional): Mantém o Chrome aberto ao fim de executar_scraping,
+                                            para a próxima execução reaproveitá-lo (modo serviço)
+            perfil (str, optional): Perfil do Chrome: 'enxuto' (sem janela, sem imagens, fontes
+                                    e rastreadores) ou 'completo' (janela maximizada, carrega tudo)
+            capturas (str, optional): Capturas de tela guardadas no acervo: 'falha' (só as das
+                                      etapas do navegador que falharam), 'sempre' ou 'nunca'
         """
         # Definir pasta para salvar os dados
         if dados_dir is None:
@@ -30,13 +109,49 @@ class SragHospitalizadosScraper:
         # Obter timestamp para nomear arquivos
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        # Tempos máximos das esperas por condição
+        self.timeout = timeout
+        self.timeout_download = timeout_download
+        
+        # Endereços visitados pelo navegador
+        self.url_pagina = url_pagina
+        self.dominio_sharepoint = dominio_sharepoint
+        
+        # Download direto por HTTP usando a URL resolvida em uma execução anterior
+        self.download_direto = download_direto
+        self.cache_download_path = os.path.join(self.dados_dir, NOME_CACHE_DOWNLOAD)
+        
+        # Validadores do último download, para não baixar nem processar dados repetidos
+        self.cache_validadores = CacheDownloads(os.path.join(self.dados_dir, NOME_CACHE_VALIDADORES))
+        
+        # Arquivo baixado na execução atual e se ele trouxe dados novos
+        self.arquivo_baixado = None
+        self.dados_alterados = None
+        
+        # Etapas com novas tentativas; uma execução que falhou retoma da última etapa concluída
+        self.tentativas = tentativas
+        self.checkpoint = Checkpoint(os.path.join(self.dados_dir, NOME_CHECKPOINT))
+        self.disjuntor = Disjuntor(os.path.join(self.dados_dir, NOME_DISJUNTOR))
+        
         # Inicializar driver como None
         self.driver = None
+        self.driver_iniciado_em = None
+        self.manter_driver = manter_driver
+        self.perfil = perfil
+        
+        # Spans e contadores da execução, exportados ao fim de executar_scraping
+        self.pasta_metricas = PASTA_METRICAS
+        self.rastreador = Rastreador(SERVICO_METRICAS, self.pasta_metricas)
+        
+        # Microdados baixados e capturas de tela de cada execução no acervo (aberto na primeira execução)
+        self.capturas = validar_politica(capturas)
+        self.pasta_acervo = PASTA_ACERVO
+        self.acervo = None
+        self.artefatos = None
         
     def _configurar_chrome(self):
-        """Configura as opções do Chrome para download"""
+        """Configura as opções do Chrome para download, conforme o perfil do scraper"""
         chrome_options = Options()
-        chrome_options.add_argument("--start-maximized")  # Iniciar maximizado
         
         # Configurar diretório de download para a pasta DADOS_DIR
         prefs = {
@@ -45,21 +160,24 @@ class SragHospitalizadosScraper:
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True,
         }
-        chrome_options.add_experimental_option("prefs", prefs)
-        
-        return chrome_options
+        return configurar_perfil(chrome_options, self.perfil, prefs)
         
+    @medir_etapa
     def inicializar_driver(self):
         """Inicializa o driver do Chrome"""
         chrome_options = self._configurar_chrome()
         self.driver = webdriver.Chrome(options=chrome_options)
+        aplicar_bloqueios(self.driver, self.perfil, self.dados_dir)
+        self.driver_iniciado_em = time.monotonic()
         
+    @medir_etapa
     def fechar_driver(self):
         """Fecha o driver do Chrome"""
         if self.driver:
             self.driver.quit()
             self.driver = None
 
+    @medir_etapa
     def acessar_pagina(self):
         """Abre a página uma única vez e aplica os filtros de região e UF em sequência"""
         if not self.driver:
@@ -68,81 +186,86 @@ class SragHospitalizadosScraper:
         try:
             # Abrir a URL
             print("Abrindo URL...")
-            self.driver.get("https://www.fvs.am.gov.br/indicadorSalaSituacao_view/60/2")
+            self.driver.get(self.url_pagina)
 
             # Aguardar carregamento da página
             print("Aguardando carregamento da página...")
-            time.sleep(1)  # Dar tempo para página inicializar
+            if not aguardar_pagina_carregada(self.driver, self.timeout):
+                print(f"Página não terminou de carregar em {self.timeout}s, continuando...")
+            return True
 
         except Exception as e:
             print("Ocorreu um erro:")
             print(e)
             import traceback
             traceback.print_exc()
+            return False
 
-    def buscar_link_sharepoint(self):
-        """Função para buscar diretamente o segundo link do SharePoint usando XPath específico"""
-        try:
-            # XPath específico do  link do SharePoint
-            xpath_segundo_link = 'id("tabZoneId104")/DIV[1]/DIV[1]/DIV[1]/DIV[1]/DIV[1]/SPAN[1]/DIV[10]/SPAN[2]/A[1]'
+    @medir_etapa
+    def buscar_href_sharepoint(self):
+        """
+        Busca o link do SharePoint pelo XPath específico no documento atual e nos
+        iframes de mesma origem, com um único execute_script
 
-            sharepoint_link = self.driver.find_element(By.XPATH, xpath_segundo_link)
+        Substitui buscar_link_sharepoint, que retornava o WebElement do link:
+        aqui só o href é lido no navegador, sem outra ida e volta ao driver.
 
-            if sharepoint_link:
-                href = sharepoint_link.get_attribute("href")
+        Returns:
+            tuple: (href do link ou None, iframes de outra origem que não puderam ser verificados)
+        """
+        try:
+            # A busca não lança exceção quando o link ainda não existe, já que
+            # ela é repetida enquanto a página carrega
+            href, outras_origens = buscar_xpath_em_frames(self.driver, XPATH_LINK_SHAREPOINT)
+            if href:
                 print(f"Link encontrado: {href}")
-                return sharepoint_link
-            else:
-                print("Link não encontrado com XPath específico")
-                return None
+            return href, outras_origens
 
         except Exception as e:
             print(f"Erro ao buscar link com XPath específico: {e}")
-            return None
+            return None, []
 
+    @medir_etapa
     def baixar_arquivo_sharepoint(self):
         """Função para baixar o arquivo específico do SharePoint"""
         try:
             print(
-                "Procurando arquivo 'sraghospitalizado_25set2024_microdados.xlsx' na página do SharePoint..."
+                f"Procurando arquivo '{ARQUIVO_MICRODADOS}' na página do SharePoint..."
             )
 
-            # Aguardar um pouco mais para garantir que a página carregou completamente
-            time.sleep(3)
-
             arquivo_encontrado = False
 
+            # Arquivos na pasta antes do clique, para identificar o que foi baixado
+            arquivos_anteriores = listar_arquivos(self.dados_dir)
+            initial_windows = len(self.driver.window_handles)
+
             try:
-                # Procurar especificamente pelo nome do arquivo (isso vai selecionar o checkbox)
-                arquivo_nome = self.driver.find_element(
+                # Aguardar o arquivo aparecer na listagem (clicar nele seleciona o checkbox)
+                arquivo_nome = aguardar_elemento(
+                    self.driver,
                     By.XPATH,
-                    "//span[contains(text(), 'sraghospitalizado_25set2024_microdados.xlsx')]",
+                    f"//span[contains(text(), '{ARQUIVO_MICRODADOS}')]",
+                    self.timeout,
                 )
-                self.driver.execute_script("arguments[0].click();", arquivo_nome)
-
-                # Aguardar um pouco para o arquivo ser selecionado
-                time.sleep(1)
+                if arquivo_nome:
+                    self.driver.execute_script("arguments[0].click();", arquivo_nome)
 
-                # Agora procurar e clicar no botão "Baixar"
-                try:
-                    botao_baixar = self.driver.find_element(
+                    # O botão "Baixar" só fica habilitado depois que o arquivo é selecionado.
+                    # Procurar pelos atributos do comando ou pelo texto do botão
+                    botao_baixar = aguardar_clicavel(
+                        self.driver,
                         By.XPATH,
-                        "//button[@data-id='download' and @data-automationid='downloadCommand']",
+                        "//button[@data-id='download' and @data-automationid='downloadCommand']"
+                        " | //button[contains(.//span, 'Baixar')]",
+                        self.timeout,
                     )
-                    self.driver.execute_script("arguments[0].click();", botao_baixar)
-                    arquivo_encontrado = True
-                except Exception as e:
-                    print(f"Botão 'Baixar' não encontrado: {e}")
-                    # Tentar buscar por texto do botão
-                    try:
-                        botao_baixar_texto = self.driver.find_element(
-                            By.XPATH, "//button[contains(.//span, 'Baixar')]"
-                        )
-                        print("Botão 'Baixar' encontrado por texto!")
-                        self.driver.execute_script("arguments[0].click();", botao_baixar_texto)
+                    if botao_baixar:
+                        self.driver.execute_script("arguments[0].click();", botao_baixar)
                         arquivo_encontrado = True
-                    except Exception as e2:
-                        print(f"Botão 'Baixar' por texto também não encontrado: {e2}")
+                    else:
+                        print(f"Botão 'Baixar' não ficou disponível em {self.timeout}s")
+                else:
+                    print(f"Arquivo não apareceu na listagem em {self.timeout}s")
 
             except Exception as e:
                 print(f"Erro na Estratégia 1: {e}")
@@ -150,9 +273,14 @@ class SragHospitalizadosScraper:
             if arquivo_encontrado:
                 print("Clique no arquivo executado. Aguardando download...")
 
-                # Verificar se uma nova aba foi aberta (para visualização do arquivo)
-                initial_windows = len(self.driver.window_handles)
-                time.sleep(1)
+                # Aguardar o download começar ou uma nova aba abrir (para visualização do arquivo)
+                aguardar_condicao(
+                    self.driver,
+                    lambda d: len(d.window_handles) > initial_windows
+                    or download_em_andamento(self.dados_dir, arquivos_anteriores)
+                    or novos_downloads(self.dados_dir, arquivos_anteriores),
+                    self.timeout,
+                )
                 current_windows = len(self.driver.window_handles)
 
                 if current_windows > initial_windows:
@@ -162,22 +290,22 @@ class SragHospitalizadosScraper:
                     self.driver.close()
                     self.driver.switch_to.window(self.driver.window_handles[0])
 
-                # Aguardar mais tempo para o download iniciar
-                print("Aguardando download iniciar...")
-                time.sleep(1)
-
-                # Verificar se o arquivo foi baixado
-                arquivos_baixados = []
-                for arquivo in os.listdir(self.dados_dir):
-                    if arquivo.endswith(".xlsx") and "srag" in arquivo.lower():
-                        arquivos_baixados.append(arquivo)
+                # Aguardar o arquivo terminar de ser gravado (sem .crdownload na pasta)
+                print("Aguardando download terminar...")
+                arquivo_baixado = aguardar_download(
+                    self.dados_dir, arquivos_anteriores, (".xlsx",), self.timeout_download
+                )
 
-                if arquivos_baixados:
-                    print(f"Arquivos baixados encontrados: {arquivos_baixados}")
-                else:
-                    print(
-                        "Nenhum arquivo Excel com 'srag' foi encontrado nas pastas de download"
+                if arquivo_baixado:
+                    print(f"Download concluído: {arquivo_baixado}")
+                    self.arquivo_baixado, self.dados_alterados = (
+                        self.cache_validadores.registrar_download(FONTE_MICRODADOS, arquivo_baixado)
                     )
+                    if not self.dados_alterados:
+                        print("Arquivo idêntico ao último download, cópia descartada")
+                else:
+                    print(f"Download não foi concluído em {self.timeout_download}s")
+                    print("Nenhum arquivo Excel novo foi encontrado na pasta de download")
                     print(f"Verificando pasta configurada: {self.dados_dir}")
                     todos_arquivos = os.listdir(self.dados_dir)
                     print(f"Todos os arquivos na pasta: {todos_arquivos}")
@@ -187,82 +315,379 @@ class SragHospitalizadosScraper:
         except Exception as e:
             print(f"Erro ao baixar arquivo do SharePoint: {e}")
 
+    @medir_etapa
+    def _localizar_link_sharepoint(self):
+        """
+        Procura o link do SharePoint no documento principal e em seus iframes
+
+        O documento principal e os iframes de mesma origem são verificados no
+        navegador em uma única chamada; só os iframes de outra origem, que o
+        script não consegue ler, exigem entrar em cada um com switch_to.frame.
+
+        Returns:
+            str: href do link, ou None se ainda não foi encontrado
+        """
+        self.driver.switch_to.default_content()
+
+        href, outras_origens = self.buscar_href_sharepoint()
+        if href:
+            return href
+
+        for i, iframe in enumerate(outras_origens):
+            try:
+                self.driver.switch_to.frame(iframe)
+                href, _ = self.buscar_href_sharepoint()
+                if href:
+                    print(f"Link encontrado no iframe de outra origem {i + 1}")
+                    return href
+            except Exception:
+                # Iframe ainda carregando ou substituído; será verificado de novo
+                pass
+            finally:
+                self.driver.switch_to.default_content()
+
+        return None
+
+    @medir_etapa
+    def _capturar_url_download(self):
+        """
+        Obtém a URL do download mais recente na página chrome://downloads
+
+        A URL final do SharePoint costuma levar um token de acesso temporário
+        ('tempauth'), válido por pouco tempo: ela serve para as próximas
+        execuções só enquanto o token vale, e baixar_via_http a descarta
+        quando o servidor passa a recusá-la.
+
+        Returns:
+            str: URL de onde o arquivo foi baixado, ou None se não for possível obtê-la
+        """
+        janela_original = self.driver.current_window_handle
+        try:
+            self.driver.switch_to.new_window("tab")
+            self.driver.get("chrome://downloads")
+            # Conforme a versão do Chrome, 'url' é uma string ou um objeto {url: ...}
+            return self.driver.execute_script(
+                """
+                const lista = document.querySelector('downloads-manager')
+                    .shadowRoot.querySelector('#downloadsList');
+                const item = lista && lista.items && lista.items[0];
+                if (!item) return null;
+                const url = item.finalUrl || item.url;
+                return (url && url.url) || url || null;
+                """
+            )
+        except Exception as e:
+            print(f"Não foi possível obter a URL do download: {e}")
+            return None
+        finally:
+            if self.driver.current_window_handle != janela_original:
+                self.driver.close()
+            self.driver.switch_to.window(janela_original)
+
+    @medir_etapa
+    def salvar_cache_download(self, href_sharepoint):
+        """Salva o link do SharePoint e a URL direta do arquivo para as próximas execuções"""
+        url_download = self._capturar_url_download()
+        if not url_download:
+            return
+
+        cache = {
+            "href_sharepoint": href_sharepoint,
+            "url_download": url_download,
+            "nome_arquivo": os.path.basename(self.arquivo_baixado),
+        }
+        with open(self.cache_download_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        print(f"URL de download salva em: {self.cache_download_path}")
+
+    def carregar_cache_download(self):
+        """Carrega a URL de download salva em uma execução anterior (ou None)"""
+        try:
+            with open(self.cache_download_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def invalidar_cache_download(self):
+        """Descarta a URL de download salva; a próxima execução usa o navegador e salva outra"""
+        if os.path.exists(self.cache_download_path):
+            os.remove(self.cache_download_path)
+
+    @medir_etapa
+    def baixar_via_http(self):
+        """
+        Baixa os microdados por HTTP usando a URL em cache, sem abrir o navegador
+        
+        O link de compartilhamento do SharePoint é visitado antes para que a
+        sessão receba os cookies de acesso de convidado.
+        
+        A URL em cache tem vida curta (token temporário do SharePoint). Quando
+        ela expira, o servidor responde 401/403 ou uma página de login: o cache
+        é invalidado e a execução segue pelo navegador, que salva uma URL nova.
+        
+        Os validadores do último download são enviados na requisição, então um
+        arquivo sem alterações não é transferido de novo.
+        
+        Returns:
+            str: Caminho do arquivo baixado, ou None se não houver cache ou a URL não funcionar
+        """
+        cache = self.carregar_cache_download()
+        if not cache:
+            return None
+
+        print("Baixando microdados diretamente pela URL em cache...")
+        destino = os.path.join(self.dados_dir, cache.get("nome_arquivo") or ARQUIVO_MICRODADOS)
+        try:
+            with criar_sessao() as sessao:
+                if cache.get("href_sharepoint"):
+                    resposta = sessao.get(cache["href_sharepoint"], timeout=self.timeout)
+                    if resposta.status_code in STATUS_ACESSO_NEGADO:
+                        raise AcessoNegado(f"HTTP {resposta.status_code} no link do SharePoint")
+                    resposta.raise_for_status()
+                self.arquivo_baixado, self.dados_alterados = baixar_se_alterado(
+                    cache["url_download"], destino, self.cache_validadores, FONTE_MICRODADOS, sessao
+                )
+        except AcessoNegado as e:
+            print(f"URL de download em cache expirou ({e}), descartando-a e usando o navegador")
+            self.invalidar_cache_download()
+            return None
+        except Exception as e:
+            print(f"Download direto falhou, usando o navegador: {e}")
+            return None
+
+        if self.dados_alterados:
+            print(f"Download concluído: {self.arquivo_baixado}")
+        else:
+            print(f"Microdados sem alterações desde o último download: {self.arquivo_baixado}")
+        return self.arquivo_baixado
+
+    @medir_etapa
+    def localizar_href_sharepoint(self):
+        """
+        Aguarda o link do SharePoint aparecer na página aberta e retorna o endereço dele
+
+        Returns:
+            str: href do link, ou None se ele não apareceu no documento principal nem nos iframes
+        """
+        # Aguardar o conteúdo dinâmico carregar até o link aparecer, no documento
+        # principal ou em algum iframe
+        print("Aguardando carregamento de conteúdo dinâmico...")
+        href = aguardar_condicao(
+            self.driver, lambda d: self._localizar_link_sharepoint(), self.timeout
+        )
+        if not href:
+            print("Nenhum link do SharePoint foi encontrado na página ou iframes")
+            return None
+        return href
+
+    @medir_etapa
+    def baixar_do_sharepoint(self, href):
+        """
+        Abre a pasta do SharePoint e baixa o arquivo de microdados
+
+        Args:
+            href (str): Link da pasta do SharePoint
+
+        Returns:
+            str: Caminho do arquivo baixado, ou None se o download falhou
+        """
+        self.arquivo_baixado = None
+        print(f"Abrindo SharePoint: {href}")
+
+        # Abrir diretamente na mesma aba
+        self.driver.get(href)
+
+        # Aguardar a página do SharePoint carregar
+        print("Aguardando página do SharePoint carregar...")
+        aguardar_url(self.driver, self.dominio_sharepoint, self.timeout)
+        aguardar_pagina_carregada(self.driver, self.timeout)
+
+        # Verificar se chegou no SharePoint
+        current_url = self.driver.current_url
+        print(f"URL atual: {current_url}")
+
+        if self.dominio_sharepoint not in current_url:
+            print("Falha ao navegar para o SharePoint")
+            return None
+
+        print("Navegação para SharePoint bem-sucedida!")
+        # Procurar e clicar no arquivo específico
+        self.baixar_arquivo_sharepoint()
+
+        # Guardar a URL resolvida para as próximas execuções dispensarem o navegador
+        if self.arquivo_baixado:
+            self.salvar_cache_download(href)
+        return self.arquivo_baixado
+
     def baixar_dados(self):
-        """Método principal para baixar os dados"""
+        """
+        Localiza o link do SharePoint na página já aberta e baixa os microdados
+
+        Tentativa única, sem checkpoint nem disjuntor; executar_scraping usa
+        baixar_com_navegador, que faz as mesmas etapas com novas tentativas.
+        """
         if not self.driver:
             raise Exception("Driver não inicializado. Chame inicializar_driver() primeiro.")
             
         try:
-            # Aguardar mais tempo para garantir que conteúdo dinâmico carregue
-            print("Aguardando carregamento de conteúdo dinâmico...")
-            time.sleep(10)
-
-            # Tentar múltiplas estratégias para encontrar o link
-            sharepoint_link = None
-
-            # Primeiro, verificar se há iframes na página
-            iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
-            print(f"Encontrados {len(iframes)} iframes na página")
-
-            # Procurar no documento principal primeiro
-            sharepoint_link = self.buscar_link_sharepoint()
-
-            # Se não encontrou no documento principal, procurar nos iframes
-            if not sharepoint_link and iframes:
-                for i, iframe in enumerate(iframes):
-                    try:
-                        print(f"Verificando iframe {i + 1}...")
-                        self.driver.switch_to.frame(iframe)
-                        sharepoint_link = self.buscar_link_sharepoint()
-                        if sharepoint_link:
-                            print(f"Link encontrado no iframe {i + 1}")
-                            break
-                        self.driver.switch_to.default_content()
-                    except Exception as e:
-                        print(f"Erro ao verificar iframe {i + 1}: {e}")
-                        self.driver.switch_to.default_content()
-
-            if sharepoint_link:
-                # Obter o href do link
-                href = sharepoint_link.get_attribute("href")
-                print(f"Abrindo SharePoint: {href}")
-
-                # Abrir diretamente na mesma aba
-                self.driver.get(href)
-
-                # Aguardar a página do SharePoint carregar
-                print("Aguardando página do SharePoint carregar...")
-                time.sleep(1)
-
-                # Verificar se chegou no SharePoint
-                current_url = self.driver.current_url
-                print(f"URL atual: {current_url}")
-
-                if "sharepoint.com" in current_url:
-                    print("Navegação para SharePoint bem-sucedida!")
-                    # Procurar e clicar no arquivo específico
-                    self.baixar_arquivo_sharepoint()
-                else:
-                    print("Falha ao navegar para o SharePoint")
+            href = self.localizar_href_sharepoint()
+            if href:
+                self.baixar_do_sharepoint(href)
+        except Exception as e:
+            print(f"Erro ao baixar dados: {e}")
 
-            else:
-                print("Nenhum link do SharePoint foi encontrado na página ou iframes")
+    def _iniciar_artefatos(self):
+        """Registra a execução atual no acervo, com o mesmo identificador do trace"""
+        try:
+            if self.acervo is None:
+                self.acervo = Acervo(self.pasta_acervo)
+            self.artefatos = self.acervo.iniciar_execucao(
+                SERVICO_METRICAS, self.rastreador.execucao, self.capturas
+            )
+        except Exception as e:
+            print(f"Aviso: acervo indisponível, downloads e capturas não serão guardados: {e}")
+            self.artefatos = None
 
+    def _concluir_artefatos(self):
+        """Guarda os microdados vigentes no acervo e encerra a execução nele"""
+        if self.artefatos is None:
+            return
+        try:
+            if self.arquivo_baixado and os.path.exists(self.arquivo_baixado):
+                validadores = self.cache_validadores.obter(FONTE_MICRODADOS)
+                sha256 = validadores.get("sha256") if validadores.get("arquivo") == self.arquivo_baixado else None
+                self.artefatos.guardar_arquivo(self.arquivo_baixado, sha256=sha256)
+            self.artefatos.concluir(self.dados_alterados is not None)
         except Exception as e:
-            print(f"Erro ao baixar dados: {e}")
+            print(f"Aviso: execução não foi encerrada no acervo: {e}")
+
+    def _capturar_tela(self, nome):
+        """Captura a tela para o acervo, conforme a política de capturas do scraper"""
+        if self.artefatos is None or not self.driver:
+            return
+        try:
+            self.artefatos.capturar_tela(self.driver, f"{self.timestamp}_{nome}.png")
+        except Exception as e:
+            print(f"Não foi possível capturar a tela: {e}")
+
+    def _descartar_driver(self):
+        """Fecha o navegador após um erro, para a próxima tentativa abrir outro"""
+        try:
+            self.fechar_driver()
+        except Exception:
+            self.driver = None
+
+    def _etapa_link_sharepoint(self):
+        """Etapa do checkpoint: abre a página da FVS e resolve o link do SharePoint"""
+        try:
+            if not self.driver:
+                self.inicializar_driver()
+            href = self.localizar_href_sharepoint() if self.acessar_pagina() else None
+        except Exception:
+            self._capturar_tela("erro_link_sharepoint")
+            self._descartar_driver()
+            raise
+        if not href:
+            self._capturar_tela("erro_link_sharepoint")
+        return href
+
+    def _etapa_download(self, href):
+        """Etapa do checkpoint: baixa o arquivo pela pasta do SharePoint"""
+        try:
+            if not self.driver:
+                self.inicializar_driver()
+            if not self.baixar_do_sharepoint(href):
+                self._capturar_tela("erro_download")
+                return None
+        except Exception:
+            self._capturar_tela("erro_download")
+            self._descartar_driver()
+            raise
+        return {"arquivo": self.arquivo_baixado, "alterado": self.dados_alterados}
+
+    @medir_etapa
+    def baixar_com_navegador(self):
+        """
+        Baixa os microdados pelo navegador em etapas com novas tentativas
+
+        Cada etapa é tentada de novo sozinha, após uma espera com jitter. O
+        link do SharePoint e o resultado do download ficam no checkpoint: se a
+        execução falhar, a próxima não repete as etapas já concluídas (o
+        Chrome nem é aberto quando o download já tinha terminado).
+
+        Raises:
+            FalhaEtapa: Uma etapa esgotou as tentativas
+            CircuitoAberto: A fonte falhou seguidamente e está em intervalo de espera
+        """
+        etapa = functools.partial(
+            executar_etapa, disjuntor=self.disjuntor, checkpoint=self.checkpoint, tentativas=self.tentativas
+        )
+        href = etapa("link_sharepoint", self._etapa_link_sharepoint, FONTE_SALA_SITUACAO)
+        download = etapa("download", lambda: self._etapa_download(href), FONTE_SHAREPOINT)
+        self.arquivo_baixado = download["arquivo"]
+        self.dados_alterados = download["alterado"]
             
     def executar_scraping(self):
-        """Método principal que executa todo o processo de scraping"""
+        """
+        Método principal que executa todo o processo de scraping
+        
+        Cada etapa da execução vira um span; ao final, o trace e as métricas
+        são exportados na pasta de métricas (ver comum.rastreamento).
+        
+        Returns:
+            bool: True se há dados novos, False se nada mudou desde o último
+                  download e None se o download falhou
+        """
+        # Uma instância pode executar várias vezes (modo serviço): um trace por execução
+        self.rastreador = Rastreador(SERVICO_METRICAS, self.pasta_metricas)
+        self._iniciar_artefatos()
+        try:
+            with self.rastreador.span("executar_scraping") as atributos:
+                atributos["resultado"] = self._executar_scraping()
+            return self.dados_alterados
+        finally:
+            self._concluir_artefatos()
+            self._registrar_metricas()
+
+    def _registrar_metricas(self):
+        """Conta o arquivo baixado na execução e exporta o trace e as métricas"""
+        if self.dados_alterados and self.arquivo_baixado and os.path.exists(self.arquivo_baixado):
+            self.rastreador.contar("arquivos_baixados", fonte=FONTE_MICRODADOS)
+            self.rastreador.contar(
+                "bytes_baixados", os.path.getsize(self.arquivo_baixado), fonte=FONTE_MICRODADOS
+            )
+        self.rastreador.contar("execucoes", resultado=resultado_execucao(self.dados_alterados))
+        self.rastreador.imprimir_resumo()
+        self.rastreador.exportar()
+
+    def _executar_scraping(self):
+        """Executa o scraping; ver executar_scraping"""
+        self.arquivo_baixado = None
+        self.dados_alterados = None
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         try:
             print("Iniciando scraping de dados SRAG hospitalizados...")
-            self.inicializar_driver()
-            self.acessar_pagina()
-            self.baixar_dados()
+
+            # Caminho rápido: URL já conhecida, sem iniciar o Chrome
+            if self.download_direto and self.baixar_via_http():
+                self.checkpoint.limpar()
+                print("Script concluído.")
+                return self.dados_alterados
+
+            self.baixar_com_navegador()
+            self.checkpoint.limpar()
             print("Script concluído.")
+        except CircuitoAberto as e:
+            print(f"Scraping adiado: {e}")
+        except FalhaEtapa as e:
+            print(f"Erro durante o scraping: {e}")
+            print("A próxima execução retoma a partir da última etapa concluída")
         except Exception as e:
             print(f"Erro durante o scraping: {e}")
         finally:
-            self.fechar_driver()
+            if not self.manter_driver:
+                self.fechar_driver()
+        return self.dados_alterados
 
 
 if __name__ == "__main__":
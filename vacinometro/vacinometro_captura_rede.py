@@ -0,0 +1,143 @@
+"""
+Captura dos dados do vacinômetro pelo tráfego de rede do painel
+
+O painel é um mashup Qlik Sense: os números chegam ao navegador por um
+WebSocket da Engine API (JSON-RPC). Em vez de clicar em filtros com classes CSS
+geradas e exportar a planilha, os filtros são aplicados pela API JavaScript do
+Qlik e as respostas de GetLayout/GetHyperCubeData são lidas do log de
+desempenho do Chrome (eventos do DevTools Protocol).
+"""
+
+import csv
+import json
+import os
+
+# Aplica seleções pela API de capacidades do Qlik, sem depender do DOM do painel
+SCRIPT_SELECIONAR = """
+const filtros = arguments[0];
+const concluir = arguments[arguments.length - 1];
+if (typeof require === 'undefined') { concluir('RequireJS não encontrado na página'); return; }
+require(['js/qlik'], function (qlik) {
+    const app = qlik.currApp();
+    if (!app) { concluir('Aplicativo Qlik não encontrado'); return; }
+    const selecoes = Object.entries(filtros).map(([campo, valores]) =>
+        app.field(campo).selectValues(valores.map(v => ({qText: v})), false, true));
+    Promise.all(selecoes).then(() => concluir(null), e => concluir(String(e)));
+}, function (e) { concluir(String(e)); });
+"""
+
+
+class ColetorQlik:
+    """
+    Reconstrói as tabelas (hypercubes) do painel a partir dos frames do WebSocket
+
+    Os pedidos enviados (Network.webSocketFrameSent) associam o id de cada
+    chamada ao handle do objeto; as respostas (Network.webSocketFrameReceived)
+    trazem o layout com cabeçalhos e as páginas de dados.
+    """
+
+    def __init__(self):
+        self.pedidos = {}  # id da chamada -> (método, handle)
+        self.objetos = {}  # handle -> {'id', 'titulo', 'colunas', 'linhas'}
+        self.frames = 0
+
+    def processar_logs(self, logs):
+        """
+        Processa entradas de driver.get_log('performance')
+
+        Returns:
+            int: Número de frames do WebSocket processados nesta chamada
+        """
+        antes = self.frames
+        for entrada in logs:
+            try:
+                mensagem = json.loads(entrada["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            metodo = mensagem.get("method")
+            if metodo in ("Network.webSocketFrameSent", "Network.webSocketFrameReceived"):
+                payload = mensagem.get("params", {}).get("response", {}).get("payloadData")
+                if payload:
+                    self.processar_frame(payload, enviado=metodo.endswith("Sent"))
+        return self.frames - antes
+
+    def processar_frame(self, payload, enviado):
+        """Interpreta um frame JSON-RPC enviado ou recebido"""
+        try:
+            dados = json.loads(payload)
+        except ValueError:
+            return
+        if not isinstance(dados, dict):
+            return
+        self.frames += 1
+
+        if enviado:
+            if "id" in dados:
+                self.pedidos[dados["id"]] = (dados.get("method"), dados.get("handle"))
+            return
+
+        metodo, handle = self.pedidos.pop(dados.get("id"), (None, None))
+        resultado = dados.get("result") or {}
+        if metodo == "GetLayout" and "qLayout" in resultado:
+            self._registrar_layout(handle, resultado["qLayout"])
+        elif metodo == "GetHyperCubeData" and handle in self.objetos:
+            self._adicionar_paginas(self.objetos[handle], resultado.get("qDataPages", []))
+
+    def _registrar_layout(self, handle, layout):
+        """Registra cabeçalhos e dados iniciais de um objeto com hypercube"""
+        cubo = layout.get("qHyperCube")
+        if not cubo:
+            return
+        colunas = [
+            info.get("qFallbackTitle", "")
+            for info in cubo.get("qDimensionInfo", []) + cubo.get("qMeasureInfo", [])
+        ]
+        # Um novo layout (ex.: após mudar filtros) substitui os dados anteriores
+        objeto = {
+            "id": layout.get("qInfo", {}).get("qId", str(handle)),
+            "titulo": layout.get("title", ""),
+            "colunas": colunas,
+            "linhas": {},
+        }
+        self.objetos[handle] = objeto
+        self._adicionar_paginas(objeto, cubo.get("qDataPages", []))
+
+    @staticmethod
+    def _adicionar_paginas(objeto, paginas):
+        """Adiciona as linhas das páginas de dados, indexadas pela posição no cubo"""
+        for pagina in paginas:
+            topo = pagina.get("qArea", {}).get("qTop", 0)
+            for deslocamento, celulas in enumerate(pagina.get("qMatrix", [])):
+                objeto["linhas"][topo + deslocamento] = [celula.get("qText", "") for celula in celulas]
+
+    def tabelas(self):
+        """
+        Retorna as tabelas capturadas que têm dados
+
+        Returns:
+            list: Dicionários com 'id', 'titulo', 'colunas' e 'linhas' (ordenadas)
+        """
+        return [
+            {**objeto, "linhas": [objeto["linhas"][i] for i in sorted(objeto["linhas"])]}
+            for objeto in self.objetos.values()
+            if objeto["linhas"]
+        ]
+
+
+def salvar_tabelas(tabelas, pasta, prefixo):
+    """
+    Salva cada tabela capturada em um CSV
+
+    Returns:
+        list: Caminhos dos arquivos gerados
+    """
+    arquivos = []
+    for tabela in tabelas:
+        nome = f"{prefixo}_{tabela['id']}.csv"
+        caminho = os.path.join(pasta, nome)
+        with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(tabela["colunas"])
+            writer.writerows(tabela["linhas"])
+        arquivos.append(caminho)
+    return arquivos
@@ -1,24 +1,136 @@
 import os
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+
+from comum.espera import (
+    INTERVALO_POLLING,
+    TIMEOUT_DOWNLOAD,
+    TIMEOUT_PADRAO,
+    aguardar_download,
+    aguardar_elemento,
+    aguardar_invisivel,
+    aguardar_opcao,
+    aguardar_pagina_carregada,
+    listar_arquivos,
+    rolar_ate_fim,
+)
+
+from comum.acervo import CAPTURAS_FALHA, PASTA_ACERVO, Acervo, validar_politica
+from comum.dom import buscar_por_texto
+from comum.download_http import CacheDownloads
+from comum.navegador import PERFIL_ENXUTO, aplicar_bloqueios, configurar_perfil
+from comum.rastreamento import PASTA_METRICAS, Rastreador, medir_etapa, resultado_execucao
+from comum.resiliencia import (
+    TENTATIVAS_PADRAO,
+    Checkpoint,
+    CircuitoAberto,
+    Disjuntor,
+    FalhaEtapa,
+    executar_etapa,
+)
+from comum.servico import navegador_responde
+from vacinometro.vacinometro_captura_rede import (
+    SCRIPT_SELECIONAR,
+    ColetorQlik,
+    salvar_tabelas,
+)
+
+# Painel do vacinômetro COVID-19
+URL_PAINEL = "https://infoms.saude.gov.br/extensions/SEIDIGI_DEMAS_Vacina_C19/SEIDIGI_DEMAS_Vacina_C19.html"
+
+# Modos de coleta: exportação pela interface ou leitura do tráfego de rede do painel
+MODO_EXPORTACAO = "exportacao"
+MODO_REDE = "rede"
+
+# Seletor das opções dos dropdowns de filtro
+SELETOR_OPCOES = ".ListBox-styledScrollbars.css-1nwu5vb div"
+
+# Filtros (Região, UF, ...) do painel
+SELETOR_FILTROS = ".folded-listbox.css-abblij"
+
+# Validadores (tamanho e SHA-256) das exportações já baixadas
+NOME_CACHE_VALIDADORES = "validadores_download.json"
+FONTE_EXPORTACAO = "vacinometro_exportacao"
+
+# Formatos da exportação do painel; outros arquivos na pasta de download são ignorados
+EXTENSOES_EXPORTACAO = (".xlsx", ".csv")
+
+# Etapas de cada UF concluídas na execução atual e disjuntor do painel
+NOME_CHECKPOINT = "checkpoint_execucao.json"
+NOME_DISJUNTOR = "disjuntores.json"
+FONTE_PAINEL = "vacinometro_painel"
+
+# Etapas de cada UF no checkpoint; as de página valem só no navegador que as fez
+ETAPAS_NAVEGADOR = ("navegacao", "filtros", "rolagem")
+ETAPA_EXPORTACAO = "exportacao"
+ETAPA_CAPTURA_REDE = "captura_rede"
+
+# Nome das execuções deste scraper no trace e nas métricas
+SERVICO_METRICAS = "vacinometro_scraper"
+
+# Seleção padrão dos filtros do painel
+REGIAO_PADRAO = "Norte"
+UF_PADRAO = "AM"
+
+# UFs de cada região, para coletas com várias UFs
+UFS_POR_REGIAO = {
+    "Norte": ["AC", "AM", "AP", "PA", "RO", "RR", "TO"],
+    "Nordeste": ["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"],
+    "Centro-Oeste": ["DF", "GO", "MS", "MT"],
+    "Sudeste": ["ES", "MG", "RJ", "SP"],
+    "Sul": ["PR", "RS", "SC"],
+}
+
+# Navegadores abertos ao mesmo tempo na coleta de várias UFs
+TAMANHO_POOL_PADRAO = 3
 
 
 class VacinometroCovidScraper:
     """Classe para fazer scraping de dados do vacinômetro COVID-19"""
     
-    def __init__(self, dados_dir=None):
+    def __init__(self, dados_dir=None, timeout=TIMEOUT_PADRAO, timeout_download=TIMEOUT_DOWNLOAD,
+                 modo=MODO_EXPORTACAO, filtros=None, regiao=REGIAO_PADRAO, uf=UF_PADRAO,
+                 pasta_download=None, url_painel=URL_PAINEL, tentativas=TENTATIVAS_PADRAO,
+                 manter_driver=False, perfil=PERFIL_ENXUTO, capturas=CAPTURAS_FALHA,
+                 checkpoint=None, disjuntor=None, cache_validadores=None):
         """
         Inicializa o scraper
         
         Args:
             dados_dir (str, optional): Diretório para salvar os dados. 
                                      Se None, usa pasta padrão 'vacinometro/dados'
+            timeout (float, optional): Tempo máximo de espera por páginas e elementos, em segundos
+            timeout_download (float, optional): Tempo máximo de espera pelo download, em segundos
+            modo (str, optional): 'exportacao' clica nos filtros e exporta a planilha;
+                                  'rede' aplica os filtros pela API do Qlik e lê os dados
+                                  das respostas do WebSocket do painel
+            filtros (dict, optional): Campos do Qlik e valores a selecionar no modo 'rede'.
+                                      Se None, usa a região e a UF informadas
+            regiao (str, optional): Região selecionada no filtro do painel
+            uf (str, optional): Sigla da UF selecionada no filtro do painel
+            pasta_download (str, optional): Pasta onde o Chrome grava os downloads.
+                                            Se None, usa dados_dir
+            url_painel (str, optional): Endereço do painel (ex.: um site simulado local)
+            tentativas (int, optional): Tentativas de cada etapa (filtros, rolagem, exportação)
+            manter_driver (bool, optional): Mantém o Chrome aberto ao fim de executar_scraping,
+                                            para a próxima execução reaproveitá-lo (modo serviço)
+            perfil (str, optional): Perfil do Chrome: 'enxuto' (sem janela, sem imagens, fontes
+                                    e rastreadores) ou 'completo' (janela maximizada, carrega tudo)
+            capturas (str, optional): Capturas de tela guardadas no acervo: 'falha' (só as das
+                                      UFs cuja coleta falhou), 'sempre' ou 'nunca'
+            checkpoint (Checkpoint, optional): Checkpoint compartilhado com outro scraper.
+                                               Se None, carrega o da pasta de dados
+            disjuntor (Disjuntor, optional): Disjuntor compartilhado com outro scraper.
+                                             Se None, carrega o da pasta de dados
+            cache_validadores (CacheDownloads, optional): Validadores compartilhados com
+                                                          outro scraper. Se None, carrega
+                                                          os da pasta de dados
         """
         # Definir pasta para salvar os dados
         if dados_dir is None:
@@ -29,127 +141,221 @@ class VacinometroCovidScraper:
         # Garantir que a pasta existe
         os.makedirs(self.dados_dir, exist_ok=True)
         
+        # Pasta de download própria permite vários navegadores na mesma pasta de dados
+        self.pasta_download = pasta_download or self.dados_dir
+        os.makedirs(self.pasta_download, exist_ok=True)
+        
         # Obter timestamp para nomear arquivos
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.prefixo_arquivos = self.timestamp
+        
+        # Tempos máximos das esperas por condição
+        self.timeout = timeout
+        self.timeout_download = timeout_download
+        
+        # Validadores do último download, para descartar exportações repetidas
+        self.cache_validadores = cache_validadores or CacheDownloads(
+            os.path.join(self.dados_dir, NOME_CACHE_VALIDADORES)
+        )
+        
+        # Arquivo baixado na execução atual e se ele trouxe dados novos
+        self.arquivo_baixado = None
+        self.dados_alterados = None
+        
+        # Modo de coleta, seleção do painel e filtros usados no modo 'rede'
+        self.modo = modo
+        self.regiao = regiao
+        self.uf = uf
+        self.filtros = filtros or {"Região": [regiao], "UF": [uf]}
+        self.fonte = FONTE_EXPORTACAO
+        self.url_painel = url_painel
+        
+        # Etapas com novas tentativas; UFs já coletadas ficam no checkpoint até a execução terminar
+        self.tentativas = tentativas
+        self.checkpoint = checkpoint or Checkpoint(os.path.join(self.dados_dir, NOME_CHECKPOINT))
+        self.disjuntor = disjuntor or Disjuntor(os.path.join(self.dados_dir, NOME_DISJUNTOR))
         
         # Inicializar driver como None
         self.driver = None
+        self.driver_iniciado_em = None
+        self.manter_driver = manter_driver
+        self.perfil = perfil
+        
+        # Spans e contadores da execução, exportados ao fim de executar_scraping
+        self.pasta_metricas = PASTA_METRICAS
+        self.rastreador = Rastreador(SERVICO_METRICAS, self.pasta_metricas)
+        
+        # Downloads e capturas de tela de cada execução no acervo (aberto na primeira execução)
+        self.capturas = validar_politica(capturas)
+        self.pasta_acervo = PASTA_ACERVO
+        self.acervo = None
+        self.artefatos = None
         
     def _configurar_chrome(self):
-        """Configura as opções do Chrome para download"""
+        """Configura as opções do Chrome para download, conforme o perfil do scraper"""
         chrome_options = Options()
-        chrome_options.add_argument("--start-maximized")  # Iniciar maximizado
         
         # Configurar diretório de download para a pasta DADOS_DIR
         prefs = {
-            "download.default_directory": self.dados_dir,
+            "download.default_directory": self.pasta_download,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True
         }
-        chrome_options.add_experimental_option("prefs", prefs)
+        configurar_perfil(chrome_options, self.perfil, prefs)
+        
+        # No modo 'rede', registrar os eventos do DevTools para ler os frames do WebSocket
+        if self.modo == MODO_REDE:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         
         return chrome_options
         
+    @medir_etapa
     def inicializar_driver(self):
         """Inicializa o driver do Chrome"""
         chrome_options = self._configurar_chrome()
         self.driver = webdriver.Chrome(options=chrome_options)
+        aplicar_bloqueios(self.driver, self.perfil, self.pasta_download)
+        self.driver_iniciado_em = time.monotonic()
         
+    @medir_etapa
     def fechar_driver(self):
         """Fecha o driver do Chrome"""
         if self.driver:
             self.driver.quit()
             self.driver = None
 
+    def reiniciar_driver(self):
+        """Fecha o navegador, mesmo que ele não responda mais, e abre outro"""
+        try:
+            self.fechar_driver()
+        except Exception:
+            self.driver = None
+        self.inicializar_driver()
+
+    def definir_selecao(self, regiao, uf):
+        """
+        Troca a região e a UF coletadas, reaproveitando o navegador aberto
+        
+        Os arquivos gerados passam a levar a UF no nome e os validadores de
+        download ficam separados por UF.
+        
+        Args:
+            regiao (str): Região selecionada no filtro do painel
+            uf (str): Sigla da UF selecionada no filtro do painel
+        """
+        self.regiao = regiao
+        self.uf = uf
+        self.filtros = {"Região": [regiao], "UF": [uf]}
+        self.fonte = f"{FONTE_EXPORTACAO}_{uf}"
+        self.prefixo_arquivos = f"{self.timestamp}_{uf}"
+        self.arquivo_baixado = None
+        self.dados_alterados = None
+
+    def renovar_timestamp(self):
+        """Gera um novo timestamp para os arquivos da próxima coleta, mantendo a UF no prefixo"""
+        sufixo = self.prefixo_arquivos[len(self.timestamp):]
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.prefixo_arquivos = f"{self.timestamp}{sufixo}"
+
+    @medir_etapa
+    def abrir_painel(self):
+        """Abre a página do painel e aguarda o carregamento"""
+        if not self.driver:
+            raise Exception("Driver não inicializado. Chame inicializar_driver() primeiro.")
+
+        print("Abrindo URL...")
+        self.driver.get(self.url_painel)
+        print("Aguardando carregamento da página...")
+        if not aguardar_pagina_carregada(self.driver, self.timeout):
+            print(f"Página do painel não carregou em {self.timeout}s")
+            return False
+        return True
+
+    @medir_etapa
     def aplicar_filtros(self):
         """Abre a página uma única vez e aplica os filtros de região e UF em sequência"""
+        try:
+            return self.abrir_painel() and self.selecionar_filtros()
+        except Exception as e:
+            print(f"Erro ao abrir o painel: {e}")
+            return False
+
+    @medir_etapa
+    def selecionar_filtros(self):
+        """Aplica os filtros de região e UF em sequência no painel já aberto (ver abrir_painel)"""
         if not self.driver:
             raise Exception("Driver não inicializado. Chame inicializar_driver() primeiro.")
             
         try:
-            # Abrir a URL
-            print("Abrindo URL...")
-            self.driver.get(
-                "https://infoms.saude.gov.br/extensions/SEIDIGI_DEMAS_Vacina_C19/SEIDIGI_DEMAS_Vacina_C19.html"
-            )
-
-            # Aguardar carregamento da página
-            print("Aguardando carregamento da página...")
-            time.sleep(5)  # Dar tempo para página inicializar
-
-            # Aplicar filtro de região (Norte)
-            self.selecionar_regiao_norte()
+            # Aplicar filtro de região
+            if not self.selecionar_regiao():
+                return False
 
-            # Aplicar filtro de UF (AM)
-            self.selecionar_uf_am()
+            # Aplicar filtro de UF
+            if not self.selecionar_uf():
+                return False
 
-            # Tirar screenshot final com todos os filtros aplicados
-            time.sleep(0.5)
-            screenshot_path = os.path.join(self.dados_dir, f"{self.timestamp}_filtros_aplicados.png")
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Screenshot salvo em: {screenshot_path}")
+            # Captura final com todos os filtros aplicados
+            self._capturar_tela("filtros_aplicados")
             print("Todos os filtros foram aplicados com sucesso!")
+            return True
 
         except Exception as e:
             print("Ocorreu um erro:")
             print(e)
             import traceback
             traceback.print_exc()
+            return False
 
+    @medir_etapa
     def selecionar_regiao_norte(self):
         """Seleciona a região Norte no filtro"""
+        return self.selecionar_regiao("Norte")
+
+    @medir_etapa
+    def selecionar_regiao(self, regiao=None):
+        """
+        Seleciona uma região no filtro
+        
+        Args:
+            regiao (str, optional): Nome da região. Se None, usa a região do scraper
+        """
+        regiao = regiao or self.regiao
         try:
             # Aguardar o elemento do filtro aparecer
             print("Aguardando elementos de filtro carregarem...")
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, ".folded-listbox.css-abblij")
-                )
+            region_filter = aguardar_elemento(
+                self.driver, By.CSS_SELECTOR, SELETOR_FILTROS, self.timeout
             )
+            if not region_filter:
+                print(f"Filtros não carregaram em {self.timeout}s")
+                return False
 
             # Clicar no filtro de região
             print("Clicando no filtro 'Região'...")
-            region_filter = self.driver.find_element(
-                By.CSS_SELECTOR, ".folded-listbox.css-abblij"
-            )
             region_filter.click()
 
-            # Aguardar as opções do dropdown aparecerem
-            time.sleep(2)
-
-            # Encontrar e clicar na opção "Norte"
-            print("Procurando e selecionando a opção 'Norte'...")
-            dropdown_options = self.driver.find_elements(
-                By.CSS_SELECTOR, ".ListBox-styledScrollbars.css-1nwu5vb div"
+            # Aguardar as opções do dropdown aparecerem e selecionar a região
+            print(f"Procurando e selecionando a opção '{regiao}'...")
+            option = aguardar_opcao(
+                self.driver, By.CSS_SELECTOR, SELETOR_OPCOES, regiao, self.timeout
             )
 
-            # Procurar diretamente pela opção "Norte"
-            norte_selecionado = False
-            for option in dropdown_options:
-                if option.text.strip() == "Norte" and option.is_displayed():
-                    option.click()
-                    print("Opção 'Norte' selecionada com sucesso!")
-                    time.sleep(1)  # Pequena pausa para garantir que a seleção foi aplicada
-                    screenshot_path = os.path.join(
-                        self.dados_dir, f"{self.timestamp}_norte_selecionado.png"
-                    )
-                    self.driver.save_screenshot(screenshot_path)
-                    print(f"Screenshot salvo em: {screenshot_path}")
-                    norte_selecionado = True
-                    break
-
-            if not norte_selecionado:
-                print("Não foi possível encontrar a opção 'Norte' no dropdown.")
+            if not option:
+                print(f"Não foi possível encontrar a opção '{regiao}' no dropdown.")
                 return False
 
+            option.click()
+            print(f"Opção '{regiao}' selecionada com sucesso!")
+            self._capturar_tela(f"{regiao.lower()}_selecionado")
+
             # Fechar o dropdown clicando em uma área vazia da página
             print("Fechando o dropdown de região...")
             try:
                 # Tentar clicar no corpo da página para fechar o dropdown
                 body = self.driver.find_element(By.TAG_NAME, "body")
                 body.click()
-                time.sleep(1)  # Aguardar o fechamento do dropdown
             except Exception as e:
                 print(f"Aviso: Não foi possível fechar o dropdown normalmente: {e}")
                 # Tentar fechar usando JavaScript
@@ -157,39 +363,52 @@ class VacinometroCovidScraper:
                     self.driver.execute_script(
                         "document.querySelector('.MuiBackdrop-root').click();"
                     )
-                    time.sleep(1)
                 except Exception:
                     # Última tentativa: tecla ESC
                     from selenium.webdriver.common.keys import Keys
 
                     body = self.driver.find_element(By.TAG_NAME, "body")
                     body.send_keys(Keys.ESCAPE)
-                    time.sleep(1)
+
+            # Aguardar o fechamento do dropdown
+            aguardar_invisivel(self.driver, By.CSS_SELECTOR, SELETOR_OPCOES, self.timeout)
 
             return True
 
         except Exception as e:
-            print(f"Erro ao selecionar região Norte: {e}")
+            print(f"Erro ao selecionar região {regiao}: {e}")
             return False
 
+    @medir_etapa
     def selecionar_uf_am(self):
         """Seleciona a UF AM no filtro"""
+        return self.selecionar_uf("AM")
+
+    @medir_etapa
+    def selecionar_uf(self, uf=None):
+        """
+        Seleciona uma UF no filtro
+        
+        Args:
+            uf (str, optional): Sigla da UF. Se None, usa a UF do scraper
+        """
+        uf = uf or self.uf
         try:
             # Aguardar o elemento do filtro de UF aparecer
             print("Procurando o filtro 'UF'...")
-            filters = self.driver.find_elements(By.CSS_SELECTOR, ".folded-listbox.css-abblij")
-
-            uf_filter = None
-            for filter_elem in filters:
-                if "UF" in filter_elem.text:
-                    uf_filter = filter_elem
-                    print(f"Filtro UF encontrado: '{filter_elem.text}'")
-                    break
-
-            if not uf_filter and len(filters) >= 2:
-                # Se não encontrou pelo texto, pegar o segundo filtro
-                uf_filter = filters[1]  # Geralmente o segundo filtro é UF
-                print("Usando o segundo filtro como UF")
+            # Os textos dos filtros são comparados no navegador, em uma única chamada
+            uf_filter = buscar_por_texto(
+                self.driver, By.CSS_SELECTOR, SELETOR_FILTROS, "UF",
+                exato=False, somente_visiveis=False,
+            )
+            if uf_filter:
+                print("Filtro UF encontrado")
+            else:
+                filters = self.driver.find_elements(By.CSS_SELECTOR, SELETOR_FILTROS)
+                if len(filters) >= 2:
+                    # Se não encontrou pelo texto, pegar o segundo filtro
+                    uf_filter = filters[1]  # Geralmente o segundo filtro é UF
+                    print("Usando o segundo filtro como UF")
 
             if not uf_filter:
                 print("Não foi possível encontrar o filtro de UF")
@@ -199,39 +418,30 @@ class VacinometroCovidScraper:
             print("Clicando no filtro de UF...")
             uf_filter.click()
 
-            # Aguardar as opções do dropdown aparecerem
-            time.sleep(2)
-
-            # Encontrar e clicar na opção "AM"
-            print("Procurando e selecionando a opção 'AM'...")
-            dropdown_options = self.driver.find_elements(
-                By.CSS_SELECTOR, ".ListBox-styledScrollbars.css-1nwu5vb div"
+            # Aguardar as opções do dropdown aparecerem e selecionar a UF
+            print(f"Procurando e selecionando a opção '{uf}'...")
+            option = aguardar_opcao(
+                self.driver, By.CSS_SELECTOR, SELETOR_OPCOES, uf, self.timeout
             )
 
-            # Procurar diretamente pela opção "AM"
-            for option in dropdown_options:
-                if option.text.strip() == "AM" and option.is_displayed():
-                    option.click()
-                    print("Opção 'AM' selecionada com sucesso!")
-                    time.sleep(0.5)  # Pequena pausa para garantir que a seleção foi aplicada
-                    screenshot_path = os.path.join(
-                        self.dados_dir, f"{self.timestamp}_am_selecionado.png"
-                    )
-                    self.driver.save_screenshot(screenshot_path)
-                    print(f"Screenshot salvo em: {screenshot_path}")
-                    # Fechar o dropdown clicando em uma área vazia da página
-                    body = self.driver.find_element(By.TAG_NAME, "body")
-                    body.click()
-                    time.sleep(0.5)  # Aguardar o fechamento do dropdown
-                    return True
+            if not option:
+                print(f"Não foi possível encontrar a opção '{uf}' no dropdown.")
+                return False
 
-            print("Não foi possível encontrar a opção 'AM' no dropdown.")
-            return False
+            option.click()
+            print(f"Opção '{uf}' selecionada com sucesso!")
+            self._capturar_tela(f"{uf.lower()}_selecionado")
+            # Fechar o dropdown clicando em uma área vazia da página
+            body = self.driver.find_element(By.TAG_NAME, "body")
+            body.click()
+            aguardar_invisivel(self.driver, By.CSS_SELECTOR, SELETOR_OPCOES, self.timeout)
+            return True
 
         except Exception as e:
-            print(f"Erro ao selecionar UF AM: {e}")
+            print(f"Erro ao selecionar UF {uf}: {e}")
             return False
 
+    @medir_etapa
     def rolar_fim_pagina(self):
         """Rola a página até o fim"""
         if not self.driver:
@@ -240,25 +450,20 @@ class VacinometroCovidScraper:
         try:
             print("Rolando a página até o fim...")
 
-            # Usar JavaScript para rolar até o fim da página
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-
-            # Tentar rolar mais algumas vezes para garantir que chegou ao fim
-            for _ in range(3):
-                # Rolar mais um pouco
-                self.driver.execute_script("window.scrollBy(0, 500);")
-                time.sleep(0.5)
+            # Rolar até o fim da página até que o conteúdo carregado sob demanda pare de crescer
+            if not rolar_ate_fim(self.driver, self.timeout):
+                print(f"Altura da página não estabilizou em {self.timeout}s")
 
-            # Tirar screenshot da página rolada
-            screenshot_path = os.path.join(self.dados_dir, f"{self.timestamp}_pagina_rolada.png")
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Screenshot salvo em: {screenshot_path}")
+            # Captura da página rolada
+            self._capturar_tela("pagina_rolada")
             print("Página rolada com sucesso!")
+            return True
 
         except Exception as e:
             print(f"Erro ao rolar a página: {e}")
+            return False
 
+    @medir_etapa
     def baixar_dados(self):
         """Baixa os dados do vacinômetro"""
         if not self.driver:
@@ -266,43 +471,380 @@ class VacinometroCovidScraper:
             
         try:
             # Encontrar o botão pelo ID
-            download_button = self.driver.find_element(By.ID, "exportar-dados-QV5")
+            download_button = aguardar_elemento(
+                self.driver, By.ID, "exportar-dados-QV5", self.timeout
+            )
+            if not download_button:
+                raise Exception(f"Botão 'exportar-dados-QV5' não apareceu em {self.timeout}s")
             print("Botão encontrado pelo ID")
 
-            # Tirar screenshot antes de clicar
-            screenshot_path = os.path.join(self.dados_dir, f"{self.timestamp}_antes_download.png")
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Screenshot salvo em: {screenshot_path}")
+            # Captura antes de clicar
+            self._capturar_tela("antes_download")
            
             # Clicar no botão de download
             print("Clicando no botão de download...")
+            arquivos_anteriores = listar_arquivos(self.pasta_download)
             self.driver.execute_script("arguments[0].click();", download_button)
-            # Aguardar o download terminar
-            time.sleep(5)
+
+            # Aguardar o download terminar (arquivo novo e nenhum .crdownload na pasta)
+            arquivo_baixado = aguardar_download(
+                self.pasta_download, arquivos_anteriores, EXTENSOES_EXPORTACAO, self.timeout_download
+            )
+            if not arquivo_baixado:
+                raise Exception(f"Download não foi concluído em {self.timeout_download}s")
+            print(f"Download concluído: {arquivo_baixado}")
+
+            # Baixado em pasta própria do navegador: mover para a pasta de dados com a UF no nome
+            if os.path.abspath(self.pasta_download) != os.path.abspath(self.dados_dir):
+                destino = os.path.join(
+                    self.dados_dir, f"{self.prefixo_arquivos}_{os.path.basename(arquivo_baixado)}"
+                )
+                os.replace(arquivo_baixado, destino)
+                arquivo_baixado = destino
+
+            # Exportação idêntica à anterior: descartar a cópia e sinalizar que nada mudou
+            self.arquivo_baixado, self.dados_alterados = (
+                self.cache_validadores.registrar_download(self.fonte, arquivo_baixado)
+            )
+            if self.dados_alterados:
+                # Só exportações novas entram nas métricas, como no scraper de SRAG
+                self.rastreador.contar("arquivos_baixados", fonte=self.fonte)
+                self.rastreador.contar(
+                    "bytes_baixados", os.path.getsize(self.arquivo_baixado), fonte=self.fonte
+                )
+            else:
+                print("Exportação idêntica ao último download, cópia descartada")
+            self._arquivar_download(self.fonte, self.arquivo_baixado)
+            return self.arquivo_baixado
          
         except Exception as e:
             print(f"Erro ao baixar dados: {e}")
-            # Capturar uma screenshot para debug
-            try:
-                screenshot_path = os.path.join(self.dados_dir, f"{self.timestamp}_erro_download.png")
-                self.driver.save_screenshot(screenshot_path)
-                print(f"Screenshot de erro salvo em: {screenshot_path}")
-            except Exception as screenshot_error:
-                print(f"Não foi possível salvar screenshot de erro: {screenshot_error}")
+            # Captura para depuração, guardada no acervo se a coleta da UF falhar
+            self._capturar_tela("erro_download")
+            return None
                 
+    @medir_etapa
+    def capturar_dados_rede(self, ociosidade=1.5):
+        """
+        Coleta os dados do painel pelo tráfego do WebSocket, sem exportar pela interface
+        
+        Os filtros são aplicados pela API JavaScript do Qlik, que não depende das
+        classes CSS do painel. A coleta termina quando o painel passa 'ociosidade'
+        segundos sem trocar mensagens com o servidor.
+        
+        Args:
+            ociosidade (float): Segundos sem novos frames para considerar os dados completos
+        """
+        if not self.driver:
+            raise Exception("Driver não inicializado. Chame inicializar_driver() primeiro.")
+
+        try:
+            print("Abrindo URL...")
+            self.driver.get(self.url_painel)
+            aguardar_pagina_carregada(self.driver, self.timeout)
+
+            coletor = ColetorQlik()
+            coletor.processar_logs(self.driver.get_log("performance"))
+
+            print(f"Aplicando filtros pela API do Qlik: {self.filtros}")
+            self.driver.set_script_timeout(self.timeout)
+            erro = self.driver.execute_async_script(SCRIPT_SELECIONAR, self.filtros)
+            if erro:
+                raise Exception(f"Falha ao aplicar filtros: {erro}")
+
+            # Ler os frames até o painel parar de receber dados
+            print("Lendo respostas do painel...")
+            limite = time.monotonic() + self.timeout
+            ultimo_frame = time.monotonic()
+            while time.monotonic() < limite:
+                if coletor.processar_logs(self.driver.get_log("performance")):
+                    ultimo_frame = time.monotonic()
+                elif coletor.tabelas() and time.monotonic() - ultimo_frame >= ociosidade:
+                    break
+                time.sleep(INTERVALO_POLLING)
+
+            tabelas = coletor.tabelas()
+            if not tabelas:
+                raise Exception(f"Nenhuma tabela recebida do painel em {self.timeout}s")
+
+            arquivos = salvar_tabelas(tabelas, self.dados_dir, f"{self.prefixo_arquivos}_rede")
+            print(f"{len(arquivos)} tabelas capturadas em {self.dados_dir}")
+            self.rastreador.contar("tabelas_capturadas", len(tabelas), fonte=self.fonte)
+            self.rastreador.contar(
+                "linhas_capturadas", sum(len(tabela["linhas"]) for tabela in tabelas), fonte=self.fonte
+            )
+
+            # Cada tabela é uma fonte no cache; cópias idênticas são descartadas
+            self.dados_alterados = False
+            for tabela, arquivo in zip(tabelas, arquivos):
+                fonte = f"{self.fonte}_rede_{tabela['id']}"
+                arquivo, alterado = self.cache_validadores.registrar_download(fonte, arquivo)
+                self._arquivar_download(fonte, arquivo)
+                self.dados_alterados = self.dados_alterados or alterado
+            if not self.dados_alterados:
+                print("Dados idênticos à última captura, cópias descartadas")
+            return True
+
+        except Exception as e:
+            print(f"Erro ao capturar dados pela rede: {e}")
+            return False
+
+    def _iniciar_artefatos(self):
+        """Registra a execução atual no acervo, com o mesmo identificador do trace"""
+        try:
+            if self.acervo is None:
+                self.acervo = Acervo(self.pasta_acervo)
+            self.artefatos = self.acervo.iniciar_execucao(
+                SERVICO_METRICAS, self.rastreador.execucao, self.capturas
+            )
+        except Exception as e:
+            print(f"Aviso: acervo indisponível, downloads e capturas não serão guardados: {e}")
+            self.artefatos = None
+
+    def _concluir_artefatos(self, sucesso):
+        """Encerra a execução no acervo; capturas pendentes só ficam se ela falhou"""
+        if self.artefatos is None:
+            return
+        try:
+            self.artefatos.concluir(sucesso)
+        except Exception as e:
+            print(f"Aviso: execução não foi encerrada no acervo: {e}")
+
+    def _capturar_tela(self, nome):
+        """Captura a tela para o acervo, conforme a política de capturas do scraper"""
+        if self.artefatos is None:
+            return
+        try:
+            self.artefatos.capturar_tela(self.driver, f"{self.prefixo_arquivos}_{nome}.png", grupo=self.uf)
+        except Exception as e:
+            print(f"Não foi possível capturar a tela: {e}")
+
+    def _arquivar_download(self, fonte, arquivo):
+        """Guarda o arquivo vigente da fonte no acervo, reaproveitando o SHA-256 do cache"""
+        if self.artefatos is None or not arquivo:
+            return
+        validadores = self.cache_validadores.obter(fonte)
+        sha256 = validadores.get("sha256") if validadores.get("arquivo") == arquivo else None
+        try:
+            self.artefatos.guardar_arquivo(arquivo, sha256=sha256)
+        except Exception as e:
+            print(f"Aviso: {os.path.basename(arquivo)} não foi guardado no acervo: {e}")
+
+    def _chave_etapa(self, nome):
+        """Chave da etapa da seleção atual no checkpoint"""
+        return f"{self.modo}_{nome}_{self.uf}"
+
+    def _etapa(self, nome, funcao):
+        """Executa uma etapa no painel com novas tentativas, o disjuntor do painel e o checkpoint"""
+        return executar_etapa(
+            self._chave_etapa(nome), funcao, FONTE_PAINEL, self.disjuntor,
+            checkpoint=self.checkpoint, tentativas=self.tentativas,
+        )
+
+    def _etapa_navegador(self, nome, funcao):
+        """
+        Executa uma etapa que só altera a página aberta (navegação, filtros, rolagem)
+
+        O checkpoint guarda a sessão do navegador em que a etapa foi feita; ver
+        _descartar_etapas_navegador.
+        """
+        def executar():
+            return {"sessao": self.driver.session_id} if funcao() else None
+        return self._etapa(nome, executar)
+
+    def _etapa_resultado(self, nome, funcao):
+        """Executa a etapa que produz os dados da seleção e guarda o arquivo e se ele mudou"""
+        def executar():
+            if not funcao():
+                return None
+            return {"arquivo": self.arquivo_baixado, "alterado": self.dados_alterados}
+        return self._etapa(nome, executar)
+
+    def _descartar_etapas_navegador(self):
+        """
+        Esquece as etapas de página feitas em outro navegador
+
+        Navegação, filtros e rolagem ficam no estado da página: só podem ser
+        puladas se o navegador que as fez continua aberto (ex.: modo serviço).
+        Com outro navegador, elas são refeitas antes da exportação.
+        """
+        sessao = self.driver.session_id if self.driver else None
+        for nome in ETAPAS_NAVEGADOR:
+            salvo = self.checkpoint.concluida(self._chave_etapa(nome))
+            if salvo is not None and salvo.get("sessao") != sessao:
+                self.checkpoint.desmarcar(self._chave_etapa(nome))
+
+    def coletar(self):
+        """
+        Coleta a seleção atual com o navegador já aberto
+        
+        Cada etapa (navegação, filtros, rolagem, exportação) é tentada de novo
+        sozinha, após uma espera com jitter, e vai para o checkpoint ao ser
+        concluída: uma execução que falhou não coleta de novo as UFs já
+        exportadas e, no mesmo navegador, retoma a UF a partir da última etapa.
+        
+        Returns:
+            bool: True se há dados novos, False se os dados são iguais aos
+                  anteriores e None se a coleta falhou
+        """
+        with self.rastreador.span("coletar", uf=self.uf, modo=self.modo) as atributos:
+            atributos["resultado"] = resultado_execucao(self._coletar())
+        # Capturas da UF: guardadas se a coleta falhou, descartadas se deu certo
+        if self.artefatos is not None:
+            if self.dados_alterados is None:
+                self.artefatos.guardar_capturas(self.uf)
+            else:
+                self.artefatos.descartar_capturas(self.uf)
+        return self.dados_alterados
+
+    def _coletar(self):
+        """Coleta a seleção atual; ver coletar"""
+        etapa_final = ETAPA_CAPTURA_REDE if self.modo == MODO_REDE else ETAPA_EXPORTACAO
+        coletada = self.checkpoint.concluida(self._chave_etapa(etapa_final)) is not None
+        if coletada:
+            print(f"{self.uf} já coletada na execução anterior")
+        else:
+            self._descartar_etapas_navegador()
+
+        try:
+            if self.modo == MODO_REDE:
+                coleta = self._etapa_resultado(ETAPA_CAPTURA_REDE, self.capturar_dados_rede)
+            else:
+                if not coletada:
+                    etapas = (self.abrir_painel, self.selecionar_filtros, self.rolar_fim_pagina)
+                    for nome, funcao in zip(ETAPAS_NAVEGADOR, etapas):
+                        self._etapa_navegador(nome, funcao)
+                coleta = self._etapa_resultado(ETAPA_EXPORTACAO, self.baixar_dados)
+        except (FalhaEtapa, CircuitoAberto) as e:
+            print(f"Coleta de {self.uf} interrompida: {e}")
+            return None
+
+        self.arquivo_baixado = coleta["arquivo"]
+        self.dados_alterados = coleta["alterado"]
+        return self.dados_alterados
+
     def executar_scraping(self):
-        """Método principal que executa todo o processo de scraping"""
+        """
+        Método principal que executa todo o processo de scraping
+        
+        Cada etapa da execução vira um span; ao final, o trace e as métricas
+        são exportados na pasta de métricas (ver comum.rastreamento).
+        
+        Returns:
+            bool: True se há dados novos, False se a exportação é igual à
+                  anterior e None se o download falhou
+        """
+        # Uma instância pode executar várias vezes (modo serviço): um trace por execução
+        self.rastreador = Rastreador(SERVICO_METRICAS, self.pasta_metricas)
+        self._iniciar_artefatos()
+        try:
+            with self.rastreador.span("executar_scraping") as atributos:
+                atributos["resultado"] = resultado_execucao(self._executar_scraping())
+            return self.dados_alterados
+        finally:
+            self._concluir_artefatos(self.dados_alterados is not None)
+            self._exportar_metricas({self.uf: self.dados_alterados})
+
+    def _exportar_metricas(self, resultados):
+        """Conta o resultado de cada UF e exporta o trace e as métricas da execução"""
+        for uf, resultado in resultados.items():
+            self.rastreador.contar("coletas", uf=uf, resultado=resultado_execucao(resultado))
+        self.rastreador.imprimir_resumo()
+        self.rastreador.exportar()
+
+    def _executar_scraping(self):
+        """Executa o scraping; ver executar_scraping"""
+        self.arquivo_baixado = None
+        self.dados_alterados = None
+        self.renovar_timestamp()
         try:
             print("Iniciando scraping de dados do vacinômetro COVID-19...")
-            self.inicializar_driver()
-            self.aplicar_filtros()
-            self.rolar_fim_pagina()
-            self.baixar_dados()
+            self.disjuntor.verificar(FONTE_PAINEL)
+            if not self.driver:
+                self.inicializar_driver()
+            if self.coletar() is not None:
+                self.checkpoint.limpar()
             print("Script concluído.")
+        except CircuitoAberto as e:
+            print(f"Scraping adiado: {e}")
         except Exception as e:
             print(f"Erro durante o scraping: {e}")
         finally:
-            self.fechar_driver()
+            if not self.manter_driver:
+                self.fechar_driver()
+        return self.dados_alterados
+
+    def executar_varias_ufs(self, selecoes, tamanho_pool=TAMANHO_POOL_PADRAO):
+        """
+        Coleta várias UFs em paralelo com um pool de navegadores reaproveitados
+        
+        Cada navegador é aberto uma vez e coleta as UFs da fila até ela
+        esvaziar, com pasta de download própria. Cada UF gera seus próprios
+        arquivos na pasta de dados, com a UF no nome.
+        
+        Args:
+            selecoes (list): Pares (região, UF), ex.: [("Norte", "AM"), ("Norte", "PA")]
+            tamanho_pool (int): Máximo de navegadores abertos ao mesmo tempo
+            
+        Returns:
+            dict: Resultado de cada UF (True, False ou None, como em executar_scraping)
+        """
+        # Um único trace e uma única execução no acervo, com os spans e arquivos de todos os navegadores
+        self.rastreador = Rastreador(SERVICO_METRICAS, self.pasta_metricas)
+        self._iniciar_artefatos()
+        fila = queue.Queue()
+        for selecao in selecoes:
+            fila.put(selecao)
+        resultados = {uf: None for _, uf in selecoes}
+
+        def trabalhar(numero):
+            # Cada navegador tem seu próprio scraper; checkpoint, disjuntor e validadores são compartilhados
+            scraper = VacinometroCovidScraper(
+                self.dados_dir, self.timeout, self.timeout_download, self.modo,
+                pasta_download=os.path.join(self.dados_dir, f"_downloads_{numero}"),
+                url_painel=self.url_painel, tentativas=self.tentativas, perfil=self.perfil,
+                capturas=self.capturas, checkpoint=self.checkpoint, disjuntor=self.disjuntor,
+                cache_validadores=self.cache_validadores,
+            )
+            scraper.timestamp = self.timestamp
+            scraper.rastreador = self.rastreador
+            scraper.artefatos = self.artefatos
+            try:
+                scraper.inicializar_driver()
+                while True:
+                    try:
+                        regiao, uf = fila.get_nowait()
+                    except queue.Empty:
+                        return
+                    print(f"[navegador {numero}] Coletando {regiao}/{uf}...")
+                    scraper.definir_selecao(regiao, uf)
+                    try:
+                        resultados[uf] = scraper.coletar()
+                    except Exception as e:
+                        print(f"[navegador {numero}] Erro ao coletar {uf}: {e}")
+                    # Sessão perdida (Chrome fechado ou travado): as próximas UFs usam outro navegador
+                    if resultados[uf] is None and not navegador_responde(scraper.driver):
+                        print(f"[navegador {numero}] Navegador não responde, reabrindo...")
+                        scraper.reiniciar_driver()
+            except Exception as e:
+                # UFs que sobraram na fila ficam com os outros navegadores
+                print(f"[navegador {numero}] Erro no navegador: {e}")
+            finally:
+                scraper.fechar_driver()
+
+        print(f"Coletando {len(selecoes)} UFs com até {tamanho_pool} navegadores...")
+        with self.rastreador.span("executar_varias_ufs", ufs=len(selecoes), navegadores=tamanho_pool):
+            with ThreadPoolExecutor(max_workers=tamanho_pool) as executor:
+                list(executor.map(trabalhar, range(min(tamanho_pool, len(selecoes)))))
+        self._concluir_artefatos(all(resultado is not None for resultado in resultados.values()))
+        self._exportar_metricas(resultados)
+
+        # Com todas as UFs coletadas, a próxima execução começa do zero
+        if all(resultado is not None for resultado in resultados.values()):
+            self.checkpoint.limpar()
+        else:
+            print("UFs com falha serão coletadas na próxima execução; as demais ficam no checkpoint")
+        return resultados
 
 
 if __name__ == "__main__":